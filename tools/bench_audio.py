@@ -0,0 +1,192 @@
+"""
+Benchmark for the voice audio path (turtlebott/utils/audio.py), no Discord needed.
+
+Runs the two conversions the voice bridge does on every 20ms frame:
+    mic:     48kHz stereo -> 16kHz mono, written to the mic ring, drained like the sender task
+    speaker: 24kHz mono   -> 48kHz stereo, written to the output ring, read back as 20ms frames
+and reports the per-frame cost, the memory allocated per frame once warmed up (measured with
+tracemalloc), and the resampling quality (tone SNR, aliasing/imaging). If audioop is still available
+(it's gone in Python 3.13) the same numbers are printed for it as a baseline.
+
+Usage (from the repo root):
+    python tools/bench_audio.py --frames 20000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from turtlebott.utils.audio import AudioRing, Resampler  # noqa: E402
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+FRAME_MS = 20  # Discord frame size
+
+
+def tone(rate: int, seconds: float, channels: int, freq: float = 1000.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    mono = (8000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+    return np.repeat(mono, channels) if channels == 2 else mono
+
+
+def frames_of(signal: np.ndarray, rate: int, channels: int, ms: int = FRAME_MS) -> list[bytes]:
+    step = rate * ms // 1000 * channels
+    return [signal[i:i + step].tobytes() for i in range(0, len(signal) - step + 1, step)]
+
+
+# --- The two pipelines, numpy version ---
+
+class NumpyMic:
+    def __init__(self):
+        self.resampler = Resampler(48000, 16000, in_channels=2)
+        self.ring = AudioRing(50 * 640, overwrite=True)
+
+    def __call__(self, frame):
+        out = self.resampler.process(frame)
+        self.resampler.rms()
+        self.ring.write(out)
+        self.ring.read(self.ring.available)
+        return out
+
+
+class NumpySpeaker:
+    def __init__(self):
+        self.resampler = Resampler(24000, 48000, out_channels=2)
+        self.ring = AudioRing(50 * 3840)
+        self.frame = bytearray(3840)
+
+    def __call__(self, chunk):
+        out = self.resampler.process(chunk)
+        self.ring.write(out)
+        while self.ring.available >= len(self.frame):
+            self.ring.read_into(self.frame)
+        return out
+
+
+# --- Same thing with audioop and plain bytes, like the first version of the bridge ---
+
+class AudioopMic:
+    def __init__(self):
+        self.state = None
+        self.queue = []
+
+    def __call__(self, frame):
+        audioop.rms(frame, 2)
+        mono = audioop.tomono(frame, 2, 0.5, 0.5)
+        out, self.state = audioop.ratecv(mono, 2, 1, 48000, 16000, self.state)
+        self.queue.append(out)
+        self.queue.pop(0)
+        return out
+
+
+class AudioopSpeaker:
+    def __init__(self):
+        self.state = None
+        self.partial = bytearray()
+
+    def __call__(self, chunk):
+        up, self.state = audioop.ratecv(chunk, 2, 1, 24000, 48000, self.state)
+        out = audioop.tostereo(up, 2, 1, 1)
+        self.partial += out
+        while len(self.partial) >= 3840:
+            bytes(self.partial[:3840])
+            del self.partial[:3840]
+        return out
+
+
+# --- Measurements ---
+
+def per_frame_cost(pipeline, frames, count) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        pipeline(frames[i % len(frames)])
+    return (time.perf_counter() - started) / count
+
+
+def allocations(pipeline, frames, count) -> tuple[float, int]:
+    """(bytes allocated and kept per frame, peak bytes above the warmed-up baseline)"""
+    for i in range(200):  # warm up: first-call caches, numpy internals
+        pipeline(frames[i % len(frames)])
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for i in range(count):
+        pipeline(frames[i % len(frames)])
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / count, peak - before
+
+
+def run_through(make, frames, out_channels) -> np.ndarray:
+    pipeline = make()
+    out = np.frombuffer(b"".join(bytes(pipeline(f)) for f in frames), dtype=np.int16)[::out_channels]
+    return out.astype(np.float64)[len(out) // 10:]  # skip the filters warming up
+
+
+def snr(out, rate, freq=1000.0) -> float:
+    """How much of a resampled tone is something other than the tone (best-fit amplitude and phase)."""
+    t = np.arange(len(out)) / rate
+    basis = np.column_stack([np.sin(2 * np.pi * freq * t), np.cos(2 * np.pi * freq * t), np.ones_like(t)])
+    fit, *_ = np.linalg.lstsq(basis, out, rcond=None)
+    noise = out - basis @ fit
+    return 10 * np.log10(np.mean((basis[:, :2] @ fit[:2]) ** 2) / np.mean(noise ** 2))
+
+
+def leak(out, reference_power) -> float:
+    return 10 * np.log10(max(np.mean(out ** 2), 1e-12) / reference_power)
+
+
+def quality(make, path, out_channels) -> tuple[float, float]:
+    """
+    (SNR of a 1kHz tone, out-of-band leakage). Leakage for the mic path is how loud a 10kHz tone
+    comes out of the 16kHz (8kHz Nyquist) stream, i.e. aliasing; for the speaker path it's the
+    energy above 12kHz after upsampling a 1kHz tone, i.e. imaging. Both should be very negative.
+    """
+    if path == "mic":
+        tone_out = run_through(make, frames_of(tone(48000, 1.0, 2), 48000, 2), out_channels)
+        alias_out = run_through(make, frames_of(tone(48000, 1.0, 2, freq=10000), 48000, 2), out_channels)
+        return snr(tone_out, 16000), leak(alias_out, 8000 ** 2 / 2)
+    out = run_through(make, frames_of(tone(24000, 1.0, 1), 24000, 1, ms=40), out_channels)
+    spectrum = np.abs(np.fft.rfft(out)) ** 2
+    freqs = np.fft.rfftfreq(len(out), 1 / 48000)
+    image = spectrum[freqs > 12000].sum() / spectrum.sum()
+    return snr(out, 48000), 10 * np.log10(max(image, 1e-12))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20000, help="frames per timing run")
+    args = parser.parse_args()
+
+    mic_frames = frames_of(tone(48000, 1.0, 2), 48000, 2)                          # 3840 bytes each
+    speaker_chunks = frames_of(tone(24000, 1.0, 1), 24000, 1, ms=40)  # Live sends ~40ms chunks
+
+    variants = [("numpy", NumpyMic, NumpySpeaker)]
+    if audioop is not None:
+        variants.append(("audioop", AudioopMic, AudioopSpeaker))
+
+    print(f"{'':10}{'path':>9}{'us/frame':>11}{'B kept/frame':>15}{'peak B':>9}{'SNR dB':>9}{'leak dB':>9}")
+    for name, mic, speaker in variants:
+        for path, make, frames, out_channels in (
+            ("mic", mic, mic_frames, 1),
+            ("speaker", speaker, speaker_chunks, 2),
+        ):
+            cost = per_frame_cost(make(), frames, args.frames)
+            kept, peak = allocations(make(), frames, args.frames)
+            tone_snr, leakage = quality(make, path, out_channels)
+            print(f"{name:10}{path:>9}{cost * 1e6:>11.1f}{kept:>15.2f}{peak:>9}{tone_snr:>9.1f}{leakage:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
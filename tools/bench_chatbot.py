@@ -0,0 +1,294 @@
+"""
+Load test for the chatbot module, against a fake model backend (no API quota spent).
+
+Simulates a bunch of users each starting a conversation with `ask` and then replying
+to the bot a few times (the on_message path), then reports throughput, latency
+percentiles, how big the conversation indexes got, and what the cleanup task costs.
+
+Usage (from the repo root):
+    python tools/bench_chatbot.py --users 2000 --replies 3 --latency 0.2 --error-rate 0.01 --burst-every 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+from types import SimpleNamespace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from turtlebott.utils.stats import percentile  # noqa: E402
+
+CONFIG_TEMPLATE = """\
+experiments_config:
+  chatbot:
+    enabled: true
+    model: fake-flash
+    models:
+      - name: fake-lite
+        maxPromptTokens: 2000
+      - name: fake-flash
+    systemInstructions: "You are a load test."
+    temperature: 1.0
+    timeoutSeconds: 900
+    historyTokenBudget: {budget}
+    maxResidentConversations: {resident}
+    responseCacheTtl: 60
+    requestTimeout: 30
+    scheduler:
+      maxConcurrent: {concurrency}
+      maxConcurrentPerGuild: {concurrency}
+      requestsPerMinute: {rpm}
+      burst: {concurrency}
+      maxRetries: 5
+"""
+
+
+# --- Fake genai backend ---
+
+class FakeAPIError(Exception):
+    """Looks like what google-genai raises, as far as get_retry_and_code is concerned."""
+
+
+class FakeModels:
+    def __init__(self, args):
+        self.args = args
+        self.calls = 0
+        self.burst_left = 0
+        self.errors = 0
+        self.rate_limits = 0
+
+    def generate_content(self, model, config, contents):
+        # Runs in a worker thread, like the real (blocking) client call.
+        self.calls += 1
+        time.sleep(max(0.0, random.gauss(self.args.latency, self.args.latency * 0.25)))
+
+        if self.args.burst_every and self.calls % self.args.burst_every == 0:
+            self.burst_left = self.args.burst_size
+        if self.burst_left > 0:
+            self.burst_left -= 1
+            self.rate_limits += 1
+            raise FakeAPIError(
+                "429 RESOURCE_EXHAUSTED. {'error': {'code': 429, 'message': 'Quota exceeded.', "
+                "'status': 'RESOURCE_EXHAUSTED', 'details': [{'@type': "
+                f"'type.googleapis.com/google.rpc.RetryInfo', 'retryDelay': '{self.args.retry_delay}s'}}]}}}}"
+            )
+        if random.random() < self.args.error_rate:
+            self.errors += 1
+            raise FakeAPIError("500 INTERNAL. {'error': {'code': 500, 'message': 'Fake failure.'}}")
+
+        prompt_chars = sum(len(c) for c in contents if isinstance(c, str))
+        return SimpleNamespace(
+            text=f"Fake answer from {model} " + "lorem ipsum " * random.randint(5, 60),
+            usage_metadata=SimpleNamespace(prompt_token_count=prompt_chars // 4, candidates_token_count=100),
+        )
+
+
+# --- Fake discord objects (just enough for the chatbot cog) ---
+
+_snowflakes = count(1_000_000_000_000)
+
+
+class FakeTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+    def typing(self):
+        return FakeTyping()
+
+
+class FakeMessage:
+    def __init__(self, author, channel, guild, content, reference=None):
+        self.id = next(_snowflakes)
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.content = content
+        self.attachments = []
+        self.reference = reference
+        self.replies = []
+
+    async def reply(self, text, **kwargs):
+        sent = FakeMessage(BOT_USER, self.channel, self.guild, text)
+        self.replies.append(sent)
+        return sent
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = BOT_USER
+
+    async def wait_until_ready(self):
+        return
+
+
+BOT_USER = SimpleNamespace(id=1, name="turtlebott", bot=True)
+
+
+# --- Helpers ---
+
+def deep_sizeof(obj, seen=None) -> int:
+    """Rough recursive sys.getsizeof (follows containers, dataclasses and __slots__)."""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+
+async def simulate_user(cog, user_no, args, latencies, failures):
+    guild = SimpleNamespace(id=1000 + user_no % args.guilds)
+    channel = FakeChannel(2000 + user_no % (args.guilds * 4))
+    author = SimpleNamespace(id=10_000 + user_no, name=f"user{user_no}", bot=False)
+
+    await asyncio.sleep(random.uniform(0, args.ramp))
+
+    # Some prompts repeat across users, so the response cache/coalescing get exercised
+    if random.random() < args.duplicate_ratio:
+        prompt = f"popular question number {random.randint(1, 20)}"
+    else:
+        prompt = f"unique question from user {user_no} " + "context " * random.randint(1, 40)
+
+    message = FakeMessage(author, channel, guild, prompt)
+    started = time.perf_counter()
+    await cog._handle_prompt(message, prompt, [], convo=None, start_new=True)
+    latencies.append(time.perf_counter() - started)
+    if not message.replies or "rate limited" in message.replies[-1].content or "error occurred" in message.replies[-1].content:
+        failures.append(user_no)
+        return
+
+    last_bot_message = message.replies[-1]
+    for turn in range(args.replies):
+        await asyncio.sleep(random.uniform(0, args.think_time))
+        reference = SimpleNamespace(message_id=last_bot_message.id, resolved=None)
+        reply = FakeMessage(author, channel, guild, f"follow-up {turn} " + "more words " * random.randint(1, 80), reference)
+        started = time.perf_counter()
+        await cog.on_message(reply)
+        latencies.append(time.perf_counter() - started)
+        if not reply.replies:
+            failures.append(user_no)
+            return
+        last_bot_message = reply.replies[-1]
+
+
+async def run(args, chatbot):
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.threads))
+
+    fake_models = FakeModels(args)
+    chatbot.client = SimpleNamespace(models=fake_models)
+
+    cog = chatbot.Chatbot(FakeBot())
+    cog.cleanup_task.cancel()  # we time it by hand below
+
+    latencies: list[float] = []
+    failures: list[int] = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate_user(cog, i, args, latencies, failures) for i in range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    convos = cog.conversations
+    print(f"\n=== {args.users} users x {1 + args.replies} requests ===")
+    print(f"Requests:    {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s)")
+    print(f"Failed:      {len(failures)} users")
+    print(f"Latency:     p50 {percentile(latencies, 0.50) * 1000:.0f}ms, p95 {percentile(latencies, 0.95) * 1000:.0f}ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms, max {max(latencies, default=0) * 1000:.0f}ms")
+    print(f"Backend:     {fake_models.calls} calls, {fake_models.rate_limits} rate limited, {fake_models.errors} errors")
+    print(f"Scheduler:   {cog.scheduler.stats()}")
+    print(f"Cache:       {cog.cache_hits} hits, {cog.cache_misses} misses, {cog.cache_coalesced} coalesced")
+    for name, m in cog.router.summary().items():
+        print(f"Model {name}: {m['calls']} calls, p50 {m['p50'] * 1000:.0f}ms, p95 {m['p95'] * 1000:.0f}ms, errors {m['error_rate']:.0%}")
+    print(f"Resident:    {len(convos)} conversations (~{deep_sizeof(dict(convos.items())) / 1024:.0f} KiB), "
+          f"{len(cog.message_to_root)} message_to_root entries (~{deep_sizeof(cog.message_to_root) / 1024:.0f} KiB)")
+
+    # Cleanup cost: first with nothing due, then with half the conversations expired
+    started = time.perf_counter()
+    await cog.cleanup_task()
+    print(f"Cleanup:     {(time.perf_counter() - started) * 1000:.2f}ms with nothing due")
+
+    now = time.time()
+    cog.expiry_heap = []
+    cog.expiry_deadlines = {}
+    due = 0
+    for i, convo in enumerate(list(convos.values())):
+        if i % 2 == 0:
+            convo.last_activity = now - chatbot.CONVO_TIMEOUT - 1
+            due += 1
+        cog._schedule_expiry(convo.root_bot_message_id, convo.last_activity + chatbot.CONVO_TIMEOUT)
+    before = len(convos)
+    started = time.perf_counter()
+    await cog.cleanup_task()
+    print(f"Cleanup:     {(time.perf_counter() - started) * 1000:.2f}ms expiring ~half "
+          f"({before - len(convos)} of {before} expired)")
+    assert before - len(convos) == due, f"expected {due} conversations to expire, {before - len(convos)} did"
+
+    cog.cog_unload()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--replies", type=int, default=3, help="follow-up replies per user")
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users arrive")
+    parser.add_argument("--think-time", type=float, default=1.0, help="max seconds between a user's replies")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2, help="share of users asking a popular question")
+    parser.add_argument("--latency", type=float, default=0.2, help="mean fake model latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance a call fails with a 500")
+    parser.add_argument("--burst-every", type=int, default=0, help="start a 429 burst every N calls (0 = never)")
+    parser.add_argument("--burst-size", type=int, default=20, help="calls rate limited per burst")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="retryDelay reported by 429s")
+    parser.add_argument("--concurrency", type=int, default=32, help="scheduler maxConcurrent")
+    parser.add_argument("--rpm", type=float, default=100000, help="scheduler requestsPerMinute")
+    parser.add_argument("--threads", type=int, default=64, help="worker threads for the blocking client")
+    parser.add_argument("--budget", type=int, default=8000, help="historyTokenBudget")
+    parser.add_argument("--resident", type=int, default=100000, help="maxResidentConversations")
+    args = parser.parse_args()
+
+    # The bot reads config.yml (and writes logs) relative to the working directory,
+    # so give it a throwaway one.
+    workdir = tempfile.mkdtemp(prefix="turtlebott-bench-")
+    with open(os.path.join(workdir, "config.yml"), "w", encoding="utf-8") as f:
+        f.write(CONFIG_TEMPLATE.format(
+            budget=args.budget, resident=args.resident, concurrency=args.concurrency, rpm=args.rpm
+        ))
+    os.chdir(workdir)
+    os.environ.setdefault("GOOGLE_API_KEY", "fake-key")
+
+    import turtlebott.modules.chatbot as chatbot
+
+    chatbot.DATA_DIR = os.path.join(workdir, "data")
+    for name in ("chatbot", "model_scheduler", "chat_store"):
+        logging.getLogger(name).setLevel(logging.CRITICAL)  # errors are expected, we count them instead
+
+    print(f"Working directory: {workdir}")
+    asyncio.run(run(args, chatbot))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Benchmark for the D&D Beyond sheet parser (turtlebott/utils/dnd_beyond_parser.py), no Discord needed.
+
+Parses a corpus of character sheets with the old per-field if/regex cascade (kept below as
+legacy_parse_fields) and with the current table-driven dispatch, checks both give the same dict for
+every sheet, and reports the per-sheet time of:
+    dispatch: turning the extracted (name, value) pairs into the sheet dict
+    full:     the whole parse, PDF reading included
+The corpus is generated (D&D Beyond-style field names, spells, equipment, checkboxes) unless a
+directory of real exported sheets is given.
+
+Usage (from the repo root):
+    python tools/bench_parser.py --sheets 50
+    python tools/bench_parser.py --pdf-dir path/to/sheets
+"""
+import argparse
+import io
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, TextStringObject
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from turtlebott.utils import dnd_beyond_parser as parser  # noqa: E402
+
+
+# --- The parser's field loop before the dispatch table, for comparison ---
+
+def legacy_skill_base(lname):
+    for sk in parser.SKILL_NAMES:
+        if lname in (sk, sk + "prof", sk + "mod", sk + " "):
+            return sk
+        if lname.startswith(sk) and lname[len(sk):] in ("", "prof", "mod", " "):
+            return sk
+    return None
+
+
+def legacy_parse_fields(fields) -> dict:
+    data = {
+        "character": {}, "abilities": {}, "saving_throws": {}, "combat": {}, "skills": {},
+        "passives": {}, "senses": "", "defenses": "", "currency": {}, "equipment": {},
+        "weapons": {}, "spells": {}, "features": [], "actions": [], "proficiencies": "",
+        "personality": {}, "notes": {},
+    }
+    for ln, val in fields:
+        lns = re.sub(r"\s*\d+$", "", ln)
+
+        key = parser.CHARACTER_CANONICAL.get(ln) or parser.CHARACTER_CANONICAL.get(lns)
+        if key:
+            if key not in data["character"]:
+                data["character"][key] = val
+            continue
+
+        ab_key = parser.ABILITY_KEYS.get(ln) or parser.ABILITY_KEYS.get(ln.rstrip())
+        if ab_key:
+            data["abilities"][ab_key] = val
+            continue
+
+        if ln in parser.SAVING_THROW_VALUE_MAP:
+            data["saving_throws"].setdefault(parser.SAVING_THROW_VALUE_MAP[ln], {})["value"] = val
+            continue
+
+        p_key = parser.PERSONALITY_FIELDS.get(ln) or parser.PERSONALITY_FIELDS.get(lns)
+        if p_key:
+            data["personality"][p_key] = val
+            continue
+
+        if ln.startswith("eq name") or ln.startswith("eq qty") or ln.startswith("eq weight"):
+            idx = int(re.search(r"\d+$", ln).group(0))
+            item = data["equipment"].setdefault(idx, {"name": "", "qty": "", "weight": ""})
+            if "name" in ln:
+                item["name"] = val
+            elif "qty" in ln:
+                item["qty"] = val
+            elif "weight" in ln:
+                item["weight"] = val
+            continue
+
+        if ln.startswith("wpn"):
+            m = re.search(r"wpn(\d*)\s*(.*)", ln)
+            if m:
+                idx = int(m.group(1)) if m.group(1) else 0
+                data["weapons"].setdefault(idx, {})[m.group(2).strip()] = val
+            continue
+
+        if ln in parser.SAVING_THROW_PROF_MAP:
+            data["saving_throws"].setdefault(parser.SAVING_THROW_PROF_MAP[ln], {})["prof"] = val
+            continue
+        if ln in parser.COMBAT_FIELDS:
+            data["combat"][parser.COMBAT_FIELDS[ln]] = val
+            continue
+        if ln in parser.PASSIVE_FIELDS:
+            data["passives"][parser.PASSIVE_FIELDS[ln]] = val
+            continue
+        if ln == "additionalsenses":
+            data["senses"] = val
+            continue
+        if ln == "defenses":
+            data["defenses"] = val
+            continue
+        if ln in parser.CURRENCY_FIELDS:
+            data["currency"][ln] = val
+            continue
+
+        sk = legacy_skill_base(ln)
+        if sk:
+            entry = data["skills"].setdefault(sk, {
+                "name": parser.SKILL_DISPLAY.get(sk, sk.capitalize()),
+                "value": "", "prof": "", "ability": "",
+            })
+            if ln.endswith("prof"):
+                entry["prof"] = val
+            elif ln.endswith("mod"):
+                entry["ability"] = val
+            else:
+                entry["value"] = val
+            continue
+
+        sm = re.search(r"(\d+)$", ln)
+        if sm and any(ln.startswith(p) for p in parser.SPELL_PREFIXES):
+            field_key = re.sub(r"\d+$", "", ln).rstrip()
+            field_key = re.sub(r"^spell", "", field_key)
+            data["spells"].setdefault(int(sm.group(1)), {})[field_key] = val
+            continue
+        data["notes"][ln] = val
+
+    data["skills"] = [data["skills"][sk] for sk in parser.SKILL_ORDER if sk in data["skills"]]
+    data["spells"] = [data["spells"][i] for i in sorted(data["spells"]) if any(data["spells"][i].values())]
+    data["features"] = "\n".join(data["features"]).strip()
+    data["actions"] = "\n".join(data["actions"]).strip()
+    return data
+
+
+# --- Synthetic corpus ---
+
+SKILLS = [
+    "Acrobatics", "Animal", "Arcana", "Athletics", "Deception", "History", "Insight", "Intimidation",
+    "Investigation", "Medicine", "Nature", "Perception", "Performance", "Persuasion", "Religion",
+    "SleightofHand", "Stealth", "Survival",
+]
+ABILITIES = ["STR", "DEX", "CON", "INT", "WIS", "CHA"]
+SAVES = ["Strength", "Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma"]
+
+
+def sheet_fields(seed: int) -> list[dict[str, str]]:
+    """A D&D Beyond-like sheet as one {field: value} dict per page."""
+    r = random.Random(seed)
+    mod = lambda: f"{r.randint(-1, 5):+d}"  # noqa: E731
+    main = {
+        "CharacterName": f"Hero {seed}", "CLASS  LEVEL": f"Fighter {r.randint(1, 20)}", "PLAYER NAME": "Player",
+        "RACE": "Human", "BACKGROUND": "Soldier", "EXPERIENCE POINTS": "(Milestone)", "ALIGNMENT": "Neutral",
+        "AC": str(r.randint(10, 20)), "Init": mod(), "Speed": "30 ft.", "MaxHP": str(r.randint(8, 120)),
+        "ProfBonus": "+3", "Total": "5d10", "HD": "5", "Inspiration": "Off", "PASSIVE1": "13", "PASSIVE2": "11",
+        "PASSIVE3": "10", "AdditionalSenses": "Darkvision 60 ft.", "Defenses": "Resistance: Fire",
+        "SaveModifiers": "", "ProficienciesLang": "Common, Dwarvish\nLight Armor, Simple Weapons",
+        "FeaturesTraits1": "Second Wind\nAction Surge", "Actions1": "Attack, Dash, Dodge",
+        "CP": "12", "SP": "3", "EP": "", "GP": str(r.randint(0, 500)), "PP": "",
+        "Weight Carried": "87 lb.", "Encumbered": "175 lb.", "PushDragLift": "350 lb.",
+    }
+    for i, ability in enumerate(ABILITIES):
+        main[ability] = str(r.randint(8, 18))
+        main[ability + ("mod " if ability in ("DEX", "CON", "CHA") else "mod")] = mod()
+        main[f"ST {SAVES[i]}"] = mod()
+        main[ability.capitalize() + "Prof"] = r.choice(["P", "Off"])
+    for skill in SKILLS:
+        main[skill] = mod()
+        main[skill + "Prof"] = r.choice(["P", "E", "Off", "Off"])
+        main[skill + "Mod"] = r.choice(ABILITIES)
+    for i in range(1, 7):
+        main["Wpn Name" if i == 1 else f"Wpn Name {i}"] = f"Weapon {i}"
+        main[f"Wpn{i} AtkBonus" + (" " if i > 1 else "")] = mod()
+        main[f"Wpn{i} Damage" + (" " if i > 1 else "")] = f"1d{r.choice([4, 6, 8, 10, 12])}{mod()} Slashing"
+        main[f"Wpn Notes {i}"] = "Finesse, Light"
+
+    details = {
+        "CharacterName2": f"Hero {seed}", "AGE": "31", "HEIGHT": "5'11\"", "WEIGHT": "180 lb.", "EYES": "Brown",
+        "PersonalityTraits ": "Stoic.", "Ideals": "Duty.", "Bonds": "My unit.", "Flaws": "Stubborn.",
+        "Backstory": "A long story. " * 20, "AlliesOrganizations": "The Watch", "AdditionalNotes1": "Notes",
+        "CHARACTER IMAGE": "https://www.dndbeyond.com/avatars/1/2/3.jpeg",
+    }
+    for i in range(r.randint(10, 40)):
+        details[f"Eq Name{i}"] = f"Item {i}"
+        details[f"Eq Qty{i}"] = str(r.randint(1, 20))
+        details[f"Eq Weight{i}"] = f"{r.randint(0, 10)} lb."
+
+    spells = {
+        "CharacterName3": f"Hero {seed}", "spellCastingClass0": "Wizard", "spellCastingAbility0": "INT",
+        "spellSaveDC0": "15", "spellAtkBonus0": "+7",
+    }
+    for i in range(r.randint(0, 45)):
+        spells[f"spellName{i}"] = f"Spell {i}"
+        spells[f"spellSource{i}"] = "Wizard"
+        spells[f"spellSaveHit{i}"] = r.choice(["+7", "DC 15", "--"])
+        spells[f"spellCastingTime{i}"] = "1A"
+        spells[f"spellRange{i}"] = "60 ft."
+        spells[f"spellComponents{i}"] = "V, S, M"
+        spells[f"spellDuration{i}"] = "Instantaneous"
+        spells[f"spellPage{i}"] = "PHB 200"
+        spells[f"spellNotes{i}"] = "D: 1d10"
+        spells[f"spellPrepared{i}"] = r.choice(["O", "Off"])
+    for level in range(1, 10):
+        spells[f"spellHeader{level}"] = f"=== {level} LEVEL ==="
+        spells[f"spellSlotHeader{level}"] = f"{r.randint(0, 4)} Slots"
+    return [main, details, spells]
+
+
+def make_pdf(pages: list[dict[str, str]]) -> bytes:
+    writer = PdfWriter()
+    for fields in pages:
+        page = writer.add_blank_page(612, 792)
+        annots = ArrayObject()
+        for name, value in fields.items():
+            annots.append(writer._add_object(DictionaryObject({
+                NameObject("/Type"): NameObject("/Annot"),
+                NameObject("/Subtype"): NameObject("/Widget"),
+                NameObject("/T"): TextStringObject(name),
+                NameObject("/V"): TextStringObject(value),
+                NameObject("/Rect"): ArrayObject([NumberObject(0)] * 4),
+            })))
+        page[NameObject("/Annots")] = annots
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+# --- Benchmark ---
+
+def per_sheet(fn, items, repeat: int) -> float:
+    """Best-of-repeat average seconds per item."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sheets", type=int, default=50, help="generated sheets (ignored with --pdf-dir)")
+    ap.add_argument("--pdf-dir", type=Path, help="directory of real D&D Beyond sheet PDFs")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.pdf_dir:
+        pdfs = [path.read_bytes() for path in sorted(args.pdf_dir.glob("*.pdf"))]
+        if not pdfs:
+            sys.exit(f"No PDFs in {args.pdf_dir}")
+    else:
+        pdfs = [make_pdf(sheet_fields(seed)) for seed in range(args.sheets)]
+
+    extracted = [list(parser.iter_fields(PdfReader(io.BytesIO(pdf)))) for pdf in pdfs]
+    for i, fields in enumerate(extracted):
+        if legacy_parse_fields(fields) != parser.parse_fields(fields):
+            sys.exit(f"Sheet {i}: legacy and table-driven parsers disagree")
+    print(f"{len(pdfs)} sheets, {statistics.mean(map(len, extracted)):.0f} filled fields on average; "
+          f"both parsers agree on every sheet")
+
+    parser.classify_field.cache_clear()
+    started = time.perf_counter()
+    parser.parse_fields(extracted[0])
+    cold = time.perf_counter() - started
+
+    rows = [
+        ("dispatch", per_sheet(legacy_parse_fields, extracted, args.repeat),
+         per_sheet(parser.parse_fields, extracted, args.repeat)),
+        ("full", per_sheet(lambda pdf: legacy_parse_fields(parser.iter_fields(PdfReader(io.BytesIO(pdf)))), pdfs, args.repeat),
+         per_sheet(parser.convert_bytes, pdfs, args.repeat)),
+    ]
+    print(f"\n{'per sheet':<10}{'legacy':>12}{'table':>12}{'speedup':>10}")
+    for label, before, after in rows:
+        print(f"{label:<10}{before * 1e3:>10.3f}ms{after * 1e3:>10.3f}ms{before / after:>9.1f}x")
+    print(f"\nfirst sheet with an empty classification cache: {cold * 1e3:.3f}ms dispatch "
+          f"({parser.classify_field.cache_info().currsize} field names cached)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Local stand-in for the Gemini Live API, plus a harness that runs the voice bridge
+(turtlebott/utils/live_bridge.py) against it with no Discord and no API key.
+
+The fake session waits for the user to stop talking, "thinks" for a bit, then answers
+with a tone. Talking over an answer gets it interrupted, like the real thing.
+The harness plays a fake user (20ms frames from a thread, like the voice receive thread)
+and a fake speaker (reads a frame every 20ms, like discord's player thread), and reports
+end-to-end latency from the end of each utterance to the first audible answer frame.
+
+Usage (from the repo root):
+    python tools/fake_live.py --utterances 5 --think-ms 300 --barge-in
+"""
+import argparse
+import array
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.chdir(tempfile.mkdtemp(prefix="turtlebott-fake-live-"))  # the logger writes logs/ to the working directory
+
+from turtlebott.utils.live_bridge import (  # noqa: E402
+    LiveBridge, FRAME_BYTES, DISCORD_RATE, LIVE_INPUT_RATE, LIVE_OUTPUT_RATE, SAMPLE_WIDTH,
+)
+from turtlebott.utils.stats import percentile  # noqa: E402
+
+
+def tone(rate: int, seconds: float, freq: float = 440.0, channels: int = 1, volume: int = 8000) -> bytes:
+    samples = array.array("h")
+    for i in range(int(rate * seconds)):
+        value = int(volume * math.sin(2 * math.pi * freq * i / rate))
+        samples.extend([value] * channels)
+    return samples.tobytes()
+
+
+class FakeLiveSession:
+    def __init__(self, think_ms: float, answer_seconds: float, silence_ms: float = 400):
+        self.think = think_ms / 1000
+        self.answer = tone(LIVE_OUTPUT_RATE, answer_seconds, freq=330)
+        self.silence_needed = silence_ms / 1000
+        self.speaking = False
+        self.silence_started = None
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.answer_until = 0.0  # the answer counts as "playing" until the client has had time to play it
+        self.chunks_received = 0
+
+    async def send_realtime_input(self, *, audio):
+        assert audio.mime_type == f"audio/pcm;rate={LIVE_INPUT_RATE}", audio.mime_type
+        self.chunks_received += 1
+        samples = np.frombuffer(audio.data, dtype=np.int16).astype(np.float32)
+        loud = np.sqrt(np.mean(samples ** 2)) > 500
+        now = time.monotonic()
+        if loud:
+            if now < self.answer_until:
+                self.answer_until = 0.0
+                await self.events.put("interrupted")
+            self.speaking = True
+            self.silence_started = None
+        elif self.speaking:
+            self.silence_started = self.silence_started or now
+            if now - self.silence_started >= self.silence_needed:
+                self.speaking = False
+                await self.events.put("answer")
+
+    async def receive(self):
+        """One turn's worth of responses, like the real session's receive()."""
+        while True:
+            event = await self.events.get()
+            if event == "interrupted":
+                yield SimpleNamespace(server_content=SimpleNamespace(interrupted=True, model_turn=None))
+                return
+            if event == "answer":
+                break
+
+        await asyncio.sleep(self.think)
+        self.answer_until = time.monotonic() + len(self.answer) / (LIVE_OUTPUT_RATE * SAMPLE_WIDTH)
+        chunk = LIVE_OUTPUT_RATE // 25 * SAMPLE_WIDTH  # 40ms chunks
+        for start in range(0, len(self.answer), chunk):
+            if not self.events.empty():
+                return  # interrupted; the next receive() reports it
+            part = SimpleNamespace(inline_data=SimpleNamespace(data=self.answer[start:start + chunk]))
+            yield SimpleNamespace(server_content=SimpleNamespace(
+                interrupted=False, model_turn=SimpleNamespace(parts=[part])
+            ))
+            await asyncio.sleep(0.01)  # the real API streams faster than real time too
+
+
+def fake_connect(session):
+    @asynccontextmanager
+    async def connect():
+        yield session
+    return connect
+
+
+def run_user(bridge, user, script, stop, speech_ends):
+    """Feed 20ms Discord frames (48kHz stereo), paced like the voice receive thread."""
+    next_at = time.monotonic()
+    for loud in script:
+        if stop.is_set():
+            return
+        frame = SPEECH_FRAME if loud else SILENT_FRAME
+        bridge.on_voice(user, frame)
+        if not loud and speech_ends and speech_ends[-1] is None:
+            speech_ends[-1] = time.monotonic()
+        if loud and (not speech_ends or speech_ends[-1] is not None):
+            speech_ends.append(None)
+        next_at += 0.02
+        time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+def run_speaker(bridge, stop, heard):
+    """Read a frame every 20ms, like discord's audio player thread."""
+    next_at = time.monotonic()
+    was_silent = True
+    while not stop.is_set():
+        frame = bridge.source.read()
+        silent = frame.count(0) == len(frame)
+        if was_silent and not silent:
+            heard.append(time.monotonic())
+        was_silent = silent
+        next_at += 0.02
+        time.sleep(max(0.0, next_at - time.monotonic()))
+
+
+SPEECH_FRAME = tone(DISCORD_RATE, 0.02, channels=2)
+SILENT_FRAME = b"\x00" * FRAME_BYTES
+
+
+async def main(args):
+    session = FakeLiveSession(args.think_ms, args.answer_seconds)
+    bridge = LiveBridge(fake_connect(session), user_id=1)
+    user = SimpleNamespace(id=1)
+
+    # Script: talk, then wait long enough for the answer (or barge in halfway through it)
+    script = []
+    for _ in range(args.utterances):
+        script += [True] * int(args.speech_seconds * 50)
+        wait = args.think_ms / 1000 + 0.4 + (args.answer_seconds / 2 if args.barge_in else args.answer_seconds + 0.5)
+        script += [False] * int(wait * 50)
+    script += [False] * 50
+
+    stop = threading.Event()
+    speech_ends: list = []
+    heard: list = []
+    task = bridge.start()
+    await asyncio.sleep(0.05)
+
+    user_thread = threading.Thread(target=run_user, args=(bridge, user, script, stop, speech_ends))
+    speaker_thread = threading.Thread(target=run_speaker, args=(bridge, stop, heard))
+    user_thread.start()
+    speaker_thread.start()
+    await asyncio.to_thread(user_thread.join)
+    stop.set()
+    await asyncio.to_thread(speaker_thread.join)
+    await bridge.stop()
+    if task.done() and not task.cancelled() and task.exception():
+        raise task.exception()
+
+    # Match each utterance end to the first answer frame heard after it
+    e2e = []
+    for end in speech_ends:
+        after = [t for t in heard if end is not None and t >= end]
+        if after:
+            e2e.append(after[0] - end)
+
+    stats = bridge.stats()
+    print(f"Utterances:     {len(speech_ends)} ({'with' if args.barge_in else 'no'} barge-in)")
+    print(f"Chunks to Live: {session.chunks_received} (16kHz mono, converted from {stats['frames_in']} Discord frames)")
+    print(f"Frames:         {stats['frames_dropped']} input dropped, {stats['frames_played']} played, "
+          f"{stats['underruns']} underruns, {stats['interruptions']} interruptions")
+    print(f"Bridge latency: p50 {stats['latency_p50'] * 1000:.0f}ms, p95 {stats['latency_p95'] * 1000:.0f}ms "
+          "(last loud frame -> first answer chunk)")
+    print(f"End-to-end:     p50 {percentile(e2e, 0.5) * 1000:.0f}ms, p95 {percentile(e2e, 0.95) * 1000:.0f}ms "
+          f"(end of speech -> answer audible, includes {args.think_ms:.0f}ms think + end-of-speech detection)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=3)
+    parser.add_argument("--speech-seconds", type=float, default=1.0)
+    parser.add_argument("--answer-seconds", type=float, default=2.0)
+    parser.add_argument("--think-ms", type=float, default=300)
+    parser.add_argument("--barge-in", action="store_true", help="talk over each answer halfway through")
+    asyncio.run(main(parser.parse_args()))
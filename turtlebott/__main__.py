@@ -3,4 +3,6 @@ run.
 """
 from .bot import run
 
-run()
+# Guarded so worker processes (which import __main__ when spawned) don't start a second bot
+if __name__ == "__main__":
+    run()
@@ -5,6 +5,8 @@ import logging
 import discord
 from discord.ext import commands
 from .config import settings
+from .utils.compute import ComputeService
+from .utils.http import close_session
 from .utils.logger import setup_logger
 from .utils.module_loader import load_modules, get_module_doc, get_all_modules, is_enabled
 import traceback
@@ -16,6 +18,13 @@ discord_logger = setup_logger("discord")
 logging.getLogger("discord").parent = None
 logging.getLogger("discord").setLevel(logging.INFO)
 
+
+class Turtlebott(commands.Bot):
+    async def close(self):
+        await super().close()  # unloads the modules first
+        await close_session()  # then the aiohttp session they all share
+
+
 def run():
     start_time = time.time()
 
@@ -30,7 +39,15 @@ def run():
         else:
             logger.info("Discord Opus loaded succesfully.")
 
-    bot = commands.Bot(command_prefix="t.", intents=settings.intents, help_command=None)
+    bot = Turtlebott(command_prefix="t.", intents=settings.intents, help_command=None)
+
+    # Process pool for CPU-heavy work, shared by every module (see utils/compute.py)
+    compute_config = settings.config.get("compute") or {}
+    bot.compute = ComputeService(
+        workers=compute_config.get("workers") or None,
+        max_queued=compute_config.get("maxQueued", 100),
+        default_timeout=compute_config.get("defaultTimeout", 120),
+    )
 
     @bot.event
     async def on_ready():
@@ -55,4 +72,7 @@ def run():
         await ctx.reply(f"<:info:1470271874406682655> An error occurred: {str(error)}")
 
 
-    bot.run(settings.token, log_handler=None)
+    try:
+        bot.run(settings.token, log_handler=None)
+    finally:
+        bot.compute.shutdown()
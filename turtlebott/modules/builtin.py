@@ -36,6 +36,26 @@ class Builtin(commands.Cog):
         logger.info(f"User {ctx.author} invoked uptime command. Uptime: {uptime_str}")
         await ctx.reply(f"Uptime: {uptime_str}")
 
+    @commands.hybrid_command(name="computestats", aliases=["cstats"])
+    async def computestats(self, ctx):
+        """Shows the compute pool's queue, workers and CPU use."""
+        stats = self.bot.compute.stats()
+        lines = [
+            f"**Compute pool:** {stats['workers']} workers ({'running' if stats['pool_started'] else 'not started yet'})",
+            f"Queued: {stats['queued']} · Running: {stats['running']} · Submitted: {stats['submitted']}"
+            f" · Refused: {stats['rejected']} · Pool restarts: {stats['pool_restarts']}",
+            f"CPU: {stats['cpu_seconds']:.1f}s ({stats['utilization']:.1%} of capacity)"
+            f" · Wait avg {stats['wait_avg'] * 1000:.0f}ms, p95 {stats['wait_p95'] * 1000:.0f}ms",
+        ]
+        for name, job in sorted(stats["jobs"].items()):
+            runs = job["completed"] + job["failed"]
+            avg = job["run_seconds"] / runs if runs else 0.0
+            lines.append(
+                f"-# {name}: {job['completed']} done, {job['failed']} failed, {job['timed_out']} timed out,"
+                f" {job['cancelled']} cancelled · avg {avg:.2f}s (max {job['max_run_seconds']:.2f}s)"
+            )
+        await ctx.reply("\n".join(lines))
+
     @commands.hybrid_command(name="help")
     async def help_command(self, ctx):
         """Provides help information about available commands."""
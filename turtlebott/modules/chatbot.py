@@ -7,40 +7,76 @@ from discord.ext import commands, tasks
 from turtlebott.utils.logger import setup_logger
 from turtlebott.config import settings
 from turtlebott.utils.debug import debug_exception, get_retry_and_code
+from turtlebott.utils.http import fetch_bytes
+from turtlebott.utils.cache import LRUCache, TTLCache
+from turtlebott.utils.images import shrink_image
+from turtlebott.utils.model_scheduler import ModelScheduler, RateLimited, parse_retry_delay
+from turtlebott.utils.chat_store import ConversationStore
+from turtlebott.utils.model_router import ModelRouter
+from turtlebott.utils.memory_index import GuildMemory, HashingEmbedder, GenaiEmbedder
+from turtlebott.utils.ai_telemetry import UsageTelemetry, UsageBucket
+from turtlebott.utils.live_bridge import LiveBridge
 
 from dotenv import load_dotenv
 import os
 import asyncio
-import aiohttp
+import base64
+from collections import deque
+import hashlib
+import heapq
+import json
 import time
 from dataclasses import dataclass, field
-from types import SimpleNamespace
 
+import httpx  # google-genai's HTTP client, for its timeout errors
 from google import genai
 from google.genai import types
 
+# Optional, only needed for voice mode (discord.py can't receive voice by itself)
+try:
+    from discord.ext import voice_recv
+except ImportError:
+    voice_recv = None
+
 logger = setup_logger("chatbot")
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 AI_SETTINGS = settings.config["experiments_config"]["chatbot"]
 
-model_name = AI_SETTINGS["model"]
+model_name = AI_SETTINGS.get("model")  # used when no `models` tiers are configured
 system_instructions = AI_SETTINGS["systemInstructions"]
 temperature = AI_SETTINGS["temperature"]
 
 # Conversation tuning
-MAX_TURNS = AI_SETTINGS.get("maxTurns", 20)          # user+bot pairs
+HISTORY_TOKEN_BUDGET = AI_SETTINGS.get("historyTokenBudget", 8000)  # tokens of history sent per request
+SUMMARY_MAX_CHARS = AI_SETTINGS.get("summaryMaxChars", 2000)        # cap on the rolling summary
 CONVO_TIMEOUT = AI_SETTINGS.get("timeoutSeconds", 900)  # 15 minutes default
+SCHEDULER_SETTINGS = AI_SETTINGS.get("scheduler", {})
+REQUEST_TIMEOUT = AI_SETTINGS.get("requestTimeout", 60)  # seconds before we give up on a model and fail over
+RESPONSE_CACHE_TTL = AI_SETTINGS.get("responseCacheTtl", 60)  # seconds, 0 turns the cache off
+RESPONSE_CACHE_SIZE = AI_SETTINGS.get("responseCacheSize", 256)
+MEMORY_SETTINGS = AI_SETTINGS.get("memory", {})
+CHANNEL_CONTEXT_MESSAGES = AI_SETTINGS.get("channelContextMessages", 20)  # for channels opted in with t.aicontext
+CHANNEL_CONTEXT_MAX_CHARS = 300  # per message
+VOICE_SETTINGS = AI_SETTINGS.get("voice", {})
+VOICE_MODEL = VOICE_SETTINGS.get("model", "gemini-2.5-flash-native-audio-preview-12-2025")
+TELEMETRY_FLUSH_MINUTES = AI_SETTINGS.get("telemetryFlushMinutes", 5)
+MAX_RESIDENT_CONVOS = AI_SETTINGS.get("maxResidentConversations", 500)  # the rest stay on disk until needed
+NOT_CONVERSATION_CACHE_SIZE = 4096  # bot message ids remembered as not being part of a conversation
+IMAGE_CACHE_SIZE = AI_SETTINGS.get("imageCacheSize", 64)  # downloaded attachments kept around
+IMAGE_MAX_DIMENSION = AI_SETTINGS.get("imageMaxDimension", 1024)  # longest side, in pixels
+IMAGE_FORMAT = AI_SETTINGS.get("imageFormat", "WEBP")
+IMAGE_QUALITY = AI_SETTINGS.get("imageQuality", 80)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "chatbot"))
 
 client = genai.Client(api_key=GOOGLE_API_KEY)
 
-
-async def fetch_bytes(url: str) -> bytes:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
-            resp.raise_for_status()
-            return await resp.read()
+# attachment id -> types.Part, so an image is only downloaded once
+_part_cache = LRUCache(IMAGE_CACHE_SIZE)
+# sha256 of the raw bytes -> (shrunk bytes, mime type), so reposted images aren't re-encoded
+_shrunk_cache = LRUCache(IMAGE_CACHE_SIZE)
 
 
 def is_image_attachment(att: discord.Attachment) -> bool:
@@ -52,11 +88,128 @@ def is_image_attachment(att: discord.Attachment) -> bool:
 
 
 async def attachment_to_part(att: discord.Attachment) -> types.Part:
+    part = _part_cache.get(att.id)
+    if part is not None:
+        return part
+
     image_bytes = await fetch_bytes(att.url)
-    return types.Part.from_bytes(
+    image_bytes, mime_type = await prepare_image(image_bytes, att.content_type)
+    part = types.Part.from_bytes(
         data=image_bytes,
-        mime_type=att.content_type
+        mime_type=mime_type
     )
+    _part_cache.set(att.id, part)
+    return part
+
+
+async def prepare_image(data: bytes, content_type: str) -> tuple[bytes, str]:
+    """Downscale + re-encode an image off the event loop, cached by content hash."""
+    digest = hashlib.sha256(data).digest()
+    cached = _shrunk_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    try:
+        result = await asyncio.to_thread(
+            shrink_image, data, IMAGE_MAX_DIMENSION, IMAGE_FORMAT, IMAGE_QUALITY
+        )
+    except Exception as e:
+        # Not something PIL understands; let the model deal with the original.
+        logger.warning(f"Couldn't shrink image, sending it as-is: {e}")
+        result = (data, content_type)
+
+    logger.debug(f"Image {len(data)} -> {len(result[0])} bytes ({result[1]})")
+    _shrunk_cache.set(digest, result)
+    return result
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Cache key for a prompt: case and whitespace don't matter."""
+    return " ".join(prompt.lower().split())
+
+
+async def attachments_to_parts(attachments: list[discord.Attachment]) -> list[types.Part]:
+    """Download all attachments concurrently (cached ones are free)."""
+    return list(await asyncio.gather(*(attachment_to_part(att) for att in attachments)))
+
+
+# Gemini bills every image as a flat 258 tokens (for images up to 384px per side,
+# bigger ones get tiled, but we downscale anyway so this is close enough).
+IMAGE_TOKENS = 258
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a Discord conversation between users and a bot. "
+    "Merge the new messages into the existing summary. Keep names, facts, decisions and "
+    f"open questions. Reply with the summary only, in under {SUMMARY_MAX_CHARS // 5} words."
+)
+
+
+def estimate_tokens(item) -> int:
+    """Cheap token estimate (~4 chars per token), good enough for budgeting."""
+    if isinstance(item, str):
+        return len(item) // 4 + 1
+    if getattr(item, "inline_data", None) is not None:
+        return IMAGE_TOKENS
+    text = getattr(item, "text", None)
+    if text:
+        return len(text) // 4 + 1
+    return IMAGE_TOKENS
+
+
+@dataclass
+class Turn:
+    prompt: str
+    parts: list  # list[types.Part], images sent along with the prompt
+    reply: str
+    tokens: int = 0
+    _stored: dict | None = field(default=None, init=False, repr=False, compare=False)  # to_dict(), turns don't change
+
+    def __post_init__(self):
+        if not self.tokens:
+            self.tokens = sum(estimate_tokens(item) for item in self.contents())
+
+    def contents(self) -> list:
+        return [self.prompt, *self.parts, self.reply]
+
+    def to_dict(self) -> dict:
+        if self._stored is not None:
+            return self._stored
+        self._stored = {
+            "prompt": self.prompt,
+            "reply": self.reply,
+            "tokens": self.tokens,
+            "parts": [
+                {"mime": part.inline_data.mime_type, "data": base64.b64encode(part.inline_data.data).decode("ascii")}
+                for part in self.parts
+            ],
+        }
+        return self._stored
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Turn":
+        parts = [
+            types.Part.from_bytes(data=base64.b64decode(p["data"]), mime_type=p["mime"])
+            for p in data.get("parts", [])
+        ]
+        return cls(data["prompt"], parts, data["reply"], data.get("tokens", 0))
+
+
+@dataclass(slots=True, eq=False)
+class TurnNode:
+    """
+    One turn in a conversation tree, keyed by the bot message that answered it.
+    Nodes only point at their parent, so branches share their common prefix.
+    """
+    message_id: int
+    turn: Turn
+    parent: "TurnNode | None" = None
+
+    def ancestors(self):
+        """Yield this node, then its parent, and so on up to the root turn."""
+        node = self
+        while node is not None:
+            yield node
+            node = node.parent
 
 
 @dataclass
@@ -64,69 +217,522 @@ class Conversation:
     root_bot_message_id: int
     latest_bot_message_id: int
     channel_id: int
-    history: list = field(default_factory=list)  # list[str | types.Part]
+    guild_id: int | None = None
+    # bot message id -> the turn it answered. Replying to any of them continues from there.
+    nodes: dict[int, TurnNode] = field(default_factory=dict)
     last_activity: float = field(default_factory=lambda: time.time())
+    # node message id -> summary of that node and everything before it
+    summaries: dict[int, str] = field(default_factory=dict)
+    summary_tasks: dict[int, asyncio.Task] = field(default_factory=dict)
+
+    @property
+    def message_ids(self):
+        return self.nodes.keys()
+
+    def add_turn(self, message_id: int, turn: Turn, parent: TurnNode | None) -> TurnNode:
+        node = TurnNode(message_id, turn, parent)
+        self.nodes[message_id] = node
+        self.latest_bot_message_id = message_id
+        return node
+
+    def context_for(self, head: TurnNode) -> tuple[list[Turn], TurnNode | None, str]:
+        """
+        Walk back from `head` until HISTORY_TOKEN_BUDGET is used up.
+        Returns (turns oldest-first, first node that didn't fit, best summary available for it).
+        """
+        budget = HISTORY_TOKEN_BUDGET - SUMMARY_MAX_CHARS // 4
+        kept: list[Turn] = []
+        used = 0
+        cut = None
+        for node in head.ancestors():
+            if kept and used + node.turn.tokens > budget:
+                cut = node
+                break
+            kept.append(node.turn)
+            used += node.turn.tokens
+        kept.reverse()
+
+        summary = ""
+        if cut is not None:
+            # Exact summary if we have it, otherwise the closest older one (a few turns get skipped
+            # until the background summary catches up).
+            for node in cut.ancestors():
+                if node.message_id in self.summaries:
+                    summary = self.summaries[node.message_id]
+                    break
+        return kept, cut, summary
+
+    def history_contents(self, head: TurnNode) -> list:
+        turns, _, summary = self.context_for(head)
+        contents = []
+        if summary:
+            contents.append(f"(Summary of the earlier conversation: {summary})")
+        for turn in turns:
+            contents.extend(turn.contents())
+        return contents
+
+    def to_row(self) -> dict:
+        """
+        A snapshot for the store. `data` is a function building the JSON, which the store calls in
+        its worker thread: the history (base64 images included) isn't encoded on the event loop.
+        """
+        # Snowflakes grow over time, so sorting by id puts every parent before its children.
+        nodes = [
+            (n.message_id, n.parent.message_id if n.parent else None, n.turn)
+            for n in sorted(self.nodes.values(), key=lambda n: n.message_id)
+        ]
+        summaries = {str(k): v for k, v in self.summaries.items()}
+
+        def data() -> str:
+            return json.dumps({
+                "summaries": summaries,
+                "nodes": [{"id": mid, "parent": parent, "turn": turn.to_dict()} for mid, parent, turn in nodes],
+            })
+
+        return {
+            "root_id": self.root_bot_message_id,
+            "channel_id": self.channel_id,
+            "guild_id": self.guild_id,
+            "latest_id": self.latest_bot_message_id,
+            "last_activity": self.last_activity,
+            "data": data,
+        }
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Conversation":
+        data = json.loads(row["data"])
+        convo = cls(
+            root_bot_message_id=row["root_id"],
+            latest_bot_message_id=row["latest_id"],
+            channel_id=row["channel_id"],
+            guild_id=row["guild_id"],
+            last_activity=row["last_activity"],
+            summaries={int(k): v for k, v in data.get("summaries", {}).items()},
+        )
+        for n in data.get("nodes", []):
+            parent = convo.nodes.get(n["parent"]) if n["parent"] is not None else None
+            convo.nodes[n["id"]] = TurnNode(n["id"], Turn.from_dict(n["turn"]), parent)
+        return convo
 
 
 class Chatbot(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-        # root_bot_message_id -> Conversation
-        self.conversations: dict[int, Conversation] = {}
+        # Everything is persisted here; only hot conversations stay in memory.
+        self.store = ConversationStore(os.path.join(DATA_DIR, "conversations.db"))
 
-        # any_bot_message_id_in_convo -> root_bot_message_id
+        # root_bot_message_id -> Conversation (resident ones only, LRU-capped)
+        self.conversations: LRUCache = LRUCache(MAX_RESIDENT_CONVOS, on_evict=self._on_evict)
+
+        # any_bot_message_id_in_convo -> root_bot_message_id, for resident convos
         # (lets us map replies to the right conversation fast)
         self.message_to_root: dict[int, int] = {}
 
+        # (expires_at, root_bot_message_id) min-heap. Exactly one live entry per convo, the one
+        # whose deadline matches expiry_deadlines; others are stale and skipped when they come due.
+        self.expiry_heap: list[tuple[float, int]] = []
+        self.expiry_deadlines: dict[int, float] = {}
+
+        # Bot message ids known not to belong to a (live) conversation, so replies to them don't
+        # hit the database every time
+        self.not_conversations = LRUCache(NOT_CONVERSATION_CACHE_SIZE)
+
+        # root id -> [lock, saves holding or waiting on it], dropped when that reaches 0
+        self.save_locks: dict[int, list] = {}
+
+        # Every model call goes through here (concurrency caps, pacing, 429 retries)
+        self.scheduler = ModelScheduler(
+            max_concurrent=SCHEDULER_SETTINGS.get("maxConcurrent", 4),
+            max_per_guild=SCHEDULER_SETTINGS.get("maxConcurrentPerGuild", 2),
+            requests_per_minute=SCHEDULER_SETTINGS.get("requestsPerMinute", 15),
+            burst=SCHEDULER_SETTINGS.get("burst", 5),
+            max_retries=SCHEDULER_SETTINGS.get("maxRetries", 3),
+        )
+
+        # Stateless prompts (new conversation, no images): normalized prompt -> reply text
+        self.response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+        # normalized prompt -> the in-flight request everyone asking the same thing waits on
+        self.inflight: dict[str, asyncio.Task] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_coalesced = 0
+
+        # Picks a model per request and tracks per-model latency/errors
+        self.router = ModelRouter.from_config(AI_SETTINGS, model_name)
+
+        # Long-term, per-guild memory of past exchanges (optional)
+        self.memory: GuildMemory | None = None
+        if MEMORY_SETTINGS.get("enabled", False):
+            dim = MEMORY_SETTINGS.get("dimensions", 256)
+            if MEMORY_SETTINGS.get("embedder", "hashing") == "genai":
+                embedder = GenaiEmbedder(client, MEMORY_SETTINGS.get("model", "gemini-embedding-001"), dim)
+            else:
+                embedder = HashingEmbedder(dim)
+            self.memory = GuildMemory(os.path.join(DATA_DIR, "memory"), embedder)
+        self.background_tasks: set[asyncio.Task] = set()
+
+        # Channel-context mode: opted-in channel ids, and a ring buffer of recent messages
+        # for each, filled from gateway events (so no REST calls when answering).
+        self.context_channels: set[int] = set()
+        self.channel_buffers: dict[int, deque] = {}  # channel id -> deque[(message id, author, content)]
+        self.backfilled: set[int] = set()
+
+        # guild id -> (voice client, bridge) for voice mode
+        self.voice_sessions: dict[int, tuple] = {}
+
+        # Tokens/latency/outcomes per guild, hour and model (see t.aistats)
+        self.telemetry = UsageTelemetry(os.path.join(DATA_DIR, "telemetry.db"))
+        self.telemetry_flush_task.change_interval(minutes=TELEMETRY_FLUSH_MINUTES)
+
         self.cleanup_task.start()
+        self.telemetry_flush_task.start()
+
+    async def cog_load(self):
+        self.context_channels = await self.store.context_channels()
 
     def cog_unload(self):
         self.cleanup_task.cancel()
+        self.telemetry_flush_task.cancel()
+        self.telemetry.close()
+        for convo in self.conversations.values():
+            for task in convo.summary_tasks.values():
+                task.cancel()
+        for task in self.background_tasks:
+            task.cancel()
+        for guild_id in list(self.voice_sessions):
+            task = asyncio.create_task(self._stop_voice(guild_id))
+            self.background_tasks.add(task)
+        self.store.close()
+        if self.memory is not None:
+            self.memory.close()
+
+    def _on_evict(self, root_id: int, convo: Conversation):
+        """A conversation fell out of the resident LRU. It's already on disk, so just drop the index."""
+        for mid in convo.message_ids:
+            self.message_to_root.pop(mid, None)
+
+    def _add_resident(self, convo: Conversation):
+        root_id = convo.root_bot_message_id
+        self.conversations.set(root_id, convo)
+        for mid in convo.message_ids:
+            self.message_to_root[mid] = root_id
+        # A convo reloaded after falling out of the LRU may still have its entry in the heap
+        if root_id not in self.expiry_deadlines:
+            self._schedule_expiry(root_id, convo.last_activity + CONVO_TIMEOUT)
+
+    def _schedule_expiry(self, root_id: int, expires_at: float):
+        self.expiry_deadlines[root_id] = expires_at
+        heapq.heappush(self.expiry_heap, (expires_at, root_id))
+
+    async def _save(self, convo: Conversation):
+        # One save at a time per conversation, each snapshotting once it's its turn,
+        # so an older snapshot can never be written over a newer one.
+        root_id = convo.root_bot_message_id
+        entry = self.save_locks.get(root_id)
+        if entry is None:
+            entry = self.save_locks[root_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await self.store.save(convo.to_row(), list(convo.message_ids))
+        except Exception:
+            logger.exception(f"Failed to persist conversation root={root_id}")
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.save_locks[root_id]
+
+    async def _find_conversation(self, message_id: int) -> Conversation | None:
+        """Find the conversation a bot message belongs to, loading it from disk if it's cold."""
+        root_id = self.message_to_root.get(message_id)
+        if root_id:
+            convo = self.conversations.get(root_id)
+            if convo is not None:
+                return convo
+            del self.message_to_root[message_id]  # stale, the convo isn't resident anymore: ask the store
+        elif self.not_conversations.get(message_id):
+            return None
+
+        root_id = await self.store.root_for_message(message_id)
+        if not root_id:
+            self.not_conversations.set(message_id, True)
+            return None
+
+        # Someone else may have loaded it while we were waiting on the db
+        convo = self.conversations.get(root_id)
+        if convo is not None:
+            return convo
+
+        row = await self.store.load(root_id)
+        if row is None or time.time() - row["last_activity"] > CONVO_TIMEOUT:
+            self.not_conversations.set(message_id, True)  # expired ones never come back
+            return None
+
+        # A concurrent reply may have loaded it too; there must only ever be one copy in use
+        convo = self.conversations.get(root_id)
+        if convo is not None:
+            return convo
+
+        convo = Conversation.from_row(row)
+        self._add_resident(convo)
+        logger.info(f"Loaded conversation root={root_id} from disk")
+        return convo
 
     def _touch(self, convo: Conversation):
         convo.last_activity = time.time()
 
-    def _trim_history(self, convo: Conversation):
+    def _request_summary(self, convo: Conversation, head: TurnNode):
         """
-        Keep only the last MAX_TURNS turns.
-        A "turn" here is: user prompt + bot response.
-        Since we store plain strings/parts in a flat list, we’ll just cap size.
+        Make sure the turns that no longer fit before `head` get summarized.
+        The summary is keyed by the cut node, so every branch past it can reuse it.
         """
-        # Rough cap: each turn adds ~2 items (user + bot).
-        max_items = max(4, MAX_TURNS * 2)
-        if len(convo.history) > max_items:
-            convo.history = convo.history[-max_items:]
+        _, cut, _ = convo.context_for(head)
+        if cut is None or cut.message_id in convo.summaries or cut.message_id in convo.summary_tasks:
+            return
+        convo.summary_tasks[cut.message_id] = asyncio.create_task(self._summarize(convo, cut))
+
+    async def _summarize(self, convo: Conversation, cut: TurnNode):
+        """Summarize `cut` and everything before it into convo.summaries. Runs in the background."""
+        try:
+            # Start from the closest older summary and fold in the turns after it
+            previous = ""
+            batch: list[Turn] = []
+            for node in cut.ancestors():
+                if node.message_id in convo.summaries:
+                    previous = convo.summaries[node.message_id]
+                    break
+                batch.append(node.turn)
+            batch.reverse()
+
+            contents = [f"Existing summary: {previous or '(none yet)'}", "New messages:"]
+            for turn in batch:
+                contents.append(turn.prompt)
+                contents.extend("[image]" for _ in turn.parts)
+                contents.append(turn.reply)
 
-    def _register_bot_message(self, convo: Conversation, message_id: int):
-        convo.latest_bot_message_id = message_id
+            try:
+                response = await self._generate(
+                    contents, guild_id=convo.guild_id, system_instruction=SUMMARY_INSTRUCTIONS
+                )
+                summary = (getattr(response, "text", None) or "").strip()
+            except Exception:
+                logger.exception(f"Failed to summarize conversation root={convo.root_bot_message_id}")
+                return  # those turns are just dropped then
+
+            if summary:
+                # If the convo was evicted and loaded again meanwhile, the resident copy is the live one
+                live = self.conversations.peek(convo.root_bot_message_id) or convo
+                live.summaries[cut.message_id] = summary[:SUMMARY_MAX_CHARS]
+                logger.debug(f"Summarized {len(batch)} turns for root={convo.root_bot_message_id}")
+                await self._save(live)
+        finally:
+            convo.summary_tasks.pop(cut.message_id, None)
+
+    def _register_bot_message(self, convo: Conversation, message_id: int, turn: Turn,
+                              parent: TurnNode | None) -> Conversation:
+        """Add the bot's answer to the conversation. Returns the copy it went into, the one to save."""
+        resident = self.conversations.get(convo.root_bot_message_id)
+        if resident is None:
+            # Fell out of the LRU while the model was answering; this copy is still the latest
+            self._add_resident(convo)
+        elif resident is not convo:
+            # ...and was loaded again from disk meanwhile, so that copy is the one in use now
+            convo = resident
+            parent = convo.nodes.get(parent.message_id) if parent is not None else None
+        node = convo.add_turn(message_id, turn, parent)
         self.message_to_root[message_id] = convo.root_bot_message_id
+        self.not_conversations.pop(message_id)  # in case a reply to it was looked up before we got here
+        self._request_summary(convo, node)
+        return convo
+
+    async def _generate(self, contents: list, guild_id: int | None = None, system_instruction: str | None = None):
+        """
+        Call the model through the scheduler. The router picks the model; on a rate limit or
+        timeout we fail over to the next tier. Raises RateLimited if every model is limited
+        and the scheduler's retries run out.
+        """
+        prompt_tokens = sum(estimate_tokens(item) for item in contents)
+        has_images = any(not isinstance(item, str) for item in contents)
+
+        attempts = 0  # across failovers and scheduler retries
+
+        def record(model: str, started: float, outcome: str, response=None):
+            nonlocal attempts
+            usage = getattr(response, "usage_metadata", None)
+            self.telemetry.record(
+                guild_id, model,
+                prompt_tokens=getattr(usage, "prompt_token_count", None) or (prompt_tokens if response else 0),
+                response_tokens=getattr(usage, "candidates_token_count", None) or 0,
+                latency=time.monotonic() - started,
+                retries=1 if attempts else 0,  # per call: was this one a retry (the bucket sums them)
+                outcome=outcome,
+            )
+            attempts += 1
 
-    async def _generate(self, contents: list):
+        async def call():
+            retry_after = None
+            rate_limited = False
+            for model in self.router.candidates(prompt_tokens, has_images):
+                started = time.monotonic()
+                try:
+                    # The timeout is the SDK's own, so a slow model's request is really dropped
+                    # (not left running and billed in its thread) before we fail over
+                    response = await asyncio.to_thread(
+                        client.models.generate_content,
+                        model=model,
+                        config=types.GenerateContentConfig(
+                            temperature=temperature,
+                            system_instruction=system_instruction or system_instructions,
+                            http_options=types.HttpOptions(timeout=int(REQUEST_TIMEOUT * 1000)),  # ms
+                        ),
+                        contents=contents
+                    )
+                except httpx.TimeoutException:
+                    self.router.record_error(model, time.monotonic() - started)
+                    record(model, started, "timeout")
+                    logger.warning(f"Model {model} timed out after {REQUEST_TIMEOUT}s, failing over")
+                    continue
+                except Exception as e:
+                    error_code, retry_delay = get_retry_and_code(e)
+                    if str(error_code) == "429":
+                        delay = parse_retry_delay(retry_delay)
+                        logger.warning(f"Rate limit encountered on {model}. Retry after: {retry_delay}")
+                        self.router.record_rate_limit(model, delay)
+                        record(model, started, "rate_limited")
+                        rate_limited = True
+                        if delay is not None:
+                            retry_after = delay if retry_after is None else min(retry_after, delay)
+                        continue
+                    self.router.record_error(model, time.monotonic() - started)
+                    record(model, started, "error")
+                    logger.exception(f"Error during AI generation: {e}")
+                    raise e
+
+                self.router.record_success(model, time.monotonic() - started)
+                record(model, started, "ok", response)
+                return response
+
+            if rate_limited:
+                raise RateLimited(retry_after)
+            raise asyncio.TimeoutError("Every model timed out")
+
+        return await self.scheduler.submit(guild_id, call)
+
+    def _buffer_message(self, message: discord.Message):
+        buffer = self.channel_buffers.get(message.channel.id)
+        if buffer is None:
+            buffer = self.channel_buffers[message.channel.id] = deque(maxlen=CHANNEL_CONTEXT_MESSAGES)
+        content = (message.content or "").strip()
+        if message.attachments:
+            content += " [attachment]"
+        if content:
+            buffer.append((message.id, message.author.display_name, content[:CHANNEL_CONTEXT_MAX_CHARS]))
+
+    async def _backfill(self, channel):
+        """Fill a channel's ring buffer from history, once (after that, gateway events keep it fresh)."""
+        self.backfilled.add(channel.id)
+        try:
+            older = [m async for m in channel.history(limit=CHANNEL_CONTEXT_MESSAGES)]
+        except Exception:
+            logger.exception(f"Failed to backfill channel context for channel={channel.id}")
+            return
+
+        live = list(self.channel_buffers.get(channel.id, ()))
+        self.channel_buffers.pop(channel.id, None)
+        seen = {mid for mid, _, _ in live}
+        for message in reversed(older):  # history() is newest first
+            if message.id not in seen:
+                self._buffer_message(message)
+        self.channel_buffers.setdefault(channel.id, deque(maxlen=CHANNEL_CONTEXT_MESSAGES)).extend(live)
+
+    async def _channel_context(self, channel, exclude_id: int) -> list[str]:
+        """Recent channel messages as contents, for channels that opted in."""
+        if channel.id not in self.context_channels:
+            return []
+        if channel.id not in self.backfilled:
+            await self._backfill(channel)
+
+        lines = [f"{author}: {content}" for mid, author, content in self.channel_buffers.get(channel.id, ()) if mid != exclude_id]
+        if not lines:
+            return []
+        return ["(Recent messages in this channel, for context:\n" + "\n".join(lines) + ")"]
+
+    async def _recall(self, guild_id: int | None, prompt: str) -> list[str]:
+        """Relevant memories from earlier conversations in this guild, as contents to prepend."""
+        if self.memory is None or guild_id is None:
+            return []
         try:
-            return await asyncio.to_thread(
-                client.models.generate_content,
-                model=model_name,
-                config=types.GenerateContentConfig(
-                    temperature=temperature,
-                    system_instruction=system_instructions
-                ),
-                contents=contents
+            found = await asyncio.to_thread(
+                self.memory.recall, guild_id, prompt,
+                MEMORY_SETTINGS.get("topK", 3), MEMORY_SETTINGS.get("minScore", 0.3),
             )
-        except Exception as e:
-            error_code, retry_delay = get_retry_and_code(e)
-            if str(error_code) == "429":
-                logger.warning(f"Rate limit encountered. Retry after: {retry_delay}")
-                return SimpleNamespace(text=f"Rate limit error! Try again in {retry_delay}!")# Fake the message as the error. Jank, yeh. Works? Maybe.
-            logger.exception(f"Error during AI generation: {e}")
-            raise e
+        except Exception:
+            logger.exception(f"Memory lookup failed for guild={guild_id}")
+            return []
+        if not found:
+            return []
+        lines = "\n".join(f"- {text}" for _, text in found)
+        return [f"(Things you remember from earlier conversations in this server:\n{lines})"]
+
+    def _remember(self, guild_id: int | None, user_name: str, prompt: str, reply: str):
+        """Store a salient exchange in the background (long enough to be worth recalling)."""
+        if self.memory is None or guild_id is None:
+            return
+        if len(prompt) + len(reply) < MEMORY_SETTINGS.get("minChars", 200):
+            return
+
+        text = f"{user_name}: {prompt}\nBot: {reply}"[:MEMORY_SETTINGS.get("maxChars", 1000)]
+
+        async def store():
+            try:
+                await asyncio.to_thread(self.memory.remember, guild_id, [text])
+            except Exception:
+                logger.exception(f"Failed to store memory for guild={guild_id}")
+
+        task = asyncio.create_task(store())
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def _generate_shared(self, key: str, contents: list, guild_id: int | None) -> str:
+        """
+        Generate for a stateless prompt. Answers come from the response cache if fresh,
+        and identical prompts that are already in flight share that one API call.
+        """
+        if RESPONSE_CACHE_TTL > 0:
+            text = self.response_cache.get(key)
+            if text is not None:
+                self.cache_hits += 1
+                return text
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.cache_coalesced += 1
+        else:
+            self.cache_misses += 1
+
+            async def run():
+                try:
+                    response = await self._generate(contents, guild_id=guild_id)
+                    text = getattr(response, "text", None)
+                    if text and RESPONSE_CACHE_TTL > 0:
+                        self.response_cache.set(key, text)
+                    return text or "(No text returned.)"
+                finally:
+                    self.inflight.pop(key, None)
+
+            task = self.inflight[key] = asyncio.create_task(run())
+
+        # shield: one impatient caller getting cancelled shouldn't cancel everyone's request
+        return await asyncio.shield(task)
 
     async def _handle_prompt(
         self,
         ctx_or_message,
         prompt: str,
-        image: discord.Attachment | None,
+        images: list[discord.Attachment],
         convo: Conversation | None = None,
+        parent: TurnNode | None = None,
         start_new: bool = False
     ):
         """
@@ -137,6 +743,9 @@ class Chatbot(commands.Cog):
         ctx_or_message can be:
         - commands.Context (from command)
         - discord.Message (from on_message)
+
+        When continuing, `parent` is the turn being replied to (any turn, not just
+        the latest one; replying to an older one starts a branch).
         """
 
         prompt = (prompt or "").strip()
@@ -145,29 +754,39 @@ class Chatbot(commands.Cog):
                 return await ctx_or_message.reply("You must specify a prompt!", ephemeral=True)
             return
 
-        # Build base contents
-        contents: list = []
+        guild_id = ctx_or_message.guild.id if ctx_or_message.guild else None
+
+        # Build base contents, starting with anything we remember that's relevant
+        memories = await self._recall(guild_id, prompt)
+        contents: list = list(memories)
 
-        # If continuing a conversation, include history
+        # If continuing a conversation, include history (of this branch)
         if convo is not None:
             self._touch(convo)
-            contents.extend(convo.history)
+            contents.extend(convo.history_contents(parent))
 
 
+        source_message = ctx_or_message.message if isinstance(ctx_or_message, commands.Context) else ctx_or_message
+        channel_context = await self._channel_context(ctx_or_message.channel, source_message.id)
+        contents.extend(channel_context)
+
         user_name = ctx_or_message.author.name
         contents.append(f"{user_name}: {prompt}")
 
-        # Add image if present
-        if image is not None:
-            if not is_image_attachment(image):
-                reply_target = ctx_or_message if isinstance(ctx_or_message, commands.Context) else ctx_or_message.channel
+        # Add images if present. Each one is downloaded once and the same parts
+        # are reused for the request and for the conversation history.
+        image_parts: list[types.Part] = []
+        if images:
+            # Other attachments (a PDF next to a screenshot) are left out, not a reason to refuse
+            images = [image for image in images if is_image_attachment(image)]
+            if not images:
                 if isinstance(ctx_or_message, commands.Context):
                     return await ctx_or_message.reply("That attachment isn't an image.", ephemeral=True)
                 else:
                     return await ctx_or_message.reply("That attachment isn't an image.")
 
             try:
-                image_part = await attachment_to_part(image)
+                image_parts = await attachments_to_parts(images)
             except Exception:
                 logger.exception("Failed to download image attachment.")
                 if isinstance(ctx_or_message, commands.Context):
@@ -175,7 +794,7 @@ class Chatbot(commands.Cog):
                 else:
                     return await ctx_or_message.reply("I couldn't download that image attachment.")
 
-            contents.append(image_part)
+            contents.extend(image_parts)
 
         # Typing / deferring behavior
         if isinstance(ctx_or_message, commands.Context):
@@ -189,8 +808,20 @@ class Chatbot(commands.Cog):
 
         async with typing_cm:
             try:
-                response = await self._generate(contents)
-                text = getattr(response, "text", None) or "(No text returned.)"
+                if convo is None and not image_parts and not channel_context:
+                    # Stateless, so the answer doesn't depend on who asked. We leave the author
+                    # name out so identical prompts can share a reply (history doesn't store it
+                    # for the first turn either). Memories are per guild, so then is the key.
+                    key = normalize_prompt(prompt)
+                    if memories:
+                        key = f"{guild_id}:{key}"
+                    text = await self._generate_shared(key, [*memories, prompt], guild_id)
+                else:
+                    response = await self._generate(contents, guild_id=guild_id)
+                    text = getattr(response, "text", None) or "(No text returned.)"
+            except RateLimited as e:
+                retry_hint = f" Try again in {e.retry_after:.0f}s!" if e.retry_after else ""
+                return await ctx_or_message.reply(f"I'm being rate limited right now.{retry_hint}")
             except Exception:
                 logger.exception("AI generation failed.")
                 if isinstance(ctx_or_message, commands.Context):
@@ -204,45 +835,28 @@ class Chatbot(commands.Cog):
         else:
             sent = await ctx_or_message.reply(text)
 
+        self._remember(guild_id, user_name, prompt, text)
+
         # If starting a new conversation, create one now anchored on the bot message
         if start_new:
             new_convo = Conversation(
                 root_bot_message_id=sent.id,
                 latest_bot_message_id=sent.id,
                 channel_id=sent.channel.id,
-                history=[]
+                guild_id=guild_id,
             )
             # Store the first turn in history
-            new_convo.history.append(prompt)
-            if image is not None:
-                # NOTE: we do NOT store raw attachment objects, only parts
-                # We re-create the part again so history is consistent
-                try:
-                    image_part = await attachment_to_part(image)
-                    new_convo.history.append(image_part)
-                except Exception:
-                    pass
-            new_convo.history.append(text)
-
-            self.conversations[new_convo.root_bot_message_id] = new_convo
-            self.message_to_root[sent.id] = new_convo.root_bot_message_id
+            # NOTE: we do NOT store raw attachment objects, only parts
+            new_convo.add_turn(sent.id, Turn(prompt, image_parts, text), parent=None)
+            self._add_resident(new_convo)
+            await self._save(new_convo)
             logger.info(f"Started new conversation root={new_convo.root_bot_message_id}")
             return
 
-        # If continuing a conversation, append to history and update message pointers
+        # If continuing a conversation, hang the new turn off the one we replied to
         if convo is not None:
-            convo.history.append(prompt)
-            if image is not None:
-                try:
-                    image_part = await attachment_to_part(image)
-                    convo.history.append(image_part)
-                except Exception:
-                    pass
-            convo.history.append(f"Bot: {text}")
-
-
-            self._trim_history(convo)
-            self._register_bot_message(convo, sent.id)
+            convo = self._register_bot_message(convo, sent.id, Turn(prompt, image_parts, f"Bot: {text}"), parent)
+            await self._save(convo)
 
     @commands.hybrid_command(name="ask")
     async def ask(
@@ -255,21 +869,199 @@ class Chatbot(commands.Cog):
         """Ask the AI chatbot a question."""
         logger.info(f"User {ctx.author} invoked ask command: {prompt!r}")
 
-        # Prefix users can attach an image instead
-        if image is None and getattr(ctx.message, "attachments", None):
-            if ctx.message.attachments:
-                image = ctx.message.attachments[0]
+        # Prefix users can attach images instead
+        images = [image] if image is not None else list(getattr(ctx.message, "attachments", None) or [])
 
         await self._handle_prompt(
             ctx_or_message=ctx,
             prompt=prompt,
-            image=image,
+            images=images,
             convo=None,
             start_new=True
         )
 
+    @commands.hybrid_command(name="aiqueue")
+    async def aiqueue(self, ctx: commands.Context):
+        """Show the AI request queue, response cache and per-model latency stats."""
+        stats = self.scheduler.stats()
+        await ctx.reply(
+            f"**AI queue**\n"
+            f"Queued: {stats['queued']} | Running: {stats['running']}\n"
+            f"Completed: {stats['completed']} | Failed: {stats['failed']}\n"
+            f"Rate limited: {stats['rate_limited']} | Retries: {stats['retries']}\n"
+            f"Wait: avg {stats['wait_avg']:.2f}s, p50 {stats['wait_p50']:.2f}s, p95 {stats['wait_p95']:.2f}s\n"
+            f"Cache: {self.cache_hits} hits, {self.cache_misses} misses, {self.cache_coalesced} coalesced "
+            f"({len(self.response_cache)} entries, ttl {RESPONSE_CACHE_TTL}s)"
+            + "".join(
+                f"\n`{name}`: {m['calls']} calls, p50 {m['p50']:.2f}s, p95 {m['p95']:.2f}s, p99 {m['p99']:.2f}s, "
+                f"errors {m['error_rate']:.0%}" + (" (cooling down)" if m["cooling_down"] else "")
+                for name, m in self.router.summary().items()
+            )
+            + (f"\n-# Paused for {stats['paused_for']:.0f}s (rate limited)" if stats["paused_for"] else "")
+        )
+
+    @commands.hybrid_command(name="aicontext")
+    async def aicontext(self, ctx: commands.Context, mode: str | None = None):
+        """Turn channel context on/off: the chatbot also sees the last few messages in this channel."""
+        if ctx.guild is None:
+            await ctx.reply("Channel context is only for server channels.")
+            return
+
+        if mode is None:
+            state = "on" if ctx.channel.id in self.context_channels else "off"
+            await ctx.reply(f"Channel context is **{state}** here. Use `{ctx.prefix}aicontext on/off` to change it.")
+            return
+
+        if not ctx.author.guild_permissions.manage_channels:
+            await ctx.reply("You don't have the power to change that for this channel.")
+            return
+
+        mode = mode.lower()
+        if mode not in ("on", "off"):
+            await ctx.reply("Use `on` or `off`.")
+            return
+
+        enabled = mode == "on"
+        await self.store.set_channel_context(ctx.channel.id, enabled)
+        if enabled:
+            self.context_channels.add(ctx.channel.id)
+            if ctx.channel.id not in self.backfilled:
+                await self._backfill(ctx.channel)
+        else:
+            self.context_channels.discard(ctx.channel.id)
+            self.channel_buffers.pop(ctx.channel.id, None)
+            self.backfilled.discard(ctx.channel.id)
+
+        await ctx.reply(f"Channel context turned **{mode}** ({CHANNEL_CONTEXT_MESSAGES} messages).")
+
+    async def _stop_voice(self, guild_id: int) -> dict | None:
+        session = self.voice_sessions.pop(guild_id, None)
+        if session is None:
+            return None
+        vc, bridge = session
+        await bridge.stop()
+        try:
+            vc.stop_listening()
+            vc.stop()
+            await vc.disconnect()
+        except Exception:
+            logger.exception(f"Failed to disconnect voice in guild={guild_id}")
+        return bridge.stats()
+
+    @commands.hybrid_command(name="voicechat")
+    async def voicechat(self, ctx: commands.Context):
+        """Talk to the AI in your voice channel (real-time, using Gemini Live)."""
+        if voice_recv is None:
+            await ctx.reply("Voice mode needs the `discord-ext-voice-recv` package, which isn't installed.")
+            return
+        if not ctx.guild or not ctx.author.voice or not ctx.author.voice.channel:
+            await ctx.reply("You need to be in a voice channel first.")
+            return
+        if ctx.guild.id in self.voice_sessions:
+            await ctx.reply(f"I'm already in a voice chat here. Use `{ctx.prefix}voicestop` to end it.")
+            return
+
+        vc = await ctx.author.voice.channel.connect(cls=voice_recv.VoiceRecvClient)
+        live_config = {
+            "response_modalities": ["AUDIO"],
+            "system_instruction": VOICE_SETTINGS.get("systemInstructions", system_instructions),
+        }
+        bridge = LiveBridge(
+            lambda: client.aio.live.connect(model=VOICE_MODEL, config=live_config),
+            user_id=ctx.author.id,
+            mic_queue_size=VOICE_SETTINGS.get("micQueueFrames", 50),
+            max_output_frames=VOICE_SETTINGS.get("outputQueueFrames", 1500),
+        )
+        self.voice_sessions[ctx.guild.id] = (vc, bridge)
+
+        vc.play(bridge.source)
+        vc.listen(voice_recv.BasicSink(lambda user, data: bridge.on_voice(user, data.pcm)))
+
+        guild_id = ctx.guild.id
+        def on_done(task: asyncio.Task):
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Voice session in guild={guild_id} died: {task.exception()!r}")
+                self.bot.loop.create_task(self._stop_voice(guild_id))
+        bridge.start().add_done_callback(on_done)
+
+        logger.info(f"User {ctx.author} started a voice chat in {ctx.author.voice.channel}")
+        await ctx.reply(f"Listening to you in {ctx.author.voice.channel.mention}! Use `{ctx.prefix}voicestop` to end.")
+
+    @commands.hybrid_command(name="voicestop")
+    async def voicestop(self, ctx: commands.Context):
+        """End the AI voice chat in this server."""
+        stats = await self._stop_voice(ctx.guild.id) if ctx.guild else None
+        if stats is None:
+            await ctx.reply("There's no voice chat running here.")
+            return
+        await ctx.reply(
+            f"Voice chat ended.\n-# Response latency p50 {stats['latency_p50'] * 1000:.0f}ms, "
+            f"p95 {stats['latency_p95'] * 1000:.0f}ms | {stats['frames_in']} frames in "
+            f"({stats['frames_dropped']} dropped), {stats['frames_played']} played, "
+            f"{stats['interruptions']} interruptions"
+        )
+
+    @commands.hybrid_command(name="aistats")
+    async def aistats(self, ctx: commands.Context, hours: int = 24):
+        """Show AI usage (tokens, latency, errors) for this server, per hour and model."""
+        if not ctx.guild or not ctx.author.guild_permissions.administrator:
+            await ctx.reply("You don't have the power to view AI stats.")
+            return
+
+        hours = max(1, min(hours, 24 * 30))
+        is_owner = await self.bot.is_owner(ctx.author)
+        usage = await self.telemetry.usage(
+            time.time() - hours * 3600, guild_id=None if is_owner else ctx.guild.id
+        )
+
+        def line(label, b):
+            avg = b.latency_ms_total / b.calls if b.calls else 0
+            return (
+                f"{label}: {b.calls} calls, {b.prompt_tokens:,} in / {b.response_tokens:,} out tokens, "
+                f"avg {avg:.0f}ms (max {b.latency_ms_max}ms), {b.retries} retries, "
+                f"{b.rate_limited} rate limited, {b.error + b.timeout} failed"
+            )
+
+        by_guild: dict[int, UsageBucket] = {}
+        by_hour: dict[int, UsageBucket] = {}
+        by_model: dict[str, UsageBucket] = {}
+        for (guild_id, hour, model), bucket in usage.items():
+            by_guild.setdefault(guild_id, UsageBucket()).merge(bucket)
+            if guild_id == ctx.guild.id:
+                by_hour.setdefault(hour, UsageBucket()).merge(bucket)
+                by_model.setdefault(model, UsageBucket()).merge(bucket)
+
+        lines = [f"## AI usage, last {hours}h"]
+        if is_owner and by_guild:
+            lines.append("**Top servers (by tokens)**")
+            top = sorted(by_guild.items(), key=lambda kv: kv[1].prompt_tokens + kv[1].response_tokens, reverse=True)
+            for guild_id, bucket in top[:5]:
+                guild = self.bot.get_guild(guild_id)
+                lines.append("-# " + line(guild.name if guild else str(guild_id), bucket))
+
+        lines.append("**This server, by model**")
+        lines.extend("-# " + line(f"`{model}`", bucket) for model, bucket in sorted(by_model.items()))
+        lines.append("**This server, by hour**")
+        for hour, bucket in sorted(by_hour.items(), reverse=True)[:12]:
+            lines.append("-# " + line(f"<t:{hour}:t>", bucket))
+        if not by_hour:
+            lines.append("-# Nothing yet.")
+
+        await ctx.reply("\n".join(lines)[:2000])
+
+    @tasks.loop(minutes=5)
+    async def telemetry_flush_task(self):
+        try:
+            await self.telemetry.flush()
+        except Exception:
+            logger.exception("Failed to flush AI telemetry")
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        # Keep the channel-context ring buffer fresh (bot messages included)
+        if message.channel.id in self.context_channels:
+            self._buffer_message(message)
+
         # Ignore bots (including ourselves)
         if message.author.bot:
             return
@@ -281,17 +1073,18 @@ class Chatbot(commands.Cog):
         # Try to resolve the replied-to message
         replied_id = message.reference.message_id
 
-        # Fast path: if it's not a known convo message, ignore
-        root_id = self.message_to_root.get(replied_id)
-        if not root_id:
+        # Fast path: replies to someone else's message can't be a conversation
+        resolved = message.reference.resolved
+        if isinstance(resolved, discord.Message) and resolved.author.id != self.bot.user.id:
             return
 
-        convo = self.conversations.get(root_id)
+        convo = await self._find_conversation(replied_id)
         if not convo:
             return
 
-        # Strict mode: only allow replying to the LATEST bot message
-        if replied_id != convo.latest_bot_message_id:
+        # Replying to an older bot message branches off from that point
+        parent = convo.nodes.get(replied_id)
+        if parent is None:
             return
 
         # Must be same channel
@@ -303,41 +1096,55 @@ class Chatbot(commands.Cog):
         if not prompt:
             return
 
-        # Check for an image attachment on the reply message
-        image = None
-        if message.attachments:
-            image = message.attachments[0]
+        # Check for image attachments on the reply message
+        images = list(message.attachments)
 
         await self._handle_prompt(
             ctx_or_message=message,
             prompt=prompt,
-            image=image,
+            images=images,
             convo=convo,
+            parent=parent,
             start_new=False
         )
 
     @tasks.loop(minutes=2)
     async def cleanup_task(self):
+        """
+        Expire idle conversations. Only heap entries that are due get looked at;
+        if the convo was touched since, it's pushed back with its new deadline.
+        """
         now = time.time()
-        expired = []
 
-        for root_id, convo in self.conversations.items():
-            if now - convo.last_activity > CONVO_TIMEOUT:
-                expired.append(root_id)
-
-        for root_id in expired:
-            convo = self.conversations.pop(root_id, None)
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            deadline, root_id = heapq.heappop(self.expiry_heap)
+            if self.expiry_deadlines.get(root_id) != deadline:
+                continue  # stale entry, the convo was rescheduled or is gone
+            convo = self.conversations.peek(root_id)
             if not convo:
+                del self.expiry_deadlines[root_id]  # on disk only; the purge below handles it
                 continue
 
-            # Remove all message id mappings pointing to this convo root
-            # (slow but safe; number of convos should be small)
-            to_remove = [mid for mid, rid in self.message_to_root.items() if rid == root_id]
-            for mid in to_remove:
+            expires_at = convo.last_activity + CONVO_TIMEOUT
+            if expires_at > now:
+                self._schedule_expiry(root_id, expires_at)
+                continue
+
+            del self.expiry_deadlines[root_id]
+            self.conversations.pop(root_id)
+            for task in convo.summary_tasks.values():
+                task.cancel()
+
+            for mid in convo.message_ids:
                 self.message_to_root.pop(mid, None)
 
             logger.info(f"Expired conversation root={root_id}")
 
+        # Cold conversations on disk expire too
+        purged = await self.store.purge_older_than(now - CONVO_TIMEOUT)
+        if purged:
+            logger.info(f"Purged {purged} expired conversations from disk")
+
     @cleanup_task.before_loop
     async def before_cleanup(self):
         await self.bot.wait_until_ready()
@@ -1,5 +1,8 @@
 import os
-import json
+import re
+import time
+import math
+import hashlib
 import discord
 from discord.ext import commands
 import aiohttp
@@ -9,44 +12,82 @@ import asyncio
 from PIL import Image
 import io, base64
 
+from turtlebott.config import settings
 from turtlebott.utils.logger import setup_logger
+from turtlebott.utils.cache import LRUCache
 import turtlebott.utils.dice as dice
-from turtlebott.utils.dnd_beyond_parser import convert, convert_to_file
+from turtlebott.utils.compute import ComputeBusy, Priority
+from turtlebott.utils.dnd_beyond_parser import convert_bytes, convert_to_file
+from turtlebott.utils.character_links import CharacterLinkStore
+from turtlebott.utils.dnd_store import DndStore, SqliteCharacterLinkStore, SqliteSheetRepository
 from turtlebott.utils.dnd_views import CharView
+from turtlebott.utils.http import get_session
+from turtlebott.utils.roll_table import compile_roll_table, normalize_keyword
+from turtlebott.utils.sheet_repository import SheetRepository
 
 logger = setup_logger("dndhelper")
+
+DND_SETTINGS = settings.config["experiments_config"]["dndhelper"]
+STORAGE = DND_SETTINGS.get("storage", "json")  # "json" files or "sqlite"
+REFRESH_CONCURRENCY = DND_SETTINGS.get("refreshConcurrency", 6)  # sheets uchars downloads at once
+PROGRESS_INTERVAL = 2.0  # seconds between edits of the uchars progress message
+DEFAULT_AVATAR = "https://www.dndbeyond.com/Content/Skins/Waterdeep/images/characters/default-avatar-builder.png"
+BATCH_REGEX = re.compile(r"(\d+)\s*x\s+(.+)", re.IGNORECASE | re.DOTALL)
+MAX_BATCH = 25
+ODDS_TARGET_REGEX = re.compile(r"\s+(?:vs\.?|dc|>=)\s*(-?\d+(?:\.\d+)?)$", re.IGNORECASE)
        
 class DndHelper(commands.Cog):
     def __init__(self, bot):
         self.DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "dnd_helper"))
-        self.TEMP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "temp"))
         self.SHEETS_DIR = os.path.join(self.DATA_DIR, "sheets")
 
+        self.LINKS_FILE = os.path.join(self.DATA_DIR, "char_link.json")
+
         self.bot = bot
+        self.store = None
+        if STORAGE == "sqlite":
+            self.store = DndStore(os.path.join(self.DATA_DIR, "dnd.sqlite3"))
+            self.sheets = SqliteSheetRepository(self.store)
+            self.links = SqliteCharacterLinkStore(self.store)
+        else:
+            if STORAGE != "json":
+                logger.warning(f"Unknown storage '{STORAGE}', using json")
+            self.sheets = SheetRepository(self.SHEETS_DIR)
+            self.links = CharacterLinkStore(self.LINKS_FILE)
+        self.roll_tables = LRUCache(512)  # (guild_id, name) -> (sheet it was compiled from, keyword table)
+
+    async def cog_load(self):
+        if self.store is not None:
+            await self.store.import_json(self.SHEETS_DIR, self.LINKS_FILE)
+        await self.links.load()
+
+    def cog_unload(self):
+        self.links.flush_sync()
+        if self.store is not None:
+            self.store.close()
     
     def get_linked_character(self, guild_id: int, user_id: int) -> str | None:
         """Return the character name linked to a user, or None."""
-
-        link_file = os.path.join(self.DATA_DIR, "char_link.json")
-
-        if not os.path.exists(link_file):
-            return None
-
-        with open(link_file, "r") as f:
-            links = json.load(f)
-
-        server_links = links.get(str(guild_id), {})
-        return server_links.get(str(user_id))
+        return self.links.get(guild_id, user_id)
+
+    def roll_table(self, guild_id: int, name: str, data: dict) -> dict:
+        """A sheet's roll keywords. Compiled on first use and again only when the sheet changes."""
+        cached = self.roll_tables.get((guild_id, name))
+        # The repositories hand out the same dict until the sheet is re-read or saved
+        if cached is None or cached[0] is not data:
+            cached = (data, compile_roll_table(data))
+            self.roll_tables.set((guild_id, name), cached)
+        return cached[1]
     
     # helpah functions, cause of course I wouldn't ever move them into their own seperate utils file!
-    async def download(self, url: str, filepath: str):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
+    async def download(self, url: str) -> bytes | None:
+        try:
+            async with get_session().get(url) as resp:
                 if resp.status != 200:
-                    return False
-                with open(filepath, "wb") as f:
-                    f.write(await resp.read())
-        return True
+                    return None
+                return await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None
 
     async def wait_for_confirm(self, ctx, message):
         await message.add_reaction("✅")
@@ -93,12 +134,11 @@ class DndHelper(commands.Cog):
             target_user = ctx.author
 
         # Check if character exists
-        guild_folder = os.path.join(self.SHEETS_DIR, str(ctx.guild.id))
-        if not os.path.exists(guild_folder):
+        all_chars = await self.sheets.names(ctx.guild.id)
+        if not all_chars:
             await ctx.reply("No character sheets found for this server.")
             return
 
-        all_chars = [f[:-5] for f in os.listdir(guild_folder) if f.endswith(".json")]
         if not character_name:
             await ctx.reply("You must specify a character name.")
             return
@@ -107,25 +147,9 @@ class DndHelper(commands.Cog):
             await ctx.reply(f"No character sheet found with the name `{character_name}`.")
             return
 
-        # Load char_link.json
-        link_file = os.path.join(self.DATA_DIR, "char_link.json")
-        if os.path.exists(link_file):
-            with open(link_file, "r") as f:
-                links = json.load(f)
-        else:
-            links = {}
-
-        server_links = links.get(str(ctx.guild.id), {})
-
         # Check if character already linked
-        if character_name in server_links.values():
-            # Find current owner
-            current_owner_id = None
-            for uid, char in server_links.items():
-                if char == character_name:
-                    current_owner_id = uid
-                    break
-
+        current_owner_id = self.links.owner(ctx.guild.id, character_name)
+        if current_owner_id is not None and current_owner_id != target_user.id:
             # If author is admin, ask to overwrite
             if ctx.author.guild_permissions.administrator:
                 msg = await ctx.reply(
@@ -150,24 +174,14 @@ class DndHelper(commands.Cog):
                 await ctx.reply("This character is already linked to someone else.")
                 return
 
-        # Add or update link
-        server_links[str(target_user.id)] = character_name
-        links[str(ctx.guild.id)] = server_links
-
-        os.makedirs(os.path.dirname(link_file), exist_ok=True)
-        with open(link_file, "w") as f:
-            json.dump(links, f, indent=4)
+        # Add or update link (saved to disk in the background)
+        self.links.link(ctx.guild.id, target_user.id, character_name)
 
         await ctx.reply(f"Linked character `{character_name}` to <@{target_user.id}> successfully.")
     
     @commands.hybrid_command(name="char")
     async def char(self, ctx, *, character_name: str | None = None):
-        guild_folder = os.path.join(self.SHEETS_DIR, str(ctx.guild.id))
-        if not os.path.exists(guild_folder):
-            await ctx.reply("No character sheets found for this server.")
-            return
-
-        all_chars = [f[:-5] for f in os.listdir(guild_folder) if f.endswith(".json")]
+        all_chars = await self.sheets.names(ctx.guild.id)
         if not all_chars:
             await ctx.reply("No character sheets found for this server.")
             return
@@ -178,20 +192,85 @@ class DndHelper(commands.Cog):
             await ctx.reply(f"No character sheet found with the name `{character_name}`.")
             return
 
-        filepath = os.path.join(guild_folder, f"{character_name}.json")
-        with open(filepath, "r") as f:
-            data = json.load(f)
+        data = await self.sheets.get(ctx.guild.id, character_name)
+        if data is None:
+            await ctx.reply(f"No character sheet found with the name `{character_name}`.")
+            return
 
-        view = CharView(all_chars, data, character_name, ctx.author, self.SHEETS_DIR, ctx.guild.id)
+        view = CharView(all_chars, data, character_name, ctx.author, self.sheets, ctx.guild.id)
         await view.show_section(ctx, "Overview", is_intial=True)
         
+    async def image_reachable(self, url: str | None) -> bool:
+        """Whether a portrait URL answers, without downloading it."""
+        if not url:
+            return False
+        try:
+            async with get_session().head(url, allow_redirects=True) as resp:
+                if resp.status != 405:
+                    return resp.status < 400
+            # Some hosts don't do HEAD; a GET whose body we never read is the next best thing
+            async with get_session().get(url) as resp:
+                return resp.status < 400
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return False
+
+    async def refresh_sheet(self, guild_id: int, name: str, now: str) -> str:
+        """Re-download and re-parse one sheet if its PDF changed. Returns "updated", "unchanged" or "failed"."""
+        data = await self.sheets.get(guild_id, name)
+        if data is None:
+            return "failed"
+        meta = data.get("meta", {})
+        source_url = meta.get("source")
+        if not source_url:
+            logger.warning(f"No source URL for {name}, skipping.")
+            return "failed"
+
+        # Conditional request: D&D Beyond answers 304 if the PDF hasn't changed since we got it
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        async with get_session().get(source_url, headers=headers) as resp:
+            if resp.status == 304:
+                return "unchanged"
+            if resp.status != 200:
+                logger.error(f"Failed to download {source_url} for {name} ({resp.status})")
+                return "failed"
+            pdf = await resp.read()
+            etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+        new_meta = dict(meta, etag=etag, last_modified=last_modified, content_hash=hashlib.sha256(pdf).hexdigest())
+        if new_meta["content_hash"] == meta.get("content_hash"):
+            # Same PDF, new validators (or none stored yet): remember them so next time is a 304
+            if (etag, last_modified) != (meta.get("etag"), meta.get("last_modified")):
+                await self.sheets.save(guild_id, name, {**data, "meta": new_meta})
+            return "unchanged"
+
+        logger.info(f"Updating character {name} from {source_url}")
+        new_data = await self.bot.compute.submit(convert_bytes, pdf, priority=Priority.LOW, name="parse_sheet")
+        new_meta["last_updated"] = now
+        new_data["meta"] = new_meta
+
+        old_image = data.get("character", {}).get("image")
+        image = new_data["character"].get("image")
+        if image != old_image and not await self.image_reachable(image):
+            if image:
+                logger.warning(f"Portrait for {name} isn't reachable, keeping the old one")
+            image = old_image or DEFAULT_AVATAR
+        new_data["character"]["image"] = image or DEFAULT_AVATAR
+
+        await self.sheets.save(guild_id, name, new_data)
+        return "updated"
+
     @commands.hybrid_command(name="uchars", aliases=["updatechar", "updatecharacters", "updatecharacter", "updatechars", "uchar"])
     async def uchars(self, ctx):
         """Update all character sheets for this server by re-downloading and re-parsing their data."""
         guild_id = ctx.guild.id
-        sheets_folder = os.path.join(self.SHEETS_DIR, f"{guild_id}")
-        
-        if not os.path.exists(sheets_folder):
+        names = await self.sheets.names(guild_id)
+
+        if not names:
             await ctx.reply("No character sheets found for this server.")
             return
         
@@ -199,61 +278,41 @@ class DndHelper(commands.Cog):
             await ctx.reply("You don't have the power to update character sheets.")
             return
 
-        
-        updated = 0
-        failed = 0
-        fails = []
-        updates = []
-        
-        for filename in os.listdir(sheets_folder):
-            if not filename.endswith(".json"):
-                continue
-            
-            filepath = os.path.join(sheets_folder, filename)
-            with open(filepath, "r") as f:
-                data = json.load(f)
-            
-            source_url = data.get("meta", {}).get("source")
-            if not source_url:
-                fails.append(filename)
-                failed += 1
-                logger.warning(f"No source URL for {filename}, skipping.")
-                continue
-            
-            logger.info(f"Updating character from {source_url}")
-            temp_path = os.path.join(self.TEMP_DIR, f"temp_{filename}")
-            
-            if not await self.download(source_url, temp_path):
-                fails.append(filename)
-                failed += 1
-                logger.error(f"Failed to download {source_url} for {filename}")
-                continue
-            
-            try:
-                new_data = convert(temp_path)
-                new_data["meta"] = data.get("meta", {})
-                new_data["meta"]["last_updated"] = ctx.message.created_at.isoformat()
-                
+        progress = await ctx.reply(f"Updating {len(names)} character sheets...")
+        now = ctx.message.created_at.isoformat()
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+        results = {"updated": [], "unchanged": [], "failed": []}
+        last_edit = time.monotonic()
+
+        async def refresh(name: str):
+            nonlocal last_edit
+            async with semaphore:
                 try:
-                    await self.download(new_data["character"]["image"], os.path.join(self.TEMP_DIR, f"temp_{filename}_img.png"))
-                    pfp_img = new_data["character"]["image"]
+                    outcome = await self.refresh_sheet(guild_id, name, now)
                 except Exception as e:
-                    logger.warning(f"Failed to download image for {filename}: {e}, defaulting to normal")
-                    pfp_img = "https://www.dndbeyond.com/Content/Skins/Waterdeep/images/characters/default-avatar-builder.png"
-                    
-                new_data["character"]["image"] = pfp_img
-                with open(filepath, "w") as f:
-                    json.dump(new_data, f, indent=4)
-                updates.append(filename)
-                updated += 1
-            except Exception as e:
-                fails.append(filename)
-                failed += 1
-                logger.error(f"Error updating {filename}: {e}")
-            finally:
-                os.remove(temp_path)
-                
-        await ctx.reply(f"Updated {updated} character sheets. Failed: {failed}\n-# Updated: {', '.join(updates)}\n-# Failed: {', '.join(fails)}")
+                    logger.error(f"Error updating {name}: {e}")
+                    outcome = "failed"
+            results[outcome].append(name)
+
+            # One message, edited now and then (not per sheet, that'd hit the rate limit)
+            done = sum(map(len, results.values()))
+            if done < len(names) and time.monotonic() - last_edit >= PROGRESS_INTERVAL:
+                last_edit = time.monotonic()
+                try:
+                    await progress.edit(content=f"Updating character sheets... {done}/{len(names)}")
+                except discord.HTTPException:
+                    pass
+
+        await asyncio.gather(*(refresh(name) for name in names))
+
+        summary = (
+            f"Updated {len(results['updated'])} character sheets, {len(results['unchanged'])} unchanged."
+            f" Failed: {len(results['failed'])}"
+        )
+        for outcome in ("updated", "failed"):
+            if results[outcome]:
+                summary += f"\n-# {outcome.capitalize()}: {', '.join(sorted(results[outcome]))}"
+        await progress.edit(content=summary)
             
     @commands.hybrid_command(name="newchar", aliases=["newcharacter"])
     async def newchar(self, ctx, url: str, pfp: str | None = None):
@@ -263,21 +322,23 @@ class DndHelper(commands.Cog):
             await ctx.reply("That URL does not appear to be a PDF.")
             return
 
-        os.makedirs(self.TEMP_DIR, exist_ok=True)
-
         filename = os.path.basename(urlparse(url).path)
-        filepath = os.path.join(self.TEMP_DIR, filename)
 
         await ctx.reply(f"Downloading `{filename}`...")
 
-        if not await self.download(url, filepath):
+        pdf = await self.download(url)
+        if pdf is None:
             await ctx.reply("Failed to download the file.")
             return
 
         await ctx.send(f"Downloaded `{filename}`! Parsing...")
 
         try:
-            data = convert(filepath)
+            # Someone's waiting on this one, so it goes ahead of uchars' batch parsing
+            data = await self.bot.compute.submit(convert_bytes, pdf, priority=Priority.HIGH, name="parse_sheet")
+        except ComputeBusy:
+            await ctx.reply("The bot is busy parsing other sheets, try again in a bit.")
+            return
         except Exception as e:
             logger.error(f"Error parsing PDF: {e}")
             await ctx.reply("Failed to parse the PDF.")
@@ -296,16 +357,8 @@ class DndHelper(commands.Cog):
             await ctx.reply("Character not saved.")
             return
 
-        save_path = os.path.abspath(
-            os.path.join(self.SHEETS_DIR, f"{ctx.guild.id}", f"{name}.json")
-        )
-
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-        if os.path.exists(save_path):
-            with open(save_path) as f:
-                existing = json.load(f)
-
+        existing = await self.sheets.get(ctx.guild.id, name)
+        if existing is not None:
             existing_char = existing.get("character", {})
             new_char = data.get("character", {})
 
@@ -332,14 +385,65 @@ class DndHelper(commands.Cog):
         if pfp:
             pfp_url = pfp
         else:
-            pfp_url = "https://www.dndbeyond.com/Content/Skins/Waterdeep/images/characters/default-avatar-builder.png"
+            pfp_url = DEFAULT_AVATAR
         
         data["character"]["image"] = pfp_url
-        with open(save_path, "w") as f:
-            json.dump(data, f, indent=4)
+        await self.sheets.save(ctx.guild.id, name, data)
 
         await ctx.reply(f"Character saved! Use `{ctx.prefix}char {name}` to view it.")      
 
+    @commands.hybrid_command(name="charalias", aliases=["calias", "rollalias"])
+    async def charalias(self, ctx, alias: str | None = None, *, target: str | None = None):
+        """Add (`charalias sneak stealth`), remove (`charalias sneak`) or list roll aliases for your character."""
+        if ctx.guild is None:
+            await ctx.reply("Characters live in servers, so aliases only work there.")
+            return
+        char_name = self.get_linked_character(ctx.guild.id, ctx.author.id)
+        if not char_name:
+            await ctx.reply(f"Link a character first with `{ctx.prefix}charlink`.")
+            return
+
+        data = await self.sheets.get(ctx.guild.id, char_name)
+        if data is None:
+            await ctx.reply(f"Character sheet for `{char_name}` was not found.")
+            return
+        aliases = data.get("meta", {}).get("aliases", {})
+
+        if alias is None:
+            if not aliases:
+                await ctx.reply(f"`{char_name}` has no roll aliases.")
+                return
+            lines = "\n".join(f"`{name}` → `{to}`" for name, to in aliases.items())
+            await ctx.reply(f"Roll aliases for `{char_name}`:\n{lines}")
+            return
+
+        alias = normalize_keyword(alias)
+        aliases = dict(aliases)
+        if target is None:
+            if aliases.pop(alias, None) is None:
+                await ctx.reply(f"`{char_name}` has no alias `{alias}`.")
+                return
+            reply = f"Removed alias `{alias}` from `{char_name}`."
+        else:
+            table = self.roll_table(ctx.guild.id, char_name, data)
+            target = normalize_keyword(target)
+            if alias in table and alias not in aliases:
+                await ctx.reply(f"`{alias}` is already a roll keyword for `{char_name}`.")
+                return
+            if target not in table:
+                try:
+                    dice.parse_roll(target)
+                except ValueError:
+                    await ctx.reply(f"`{target}` is neither a roll keyword nor a dice expression.")
+                    return
+            aliases[alias] = target
+            reply = f"`{ctx.prefix}roll {alias}` now rolls `{target}` for `{char_name}`."
+
+        # Save a new sheet dict (the cached one is shared), which also gets its roll table recompiled
+        data = {**data, "meta": {**data.get("meta", {}), "aliases": aliases}}
+        await self.sheets.save(ctx.guild.id, char_name, data)
+        await ctx.reply(reply)
+
     @commands.hybrid_command(name="roll", aliases=["r"])
     async def roll(self, ctx, *, expression: str | None = None):
         """Smart rolling. Uses character sheet keywords or dice expressions."""
@@ -351,112 +455,79 @@ class DndHelper(commands.Cog):
             expression = expression.split(">")[1].strip()
         else:
             user = ctx.author.id
-        
-        saving = False
-        thing = expression.lower().strip()
-        if thing.endswith("saving"):
-            thing = thing[:-6].strip()  # Remove "saving" from the end
-            saving = True
-        if thing.endswith("save"):
-            thing = thing[:-4].strip()  # Remove "save" from the end
-            saving = True
-
-        base_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        sheets_folder = os.path.join(base_folder, "data", "dnd_helper", "sheets", f"{ctx.guild.id}")
-
-        # Get linked character
-        char_name = self.get_linked_character(ctx.guild.id, user)
-        sheet_file = os.path.join(sheets_folder, f"{char_name}.json")
-        if not char_name:
-            for f in os.listdir(sheets_folder):
-                if f.endswith(".json"):
-                    sheet_file = os.path.join(sheets_folder, f)
-                    break
-        if not os.path.exists(sheet_file):
-            await ctx.reply(f"Character sheet for `{char_name}` was not found.")
+
+        if expression.lower() == "party" or expression.lower().startswith("party "):
+            if user != ctx.author.id:
+                await ctx.reply("`party` rolls for every linked character, it can't be combined with a mention.")
+                return
+            await self.party_roll(ctx, expression[5:].strip() or "initiative")
             return
 
+        # "6x 1d20+5" / "3x longsword": several rolls, one reply
+        count = 1
+        batch = BATCH_REGEX.fullmatch(expression)
+        if batch:
+            count = int(batch.group(1))
+            expression = batch.group(2).strip()
+            if not 1 <= count <= MAX_BATCH:
+                await ctx.reply(f"You can roll between 1 and {MAX_BATCH} times at once.")
+                return
+        
+        # "stealth adv" is the "stealth" keyword rolled with advantage
+        thing, advantage = dice.split_advantage(normalize_keyword(expression))
+
+        # Get linked character (or the server's first one). In DMs there are no sheets, just dice.
+        char_name = None
+        if ctx.guild is not None:
+            char_name = self.get_linked_character(ctx.guild.id, user)
+            if not char_name:
+                all_chars = await self.sheets.names(ctx.guild.id)
+                char_name = all_chars[0] if all_chars else None
+
         data = None
-        if sheet_file:
-            with open(sheet_file, "r") as f:
-                data = json.load(f)
+        if char_name:
+            data = await self.sheets.get(ctx.guild.id, char_name)
+            if data is None:
+                await ctx.reply(f"Character sheet for `{char_name}` was not found.")
+                return
 
         # Try smart lookup if we have a sheet
         if data:
-            character = data.get("character", {}).get("name", "Unknown")
-            abilities = data.get("abilities", {})
-            skills = data.get("skills", [])
-            saves = data.get("saving_throws", {})
-            combat = data.get("combat", {})
-
-            mod = None
-            label = thing
-                
-            if thing in ["initiative", "init"]:
-                mod = combat.get("initiative")
-                label = "Initiative"
-
-            elif thing in ["str", "strength"]:
-                mod = abilities.get("str_mod")
-                label = "Strength"
-
-            elif thing in ["dex", "dexterity"]:
-                mod = abilities.get("dex_mod")
-                label = "Dexterity"
-
-            elif thing in ["con", "constitution"]:
-                mod = abilities.get("con_mod")
-                label = "Constitution"
-
-            elif thing in ["int", "intelligence"]:
-                mod = abilities.get("int_mod")
-                label = "Intelligence"
-
-            elif thing in ["wis", "wisdom"]:
-                mod = abilities.get("wis_mod")
-                label = "Wisdom"
-
-            elif thing in ["cha", "charisma"]:
-                mod = abilities.get("cha_mod")
-                label = "Charisma"
-                
-            else:
-                for skill in skills:
-                    if skill["name"].lower() == thing:
-                        mod = skill["value"]
-                        label = skill["name"]
-                        break
-                
-            if saving:
-                mod = saves[thing]["value"]
-                label = f"{label} (Saving Throw)"
-
-            if mod is not None:
-                expression = f"1d20{mod}"
-
-                result = dice.parse_roll(expression)
+            entry = self.roll_table(ctx.guild.id, char_name, data).get(thing)
+            if entry is not None:
+                character = data.get("character", {}).get("name", "Unknown")
+                keyword_expression = f"{entry.expression} {advantage}" if advantage else entry.expression
+                if count > 1:
+                    await self.batch_roll(ctx, keyword_expression, count, entry.label, character)
+                    return
+                try:
+                    result = dice.parse_roll(keyword_expression)
+                except ValueError as e:
+                    await ctx.reply(f"`{thing}` rolls `{keyword_expression}`: {e}")
+                    return
 
-                rolls_str = ", ".join(map(str, result.rolls))
                 total = dice.clean_number(result.total)
                 mod_clean = dice.clean_number(result.modifier)
 
-                msg = f"**:game_die: Rolling 1d20 for `{label}` ({mod_clean:+})**"
+                msg = f"**:game_die: Rolling {result.dice} for `{entry.label}` ({mod_clean:+})**"
                 msg += f"\n-# Character: {character}"
                 msg += f"\n# Total: {total}"
-                msg += f"\n-# Rolls: [{rolls_str}]"
+                msg += f"\n-# Rolls: {result.breakdown}"
 
                 await ctx.reply(msg)
                 return
 
         # Fallback to normal dice parser
+        if count > 1:
+            await self.batch_roll(ctx, expression, count)
+            return
         try:
             result = dice.parse_roll(expression)
 
-            rolls_str = ", ".join(map(str, result.rolls))
             mod = dice.clean_number(result.modifier)
             total = dice.clean_number(result.total)
 
-            msg = f"**:game_die: Rolling {result.count} d{result.size}"
+            msg = f"**:game_die: Rolling {result.dice}"
 
             if result.reason:
                 msg += f" for `{result.reason}`"
@@ -466,12 +537,140 @@ class DndHelper(commands.Cog):
 
             msg += "**"
             msg += f"\n# Total: {total}"
-            msg += f"\n-# Rolls: [{rolls_str}]"
+            msg += f"\n-# Rolls: {result.breakdown}"
 
             await ctx.reply(msg)
 
         except ValueError as e:
             await ctx.reply(str(e))
 
+    async def batch_roll(self, ctx, expression: str, count: int, label: str | None = None, character: str | None = None):
+        """Roll one expression `count` times and reply with a single embed."""
+        try:
+            results = [dice.parse_roll(expression) for _ in range(count)]
+        except ValueError as e:
+            await ctx.reply(str(e))
+            return
+
+        first = results[0]
+        title = f":game_die: {count} × {first.dice}"
+        if first.modifier:
+            title += f" {dice.clean_number(first.modifier):+}"
+        if label or first.reason:
+            title += f" for {label or first.reason}"
+
+        embed = discord.Embed(title=title, color=discord.Color.blue())
+        if character:
+            embed.set_author(name=character)
+        embed.description = "\n".join(
+            f"`{i:>2}.` **{dice.clean_number(r.total)}** · {_short(r.breakdown)}" for i, r in enumerate(results, 1)
+        )
+        totals = [r.total for r in results]
+        embed.set_footer(text=(
+            f"Sum {dice.clean_number(sum(totals))} · Highest {dice.clean_number(max(totals))}"
+            f" · Lowest {dice.clean_number(min(totals))}"
+        ))
+        await ctx.reply(embed=embed)
+
+    async def party_roll(self, ctx, keyword: str):
+        """Roll a keyword (or a plain expression) for every linked character, sorted best first."""
+        if ctx.guild is None:
+            await ctx.reply("Party rolls only work in a server.")
+            return
+        links = self.links.links(ctx.guild.id)
+        if not links:
+            await ctx.reply(f"No characters are linked in this server. Use `{ctx.prefix}charlink` first.")
+            return
+
+        thing, advantage = dice.split_advantage(normalize_keyword(keyword))
+        members = list(links.items())
+        sheets = await asyncio.gather(*(self.sheets.get(ctx.guild.id, name) for _, name in members))
+
+        label = None
+        rolled, missing = [], []
+        for (user_id, name), data in zip(members, sheets):
+            entry = self.roll_table(ctx.guild.id, name, data).get(thing) if data else None
+            if entry is not None:
+                label = label or entry.label
+                expression = f"{entry.expression} {advantage}" if advantage else entry.expression
+            else:
+                expression = keyword
+            try:
+                result = dice.parse_roll(expression)
+            except ValueError:
+                missing.append(name)
+                continue
+            character = data.get("character", {}).get("name", name) if data else name
+            rolled.append((result, character, user_id))
+
+        if not rolled:
+            await ctx.reply(f"Nobody in the party has `{thing}` to roll.")
+            return
+
+        # Best total first; ties go to the bigger bonus (like initiative ties)
+        rolled.sort(key=lambda r: (r[0].total, r[0].modifier), reverse=True)
+
+        title = f":game_die: Party {label or thing}"
+        if advantage:
+            title += f" ({advantage})"
+        embed = discord.Embed(title=title, color=discord.Color.blue())
+        lines = []
+        for i, (result, character, user_id) in enumerate(rolled, 1):
+            mod = dice.clean_number(result.modifier)
+            lines.append(
+                f"**{i}.** {character} (<@{user_id}>) — **{dice.clean_number(result.total)}**"
+                f" · {result.dice}{f' {mod:+}' if mod else ''} {_short(result.breakdown)}"
+            )
+        embed.description = "\n".join(lines)
+        if missing:
+            embed.set_footer(text=f"Couldn't roll {thing} for: {', '.join(missing)}")
+        await ctx.reply(embed=embed)
+
+    @commands.hybrid_command(name="odds", aliases=["chance", "chances"])
+    async def odds(self, ctx, *, expression: str):
+        """Exact odds of a roll, e.g. `odds 2d6+5 adv vs 15` or `odds stealth adv dc 12`."""
+        target = None
+        match = ODDS_TARGET_REGEX.search(expression)
+        if match:
+            target = float(match.group(1))
+            expression = expression[:match.start()]
+
+        # Sheet keywords work like in roll, for the caller's linked character
+        label = None
+        thing, advantage = dice.split_advantage(normalize_keyword(expression))
+        char_name = self.get_linked_character(ctx.guild.id, ctx.author.id) if ctx.guild is not None else None
+        if char_name:
+            data = await self.sheets.get(ctx.guild.id, char_name)
+            entry = self.roll_table(ctx.guild.id, char_name, data).get(thing) if data else None
+            if entry is not None:
+                expression = f"{entry.expression} {advantage}" if advantage else entry.expression
+                label = entry.label
+
+        try:
+            # Big keep/drop expressions take a moment; the results are memoized
+            compiled, dist = await asyncio.to_thread(dice.distribution, expression)
+        except ValueError as e:
+            await ctx.reply(str(e))
+            return
+
+        def num(x):
+            if math.isinf(x):
+                return "∞"  # exploding dice have no highest roll
+            return dice.clean_number(round(x, 2))
+
+        msg = f"**:bar_chart: Odds for `{compiled.root}`"
+        if label:
+            msg += f" (`{label}`)"
+        msg += "**"
+        msg += f"\nAverage **{num(dist.mean)}** · SD {num(dist.std)} · Range {num(dist.min)} to {num(dist.max)}"
+        msg += "\n-# Percentiles: " + " · ".join(f"{p}%: {num(dist.percentile(p))}" for p in (10, 25, 50, 75, 90))
+        if target is not None:
+            msg += f"\n# P(≥ {num(target)}): {dist.at_least(target) * 100:.2f}%"
+
+        await ctx.reply(msg)
+
+def _short(text: str, limit: int = 120) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
 async def setup(bot):
     await bot.add_cog(DndHelper(bot))
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Usage telemetry for model calls: tokens, latency, retries and outcomes.
+Calls are aggregated in memory per (guild, hour, model) and flushed to SQLite now and then,
+so recording a call is just a few additions.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+
+OUTCOMES = ("ok", "rate_limited", "error", "timeout")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    guild_id         INTEGER NOT NULL,
+    hour             INTEGER NOT NULL,
+    model            TEXT NOT NULL,
+    calls            INTEGER NOT NULL,
+    prompt_tokens    INTEGER NOT NULL,
+    response_tokens  INTEGER NOT NULL,
+    latency_ms_total INTEGER NOT NULL,
+    latency_ms_max   INTEGER NOT NULL,
+    retries          INTEGER NOT NULL,
+    ok               INTEGER NOT NULL,
+    rate_limited     INTEGER NOT NULL,
+    error            INTEGER NOT NULL,
+    timeout          INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, hour, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS usage_hour ON usage(hour);
+"""
+
+
+@dataclass
+class UsageBucket:
+    calls: int = 0
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+    latency_ms_total: int = 0
+    latency_ms_max: int = 0
+    retries: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    error: int = 0
+    timeout: int = 0
+
+    def merge(self, other: "UsageBucket"):
+        for f in fields(self):
+            if f.name == "latency_ms_max":
+                self.latency_ms_max = max(self.latency_ms_max, other.latency_ms_max)
+            else:
+                setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+COLUMNS = [f.name for f in fields(UsageBucket)]
+
+
+def hour_of(timestamp: float) -> int:
+    """Start of the hour (unix seconds) a timestamp falls in."""
+    return int(timestamp) // 3600 * 3600
+
+
+class UsageTelemetry:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        # (guild_id, hour, model) -> bucket, not flushed yet
+        self.pending: dict[tuple[int, int, str], UsageBucket] = {}
+
+    def record(self, guild_id: int | None, model: str, prompt_tokens: int, response_tokens: int,
+               latency: float, retries: int, outcome: str):
+        """Count one model call. `outcome` is one of OUTCOMES."""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        key = (guild_id or 0, hour_of(time.time()), model)
+        bucket = self.pending.get(key)
+        if bucket is None:
+            bucket = self.pending[key] = UsageBucket()
+
+        latency_ms = int(latency * 1000)
+        bucket.calls += 1
+        bucket.prompt_tokens += prompt_tokens
+        bucket.response_tokens += response_tokens
+        bucket.latency_ms_total += latency_ms
+        bucket.latency_ms_max = max(bucket.latency_ms_max, latency_ms)
+        bucket.retries += retries
+        setattr(bucket, outcome, getattr(bucket, outcome) + 1)
+
+    def _write(self, pending: dict):
+        placeholders = ", ".join("?" for _ in range(3 + len(COLUMNS)))
+        updates = ", ".join(
+            f"{c} = max({c}, excluded.{c})" if c == "latency_ms_max" else f"{c} = {c} + excluded.{c}"
+            for c in COLUMNS
+        )
+        rows = [
+            (guild_id, hour, model, *(getattr(bucket, c) for c in COLUMNS))
+            for (guild_id, hour, model), bucket in pending.items()
+        ]
+        with self._db_lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO usage (guild_id, hour, model, {', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (guild_id, hour, model) DO UPDATE SET {updates}",
+                rows,
+            )
+
+    def flush_sync(self):
+        pending, self.pending = self.pending, {}
+        if pending:
+            self._write(pending)
+
+    async def flush(self):
+        """Write the in-memory aggregates to disk (in a worker thread)."""
+        pending, self.pending = self.pending, {}
+        if pending:
+            await asyncio.to_thread(self._write, pending)
+
+    def _query(self, since_hour: int, guild_id: int | None) -> list[tuple]:
+        sql = f"SELECT guild_id, hour, model, {', '.join(COLUMNS)} FROM usage WHERE hour >= ?"
+        args: list = [since_hour]
+        if guild_id is not None:
+            sql += " AND guild_id = ?"
+            args.append(guild_id)
+        with self._db_lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    async def usage(self, since: float, guild_id: int | None = None) -> dict[tuple[int, int, str], UsageBucket]:
+        """All aggregates since `since` (flushed and pending), keyed by (guild_id, hour, model)."""
+        since_hour = hour_of(since)
+        result: dict[tuple[int, int, str], UsageBucket] = {}
+        for row in await asyncio.to_thread(self._query, since_hour, guild_id):
+            result[row[:3]] = UsageBucket(*row[3:])
+        for key, bucket in list(self.pending.items()):
+            if key[1] < since_hour or (guild_id is not None and key[0] != guild_id):
+                continue
+            result.setdefault(key, UsageBucket()).merge(bucket)
+        return result
+
+    def close(self):
+        self.flush_sync()
+        with self._db_lock:
+            self._conn.close()
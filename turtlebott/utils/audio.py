@@ -0,0 +1,237 @@
+"""
+Audio plumbing for voice features: a preallocated PCM ring buffer and a streaming
+polyphase resampler that also mixes channels.
+
+Both are built to do no allocations per frame once warmed up: the ring copies into one
+bytearray allocated up front and hands out memoryview slices of it, and the resampler
+works in preallocated NumPy buffers and returns a view of its output buffer.
+PCM is always signed 16-bit little-endian, interleaved when there are two channels.
+See tools/bench_audio.py for per-frame cost and allocation numbers.
+"""
+
+import threading
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class AudioRing:
+    """
+    Fixed-size byte ring buffer for PCM. Safe for one producer thread and one consumer
+    thread (e.g. the voice receive thread and the event loop).
+    With overwrite=True a full ring drops its oldest audio instead of refusing new audio,
+    which is what you want for a microphone: stale audio is worth less than fresh audio.
+    on_data, if given, is called from the writer's thread whenever the ring goes from
+    empty to not empty, so a consumer can sleep until there's something to read.
+    """
+
+    def __init__(self, capacity: int, overwrite: bool = False, on_data=None):
+        self.capacity = capacity
+        self.overwrite = overwrite
+        self.on_data = on_data
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._read = 0   # absolute byte counters; position in the buffer is counter % capacity
+        self._write = 0
+        self._lock = threading.Lock()
+        self.dropped = 0  # bytes thrown away by overwrite
+
+    @property
+    def available(self) -> int:
+        """Bytes waiting to be read."""
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        return self.capacity - (self._write - self._read)
+
+    def write(self, data) -> int:
+        """Copy bytes in. Returns how many were written (less than len(data) only when full and not overwriting)."""
+        src = memoryview(data).cast("B")
+        n = len(src)
+        with self._lock:
+            was_empty = self._write == self._read
+            free = self.capacity - (self._write - self._read)
+            if n > free:
+                if self.overwrite:
+                    if n > self.capacity:  # only the newest `capacity` bytes can survive anyway
+                        self.dropped += n - self.capacity
+                        src = src[n - self.capacity:]
+                        n = self.capacity
+                    lost = n - (self.capacity - (self._write - self._read))
+                    if lost > 0:
+                        self._read += lost
+                        self.dropped += lost
+                else:
+                    n = free
+            start = self._write % self.capacity
+            first = min(n, self.capacity - start)
+            self._view[start:start + first] = src[:first]
+            if n > first:
+                self._view[:n - first] = src[first:n]
+            self._write += n
+            if was_empty and n and self.on_data is not None:
+                self.on_data()
+        return n
+
+    def peek(self, n: int) -> memoryview:
+        """
+        A read-only view of up to n of the oldest bytes, without consuming them.
+        Shorter than n when the data wraps around the end of the buffer; call consume()
+        and peek() again for the rest. The view is into the ring itself, so with overwrite=True
+        the writer can change it while it's being read: use read() there.
+        """
+        with self._lock:
+            start = self._read % self.capacity
+            n = min(n, self._write - self._read, self.capacity - start)
+            return self._view[start:start + n].toreadonly()
+
+    def consume(self, n: int):
+        with self._lock:
+            self._read += min(n, self._write - self._read)
+
+    def read(self, n: int) -> bytes:
+        """Copy out and consume up to n of the oldest bytes in one step, under the lock."""
+        with self._lock:
+            n = min(n, self._write - self._read)
+            start = self._read % self.capacity
+            first = min(n, self.capacity - start)
+            if n > first:
+                data = b"".join((self._view[start:], self._view[:n - first]))
+            else:
+                data = bytes(self._view[start:start + n])
+            self._read += n
+        return data
+
+    def read_into(self, out) -> int:
+        """Copy up to len(out) of the oldest bytes into out (a writable buffer). Returns the count."""
+        dst = memoryview(out).cast("B")
+        with self._lock:
+            n = min(len(dst), self._write - self._read)
+            start = self._read % self.capacity
+            first = min(n, self.capacity - start)
+            dst[:first] = self._view[start:start + first]
+            if n > first:
+                dst[first:n] = self._view[:n - first]
+            self._read += n
+        return n
+
+    def clear(self):
+        with self._lock:
+            self._read = self._write
+
+
+def _lowpass(taps: int, cutoff: float, gain: float) -> np.ndarray:
+    """Kaiser-windowed sinc. cutoff is in cycles per sample (0.5 = Nyquist)."""
+    t = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(taps, 8.0)
+    return h * (gain / h.sum())
+
+
+class Resampler:
+    """
+    Streaming rational resampler (polyphase FIR) with channel mixing, for 16-bit PCM.
+
+    Converts in_rate/in_channels to out_rate/out_channels, e.g. Discord's 48kHz stereo to
+    16kHz mono. Stereo input is averaged to mono before filtering and mono output is
+    duplicated to both channels. Filter state carries over between calls, so feeding a
+    stream in arbitrary chunk sizes gives the same result as feeding it all at once.
+
+    process() returns a view of an internal buffer that's only valid until the next call.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, in_channels: int = 1, out_channels: int = 1,
+                 max_frames: int = 4800, zero_crossings: int = 8):
+        if in_channels not in (1, 2) or out_channels not in (1, 2):
+            raise ValueError("Only mono and stereo are supported")
+        g = gcd(in_rate, out_rate)
+        self.up = out_rate // g      # L
+        self.down = in_rate // g     # M
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        self.max_frames = max_frames  # most input frames (samples per channel) per process() call
+
+        # Filter at the upsampled rate, `zero_crossings` sinc lobes each side of the cutoff,
+        # split into `up` phases of `taps` coefficients each (taps = input samples per output).
+        # Phases are stored reversed so each output is a dot product with a forward window.
+        # The 1/in_channels mixing gain is folded in, so stereo is just summed.
+        self.taps = -(-2 * zero_crossings * max(self.up, self.down) // self.up)
+        cutoff = 0.45 / max(self.up, self.down)
+        h = _lowpass(self.up * self.taps, cutoff, self.up / in_channels)
+        self._phases = np.ascontiguousarray(h.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+
+        # [taps - 1 samples of history | up to max_frames new samples]
+        self._history = self.taps - 1
+        self._x = np.zeros(self._history + max_frames, dtype=np.float32)
+        self._windows = sliding_window_view(self._x, self.taps)  # row i = _x[i:i + taps], no copy
+        max_out = -(-max_frames * self.up // self.down) + 1
+        self._y = np.zeros(max_out, dtype=np.float32)
+        # One phase's windows copied out contiguously, and its outputs. BLAS can't take the
+        # overlapping window view directly, and numpy would otherwise copy it on every call.
+        max_rows = -(-max_out // self.up)
+        self._matrix = np.zeros((max_rows, self.taps), dtype=np.float32)
+        self._rows = np.zeros(max_rows, dtype=np.float32)
+        self._out = np.zeros(max_out * out_channels, dtype=np.int16)
+        self._out_bytes = memoryview(self._out).cast("B")
+        self._next = 0  # upsampled-rate position of the next output, relative to the first new input
+        self._count = 0  # outputs produced by the last call
+
+    def reset(self):
+        self._x[:] = 0
+        self._next = 0
+        self._count = 0
+
+    def process(self, pcm) -> memoryview:
+        """Resample a chunk of PCM (bytes-like). Returns the converted PCM as a byte view."""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        n = len(samples) // self.in_channels
+        if n > self.max_frames:
+            raise ValueError(f"Chunk of {n} frames is bigger than max_frames={self.max_frames}")
+
+        x = self._x[self._history:self._history + n]
+        if self.in_channels == 2:
+            np.add(samples[0::2], samples[1::2], out=x, dtype=np.float32)
+        else:
+            x[:] = samples
+
+        # Output j sits at upsampled time t = next + j*M, i.e. input index t // L with
+        # filter phase t % L. Outputs L apart share a phase and step M inputs, so each
+        # residue class mod L is one strided-window matrix-vector product.
+        up, down = self.up, self.down
+        span = n * up - self._next
+        count = max(0, -(-span // down))
+        y = self._y[:count]
+        for r in range(min(up, count)):
+            t = self._next + r * down
+            rows = (count - r + up - 1) // up
+            start = t // up
+            matrix = self._matrix[:rows]
+            np.copyto(matrix, self._windows[start:start + rows * down:down])
+            if up == 1:
+                np.dot(matrix, self._phases[0], out=y)
+            else:
+                np.dot(matrix, self._phases[t % up], out=self._rows[:rows])
+                y[r::up] = self._rows[:rows]
+        self._next += count * down - n * up
+
+        # Keep the last taps-1 inputs as history for the next chunk
+        self._x[:self._history] = self._x[n:n + self._history]
+        self._count = count
+
+        np.rint(y, out=y)
+        np.clip(y, -32768, 32767, out=y)
+        out = self._out[:count * self.out_channels]
+        if self.out_channels == 2:
+            out[0::2] = y
+            out[1::2] = y
+        else:
+            out[:] = y
+        return self._out_bytes[:count * self.out_channels * 2]
+
+    def rms(self) -> float:
+        """Loudness of the last process() output, on the int16 scale."""
+        if not self._count:
+            return 0.0
+        y = self._y[:self._count]
+        return float(np.sqrt(np.dot(y, y) / self._count))
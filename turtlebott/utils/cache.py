@@ -0,0 +1,74 @@
+"""Small in-memory caches shared by modules."""
+
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """A bounded dict that evicts the least recently used entry once full."""
+
+    def __init__(self, maxsize: int = 128, on_evict=None):
+        self.maxsize = max(1, maxsize)
+        self.on_evict = on_evict  # called as on_evict(key, value) when something falls out
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            old_key, old_value = self._data.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def peek(self, key, default=None):
+        """Like get(), but doesn't count as a use."""
+        return self._data.get(key, default)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TTLCache(LRUCache):
+    """An LRUCache whose entries also expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.pop(key)
+            return default
+        return value
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
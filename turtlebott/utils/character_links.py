@@ -0,0 +1,158 @@
+"""
+Which Discord user plays which character, per guild.
+
+Links are held in memory both ways (user -> character and character -> user), so lookups
+and the "already linked?" check are dict hits. Changes are written behind: link() only
+updates memory and schedules a save a moment later, so a burst of links becomes one write.
+Saves replace the file atomically (temp file, fsync, rename), so a crash mid-write leaves
+the old file intact instead of a truncated one.
+
+File format (unchanged from the original char_link.json):
+    {"<guild id>": {"<user id>": "<character name>", ...}, ...}
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+from .files import write_json_atomic
+from .logger import setup_logger
+
+logger = setup_logger("character_links")
+
+
+class CharacterLinkStore:
+    def __init__(self, path: str, save_delay: float = 2.0):
+        self.path = path
+        self.save_delay = save_delay
+        self._by_user: dict[int, dict[int, str]] = {}       # guild -> user -> character
+        self._by_character: dict[int, dict[str, int]] = {}  # guild -> character -> user
+        self._dirty = False
+        self._dirty_guilds: set[int] = set()  # for stores that save per guild
+        self._version = 0  # bumped on every change; lets a late, stale write know to back off
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+        self._save_task: asyncio.Task | None = None
+
+    # --- loading ---
+
+    def _read(self) -> dict:
+        """Everything on disk, as {guild id: {user id: character}}."""
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            # Keep the broken file around rather than overwriting it with nothing on the next save
+            logger.exception(f"{self.path} is corrupt, moving it aside and starting empty")
+            os.replace(self.path, f"{self.path}.corrupt")
+            return {}
+        return {int(guild_id): {int(user_id): char for user_id, char in links.items()} for guild_id, links in raw.items()}
+
+    def load_sync(self):
+        self._by_user.clear()
+        self._by_character.clear()
+        for guild_id, links in self._read().items():
+            for user_id, character in links.items():
+                self._set(guild_id, user_id, character)
+        logger.info(f"Loaded {sum(map(len, self._by_user.values()))} character links")
+
+    async def load(self):
+        await asyncio.to_thread(self.load_sync)
+
+    # --- lookups ---
+
+    def get(self, guild_id: int, user_id: int) -> str | None:
+        """The character a user is linked to, or None."""
+        return self._by_user.get(guild_id, {}).get(user_id)
+
+    def owner(self, guild_id: int, character: str) -> int | None:
+        """The user a character is linked to, or None."""
+        return self._by_character.get(guild_id, {}).get(character)
+
+    def links(self, guild_id: int) -> dict[int, str]:
+        """All user -> character links in a guild (a copy)."""
+        return dict(self._by_user.get(guild_id, {}))
+
+    # --- changes ---
+
+    def _set(self, guild_id: int, user_id: int, character: str):
+        by_user = self._by_user.setdefault(guild_id, {})
+        by_character = self._by_character.setdefault(guild_id, {})
+
+        # One character per user and one user per character: drop whatever this replaces
+        old_character = by_user.get(user_id)
+        if old_character is not None and by_character.get(old_character) == user_id:
+            del by_character[old_character]
+        old_owner = by_character.get(character)
+        if old_owner is not None and old_owner != user_id:
+            del by_user[old_owner]
+
+        by_user[user_id] = character
+        by_character[character] = user_id
+
+    def link(self, guild_id: int, user_id: int, character: str):
+        """Link a user to a character, replacing the user's old link and the character's old owner."""
+        self._set(guild_id, user_id, character)
+        self._schedule_save(guild_id)
+
+    def unlink(self, guild_id: int, user_id: int) -> str | None:
+        character = self._by_user.get(guild_id, {}).pop(user_id, None)
+        if character is not None:
+            self._by_character[guild_id].pop(character, None)
+            self._schedule_save(guild_id)
+        return character
+
+    # --- persistence ---
+
+    def _snapshot(self) -> dict:
+        """What _write() needs to persist the current state; the whole file here."""
+        return {
+            str(guild_id): {str(user_id): character for user_id, character in links.items()}
+            for guild_id, links in self._by_user.items()
+            if links
+        }
+
+    def _write(self, snapshot: dict, version: int):
+        with self._write_lock:
+            if version <= self._written_version:
+                return  # something newer already made it to disk
+            write_json_atomic(self.path, snapshot)
+            self._written_version = version
+
+    def _schedule_save(self, guild_id: int):
+        self._dirty = True
+        self._dirty_guilds.add(guild_id)
+        self._version += 1
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.save_delay)
+        await self.flush()
+
+    async def flush(self):
+        """Write pending changes now (in a worker thread)."""
+        while self._dirty:
+            self._dirty = False
+            snapshot = self._snapshot()  # taken on the loop, so it's consistent
+            guilds, self._dirty_guilds = self._dirty_guilds, set()
+            try:
+                await asyncio.to_thread(self._write, snapshot, self._version)
+            except Exception:
+                self._dirty = True
+                self._dirty_guilds |= guilds
+                logger.exception(f"Failed to save character links to {self.path}")
+                return
+
+    def flush_sync(self):
+        """Write pending changes now, blocking. For shutdown, when the loop may be going away."""
+        if self._save_task is not None:
+            self._save_task.cancel()
+        if self._dirty:
+            self._dirty = False
+            snapshot = self._snapshot()
+            self._dirty_guilds.clear()
+            self._write(snapshot, self._version)
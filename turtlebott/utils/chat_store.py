@@ -0,0 +1,124 @@
+"""
+SQLite persistence for chatbot conversations.
+The store only deals in plain rows/JSON; the chatbot module does the (de)serializing. A row's
+`data` can also be a function returning the JSON, which is then called in the worker thread.
+All public methods are async and run the actual sqlite work in a thread.
+"""
+
+from .logger import setup_logger
+from .sqlite_store import SqliteStore
+
+logger = setup_logger("chat_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    root_id       INTEGER PRIMARY KEY,
+    channel_id    INTEGER NOT NULL,
+    guild_id      INTEGER,
+    latest_id     INTEGER NOT NULL,
+    last_activity REAL NOT NULL,
+    data          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_activity ON conversations(last_activity);
+
+CREATE TABLE IF NOT EXISTS messages (
+    message_id INTEGER PRIMARY KEY,
+    root_id    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_root ON messages(root_id);
+
+CREATE TABLE IF NOT EXISTS context_channels (
+    channel_id INTEGER PRIMARY KEY
+);
+"""
+
+
+class ConversationStore(SqliteStore):
+    def __init__(self, path: str):
+        super().__init__(path, SCHEMA)
+
+    # --- sync implementations (run in a worker thread) ---
+
+    def _save(self, row: dict, message_ids: list[int]):
+        data = row["data"]() if callable(row["data"]) else row["data"]
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?, ?)",
+                (row["root_id"], row["channel_id"], row["guild_id"], row["latest_id"], row["last_activity"], data),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO messages VALUES (?, ?)",
+                [(mid, row["root_id"]) for mid in message_ids],
+            )
+
+    def _load(self, root_id: int) -> dict | None:
+        cur = self._conn.execute(
+            "SELECT root_id, channel_id, guild_id, latest_id, last_activity, data FROM conversations WHERE root_id = ?",
+            (root_id,),
+        )
+        found = cur.fetchone()
+        if not found:
+            return None
+        row = dict(zip(("root_id", "channel_id", "guild_id", "latest_id", "last_activity", "data"), found))
+        row["message_ids"] = [
+            mid for (mid,) in self._conn.execute("SELECT message_id FROM messages WHERE root_id = ?", (root_id,))
+        ]
+        return row
+
+    def _root_for_message(self, message_id: int) -> int | None:
+        found = self._conn.execute("SELECT root_id FROM messages WHERE message_id = ?", (message_id,)).fetchone()
+        return found[0] if found else None
+
+    def _delete(self, root_id: int):
+        with self._conn:
+            self._conn.execute("DELETE FROM conversations WHERE root_id = ?", (root_id,))
+            self._conn.execute("DELETE FROM messages WHERE root_id = ?", (root_id,))
+
+    def _purge_older_than(self, cutoff: float) -> int:
+        with self._conn:
+            roots = [r for (r,) in self._conn.execute(
+                "SELECT root_id FROM conversations WHERE last_activity < ?", (cutoff,)
+            )]
+            self._conn.executemany("DELETE FROM messages WHERE root_id = ?", [(r,) for r in roots])
+            self._conn.execute("DELETE FROM conversations WHERE last_activity < ?", (cutoff,))
+        return len(roots)
+
+    def _set_channel_context(self, channel_id: int, enabled: bool):
+        with self._conn:
+            if enabled:
+                self._conn.execute("INSERT OR IGNORE INTO context_channels VALUES (?)", (channel_id,))
+            else:
+                self._conn.execute("DELETE FROM context_channels WHERE channel_id = ?", (channel_id,))
+
+    def _context_channels(self) -> set[int]:
+        return {cid for (cid,) in self._conn.execute("SELECT channel_id FROM context_channels")}
+
+    # --- async API ---
+
+    async def save(self, row: dict, message_ids: list[int]):
+        """Insert/replace a conversation row and register its message ids."""
+        await self._run(self._save, row, message_ids)
+
+    async def load(self, root_id: int) -> dict | None:
+        return await self._run(self._load, root_id)
+
+    async def root_for_message(self, message_id: int) -> int | None:
+        return await self._run(self._root_for_message, message_id)
+
+    async def delete(self, root_id: int):
+        await self._run(self._delete, root_id)
+
+    async def purge_older_than(self, cutoff: float) -> int:
+        """Drop every conversation idle since before `cutoff`. Returns how many went."""
+        return await self._run(self._purge_older_than, cutoff)
+
+    async def set_channel_context(self, channel_id: int, enabled: bool):
+        """Opt a channel in/out of channel-context mode."""
+        await self._run(self._set_channel_context, channel_id, enabled)
+
+    async def context_channels(self) -> set[int]:
+        return await self._run(self._context_channels)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
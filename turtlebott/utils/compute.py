@@ -0,0 +1,220 @@
+"""
+Bot-wide process pool for CPU-heavy work (PDF parsing, image processing), so it never runs on the
+event loop and one big job can't delay everyone's `ping`.
+
+Jobs wait in a priority queue here rather than in the pool's own FIFO: at most `workers` jobs are
+handed to the pool at a time, and the next one is always the most urgent (then the oldest).
+
+    result = await bot.compute.submit(convert_bytes, pdf, priority=Priority.HIGH, timeout=60)
+
+Timeouts and cancellation (cancelling the awaiting task) drop a job that is still queued. A job a
+worker already started can't be interrupted: its result is thrown away and the worker moves on
+once it's done. Functions and arguments must be picklable (module-level functions, plain data).
+"""
+
+import asyncio
+import heapq
+import itertools
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import IntEnum
+
+from .logger import setup_logger
+from .stats import percentile
+
+logger = setup_logger("compute")
+
+
+class Priority(IntEnum):
+    HIGH = 0    # someone is waiting on it (newchar)
+    NORMAL = 1
+    LOW = 2     # batch work (uchars over a whole guild)
+
+
+class ComputeBusy(Exception):
+    """Raised by submit() when too many jobs are already queued."""
+
+
+def _timed_call(fn, args, kwargs):
+    """Runs in the worker: the result plus the CPU time it took."""
+    started = time.process_time()
+    result = fn(*args, **kwargs)
+    return result, time.process_time() - started
+
+
+class _Job:
+    __slots__ = ("name", "fn", "args", "kwargs", "future", "submitted")
+
+    def __init__(self, name, fn, args, kwargs, future):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.submitted = time.monotonic()
+
+
+class _JobStats:
+    __slots__ = ("completed", "failed", "timed_out", "cancelled", "cpu_seconds", "run_seconds", "max_run_seconds")
+
+    def __init__(self):
+        self.completed = self.failed = self.timed_out = self.cancelled = 0
+        self.cpu_seconds = self.run_seconds = self.max_run_seconds = 0.0
+
+
+class ComputeService:
+    def __init__(self, workers: int | None = None, max_queued: int = 100, default_timeout: float | None = 120.0):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_queued = max_queued
+        self.default_timeout = default_timeout
+
+        self._pool: ProcessPoolExecutor | None = None
+        self._queue: list[tuple[int, int, _Job]] = []  # heap of (priority, seq, job)
+        self._seq = itertools.count()
+        self._running = 0
+        self._closed = False
+
+        # Metrics
+        self.started_at = time.monotonic()
+        self.submitted = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self._jobs: dict[str, _JobStats] = {}
+        self._waits: deque[float] = deque(maxlen=1000)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, job in self._queue if not job.future.done())
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the bot process has threads (sqlite, to_thread workers) a fork would copy mid-flight
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started compute pool with {self.workers} workers")
+        return self._pool
+
+    def _stats(self, name: str) -> _JobStats:
+        stats = self._jobs.get(name)
+        if stats is None:
+            stats = self._jobs[name] = _JobStats()
+        return stats
+
+    def _pump(self):
+        """Hand queued jobs to the pool while there are free workers."""
+        while self._running < self.workers and self._queue:
+            _, _, job = heapq.heappop(self._queue)
+            if job.future.done():  # timed out or cancelled while queued
+                continue
+            self._waits.append(time.monotonic() - job.submitted)
+            self._running += 1
+            started = time.monotonic()
+            pool = self._get_pool()
+            try:
+                pool_future = pool.submit(_timed_call, job.fn, job.args, job.kwargs)
+            except BrokenProcessPool:
+                self._restart_pool(pool)
+                pool = self._get_pool()
+                pool_future = pool.submit(_timed_call, job.fn, job.args, job.kwargs)
+            asyncio.wrap_future(pool_future).add_done_callback(
+                lambda done, job=job, started=started, pool=pool: self._finished(job, started, pool, done)
+            )
+
+    def _finished(self, job: _Job, started: float, pool: ProcessPoolExecutor, done: asyncio.Future):
+        self._running -= 1
+        stats = self._stats(job.name)
+        elapsed = time.monotonic() - started
+        stats.run_seconds += elapsed
+        stats.max_run_seconds = max(stats.max_run_seconds, elapsed)
+
+        if done.cancelled():  # the pool was shut down under it
+            stats.cancelled += 1
+            job.future.cancel()
+        elif (error := done.exception()) is None:
+            result, cpu = done.result()
+            stats.cpu_seconds += cpu
+            stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        else:
+            stats.failed += 1
+            if isinstance(error, BrokenProcessPool):
+                self._restart_pool(pool)
+            if not job.future.done():
+                job.future.set_exception(error)
+        if not self._closed:
+            self._pump()
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """
+        A worker died (killed, out of memory): the pool is unusable, so start a new one. Every job
+        that was in the broken pool fails and lands here; only the first one does anything.
+        """
+        if self._pool is broken:
+            logger.warning("Compute pool broke, starting a new one")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.pool_restarts += 1
+
+    async def submit(self, fn, *args, priority: Priority = Priority.NORMAL, timeout: float | None = None,
+                     name: str | None = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) in a worker process and return its result. `timeout` (seconds,
+        queueing included) defaults to the service's default_timeout; None there means no limit.
+        """
+        if self._closed:
+            raise RuntimeError("Compute service is shut down")
+        if self.queued >= self.max_queued:
+            self.rejected += 1
+            raise ComputeBusy(f"{self.max_queued} jobs are already waiting")
+
+        name = name or getattr(fn, "__name__", "job")
+        job = _Job(name, fn, args, kwargs, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (int(priority), next(self._seq), job))
+        self.submitted += 1
+        self._pump()
+
+        timeout = self.default_timeout if timeout is None else timeout
+        try:
+            # shield: a timeout/cancel must not cancel job.future under _finished's feet; we do it ourselves
+            return await asyncio.wait_for(asyncio.shield(job.future), timeout)
+        except asyncio.TimeoutError:
+            self._stats(name).timed_out += 1
+            job.future.cancel()
+            raise
+        except asyncio.CancelledError:
+            self._stats(name).cancelled += 1
+            job.future.cancel()
+            raise
+
+    def stats(self) -> dict:
+        waits = list(self._waits)
+        cpu = sum(s.cpu_seconds for s in self._jobs.values())
+        return {
+            "workers": self.workers,
+            "pool_started": self._pool is not None,
+            "queued": self.queued,
+            "running": self._running,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "pool_restarts": self.pool_restarts,
+            "cpu_seconds": cpu,
+            # share of the workers' capacity spent computing since the service started
+            "utilization": cpu / max(1e-9, (time.monotonic() - self.started_at) * self.workers),
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": percentile(waits, 0.95),
+            "jobs": {name: dict((slot, getattr(s, slot)) for slot in _JobStats.__slots__) for name, s in self._jobs.items()},
+        }
+
+    def shutdown(self):
+        """Stop the workers. Queued jobs are cancelled; running ones are abandoned."""
+        self._closed = True
+        for _, _, job in self._queue:
+            job.future.cancel()
+        self._queue.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
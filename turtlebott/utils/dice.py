@@ -1,24 +1,62 @@
+"""
+Dice expressions: parsing and rolling.
+
+Syntax, case-insensitive:
+    2d6+1d4+3, (1d8+2)*2, d20, d%       terms with + - * / and parentheses
+    4d6kh3, 4d6k3, 2d20kl1, 4d6dl1      keep highest / lowest, drop lowest / highest
+    1d6!                                exploding: every max roll adds another die
+    2d6r1, 2d6r<3, 1d20ro1              reroll matching dice (r: until they don't match, ro: once)
+    1d20+5 adv, 1d20 dis                advantage / disadvantage: the d20s (or else the first dice
+                                        term) are rolled twice and the better / worse result kept
+    ... for <reason>                    a label for the roll
+
+Expressions are compiled to a small AST once and cached per string, so rolling the same
+expression again only walks the tree. Large dice counts are rolled in one NumPy call. Hard limits
+on length, nesting, dice count and sides keep something like 1000000d6 from stalling the loop.
+
+distribution() works out the exact odds of an expression instead of rolling it (see t.odds).
+"""
+
+import math
+import operator
 import random
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from typing import Optional, List
 
+import numpy as np
 
-dice_regex = re.compile(
-    r'(?:(\d*)d(\d+))([+-]\d+(?:\.\d+)?)?(?:\s+for\s+(.+))?',
-    re.IGNORECASE
-)
+MAX_LENGTH = 300       # characters in an expression
+MAX_DEPTH = 16         # nested parentheses / signs
+MAX_TERMS = 64         # dice terms in an expression
+MAX_DICE = 10_000      # dice rolled in one expression, explosions and rerolls included
+MAX_SIDES = 1_000_000
+MAX_CHAIN = 100        # explosions / rerolls of any one die
+BULK_THRESHOLD = 32    # roll this many dice or more through numpy
+SHOWN_ROLLS = 50       # dice listed per term in the breakdown
+
+_COMPARE = {"<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge, "=": operator.eq}
+ADVANTAGE_WORDS = {"adv": "adv", "advantage": "adv", "dis": "dis", "disadvantage": "dis"}
+
+_rng = np.random.default_rng()
+
+_reason_regex = re.compile(r"\s+for\s+(.+)$", re.IGNORECASE | re.DOTALL)
+_advantage_regex = re.compile(r"(?:\s+|^)(?:(?:at|with)\s+)?(adv|advantage|dis|disadvantage)$", re.IGNORECASE)
+_token_regex = re.compile(r"\s*(?:(\d+(?:\.\d+)?)|([a-z]+)|(<=|>=|[-+*/()<>=!%]))", re.IGNORECASE)
 
 
 @dataclass
 class DiceResult:
-    count: int
-    size: int
-    rolls: List[int]
-    modifier: float
+    count: int             # dice rolled, over all terms
+    size: int              # sides of the first dice term
+    rolls: List[int]       # dice that counted, over all terms
+    modifier: float        # flat bonus added outside the dice
     total: float
     reason: Optional[str]
     expression: str
+    dice: str = ""         # the expression without the flat bonus, normalized: "4d6kh3 + 1d4"
+    breakdown: str = ""    # every die rolled, dropped ones struck through
 
 
 def roll_die(size: int) -> int:
@@ -26,7 +64,9 @@ def roll_die(size: int) -> int:
 
 
 def roll_dice(count: int, size: int) -> List[int]:
-    return [roll_die(size) for _ in range(count)]
+    if count >= BULK_THRESHOLD:
+        return _rng.integers(1, size + 1, count).tolist()
+    return random.choices(range(1, size + 1), k=count)
 
 def clean_number(n):
     if isinstance(n, float) and n.is_integer():
@@ -34,30 +74,688 @@ def clean_number(n):
     return n
 
 
-def parse_roll(expr: str) -> DiceResult:
-    expr = expr.strip()
-    match = dice_regex.fullmatch(expr)
+# --- AST ---
 
-    if not match:
+class _Roll:
+    """State of one roll of an expression."""
+
+    def __init__(self):
+        self.budget = MAX_DICE
+        self.count = 0
+        self.rolls: List[int] = []
+        self.parts: List[tuple] = []  # (term, shown rolls)
+
+    def dice(self, count: int, size: int) -> List[int]:
+        self.budget -= count
+        if self.budget < 0:
+            raise ValueError(f"That's more than {MAX_DICE} dice")
+        self.count += count
+        return roll_dice(count, size)
+
+
+@dataclass(frozen=True, slots=True)
+class Number:
+    value: float
+
+    def roll(self, state: _Roll) -> float:
+        return self.value
+
+    def __str__(self):
+        return str(clean_number(self.value))
+
+
+@dataclass(frozen=True, slots=True)
+class Dice:
+    count: int
+    size: int
+    keep: Optional[tuple] = None     # ("kh" | "kl" | "dh" | "dl", n)
+    explode: bool = False
+    reroll: Optional[tuple] = None   # (op, value, once)
+
+    def matches_reroll(self, value: int) -> bool:
+        op, target, _ = self.reroll
+        return _COMPARE[op](value, target)
+
+    def rerolls_every_face(self) -> bool:
+        # Every comparison here is monotone in the face, so checking both ends is enough
+        return self.matches_reroll(1) and self.matches_reroll(self.size)
+
+    def roll_once(self, state: _Roll) -> tuple[List[int], set]:
+        """The dice rolled (explosions appended) and the indexes of the dropped ones."""
+        rolls = state.dice(self.count, self.size)
+
+        if self.reroll is not None:
+            once = self.reroll[2]
+            pending = [i for i, value in enumerate(rolls) if self.matches_reroll(value)]
+            for _ in range(1 if once else MAX_CHAIN):
+                if not pending:
+                    break
+                for i, value in zip(pending, state.dice(len(pending), self.size)):
+                    rolls[i] = value
+                pending = [i for i in pending if self.matches_reroll(rolls[i])]
+
+        if self.explode:
+            exploding = rolls.count(self.size)
+            for _ in range(MAX_CHAIN):
+                if not exploding:
+                    break
+                extra = state.dice(exploding, self.size)
+                rolls.extend(extra)
+                exploding = extra.count(self.size)
+
+        dropped = set()
+        if self.keep is not None:
+            kind, n = self.keep
+            order = sorted(range(len(rolls)), key=rolls.__getitem__)  # lowest first
+            if kind == "kh":
+                dropped = set(order[:max(len(rolls) - n, 0)])
+            elif kind == "kl":
+                dropped = set(order[n:])
+            elif kind == "dl":
+                dropped = set(order[:n])
+            else:
+                dropped = set(order[len(rolls) - n:]) if n else set()
+        return rolls, dropped
+
+    def roll(self, state: _Roll) -> float:
+        rolls, dropped = self.roll_once(state)
+        kept = [value for i, value in enumerate(rolls) if i not in dropped] if dropped else rolls
+        state.rolls.extend(kept)
+        state.parts.append((self, _show(rolls, dropped)))
+        return sum(kept)
+
+    def __str__(self):
+        text = f"{self.count}d{self.size}"
+        if self.reroll is not None:
+            op, target, once = self.reroll
+            text += f"{'ro' if once else 'r'}{'' if op == '=' else op}{target}"
+        if self.explode:
+            text += "!"
+        if self.keep is not None:
+            text += f"{self.keep[0]}{self.keep[1]}"
+        return text
+
+
+@dataclass(frozen=True, slots=True)
+class Best:
+    """Advantage / disadvantage: roll the term twice, keep the better / worse total."""
+    term: Dice
+    highest: bool
+
+    def roll(self, state: _Roll) -> float:
+        results = []
+        for _ in range(2):
+            rolls, dropped = self.term.roll_once(state)
+            results.append((sum(v for i, v in enumerate(rolls) if i not in dropped), rolls, dropped))
+        keep, other = sorted(results, key=lambda r: r[0], reverse=self.highest)
+        state.rolls.extend(v for i, v in enumerate(keep[1]) if i not in keep[2])
+        state.parts.append((self, f"{_show(keep[1], keep[2])} ~~{_show(other[1], other[2], strike=False)}~~"))
+        return keep[0]
+
+    def __str__(self):
+        return f"{self.term} ({'adv' if self.highest else 'dis'})"
+
+
+@dataclass(frozen=True, slots=True)
+class Negate:
+    operand: object
+
+    def roll(self, state: _Roll) -> float:
+        return -self.operand.roll(state)
+
+    def __str__(self):
+        return f"-{self.operand}"
+
+
+@dataclass(frozen=True, slots=True)
+class Group:
+    operand: object
+
+    def roll(self, state: _Roll) -> float:
+        return self.operand.roll(state)
+
+    def __str__(self):
+        return f"({self.operand})"
+
+
+@dataclass(frozen=True, slots=True)
+class BinOp:
+    op: str
+    left: object
+    right: object
+
+    def roll(self, state: _Roll) -> float:
+        left, right = self.left.roll(state), self.right.roll(state)
+        if self.op == "+":
+            return left + right
+        if self.op == "-":
+            return left - right
+        if self.op == "*":
+            return left * right
+        if right == 0:
+            raise ValueError("Division by zero")
+        return left / right
+
+    def __str__(self):
+        return f"{self.left} {self.op} {self.right}"
+
+
+def _show(rolls: List[int], dropped: set, strike: bool = True) -> str:
+    shown = [f"~~{v}~~" if strike and i in dropped else str(v) for i, v in enumerate(rolls[:SHOWN_ROLLS])]
+    if len(rolls) > SHOWN_ROLLS:
+        shown.append(f"… {len(rolls) - SHOWN_ROLLS} more")
+    return f"[{', '.join(shown)}]"
+
+
+# --- Parsing ---
+
+@dataclass(frozen=True, slots=True)
+class Expression:
+    root: object
+    dice_part: object            # root without the top-level flat bonus, or None
+    modifier: float              # the top-level flat bonus
+    first_size: int
+    terms: tuple                 # every Dice term, in order
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+        self.depth = 0
+        self.terms: List[Dice] = []
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        tokens, pos, text = [], 0, text.rstrip()
+        while pos < len(text):
+            match = _token_regex.match(text, pos)
+            if not match:
+                raise ValueError(f"Invalid dice syntax near `{text[pos:pos + 10]}`")
+            tokens.append(match.group(match.lastindex).lower())
+            pos = match.end()
+        return tokens
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> Optional[str]:
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def int(self) -> int:
+        token = self.take()
+        if token is None or not token.isdigit():
+            raise ValueError("Invalid dice syntax: expected a whole number")
+        return int(token)
+
+    def parse(self):
+        node = self.sum()
+        if self.peek() is not None:
+            raise ValueError(f"Invalid dice syntax near `{self.peek()}`")
+        return node
+
+    def sum(self):
+        node = self.product()
+        while self.peek() in ("+", "-"):
+            node = BinOp(self.take(), node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while self.peek() in ("*", "/"):
+            node = BinOp(self.take(), node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() in ("+", "-"):
+            sign = self.take()
+            operand = self.nested(self.unary)
+            return operand if sign == "+" else Negate(operand)
+        return self.atom()
+
+    def nested(self, parse):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ValueError("Expression is nested too deeply")
+        node = parse()
+        self.depth -= 1
+        return node
+
+    def atom(self):
+        token = self.peek()
+        if token == "(":
+            self.take()
+            node = self.nested(self.sum)
+            if self.take() != ")":
+                raise ValueError("Invalid dice syntax: missing `)`")
+            return Group(node)
+        if token == "d":
+            return self.dice(1)
+        if token is not None and token[0].isdigit():
+            self.take()
+            if self.peek() == "d":
+                if not token.isdigit():
+                    raise ValueError("Invalid dice syntax: dice counts are whole numbers")
+                return self.dice(int(token))
+            return Number(float(token))
         raise ValueError("Invalid dice syntax")
 
-    count = int(match.group(1) or 1)
-    size = int(match.group(2))
+    def dice(self, count: int) -> Dice:
+        self.take()  # "d"
+        if self.peek() == "%":
+            self.take()
+            size = 100
+        else:
+            size = self.int()
+        if count < 1 or size < 1:
+            raise ValueError("Dice need at least one die and one side")
+        if size > MAX_SIDES:
+            raise ValueError(f"Dice can have at most {MAX_SIDES} sides")
+
+        keep = reroll = None
+        explode = False
+        while True:
+            token = self.peek()
+            if token == "!" and not explode:
+                self.take()
+                if size == 1:
+                    raise ValueError("A d1 can't explode")
+                explode = True
+            elif token in ("k", "kh", "kl", "dh", "dl") and keep is None:
+                self.take()
+                n = self.int() if (self.peek() or "").isdigit() else 1
+                keep = ("kh" if token == "k" else token, n)
+            elif token in ("r", "ro") and reroll is None:
+                self.take()
+                op = self.take() if self.peek() in ("<", ">", "<=", ">=", "=") else "="
+                reroll = (op, self.int(), token == "ro")
+            else:
+                break
 
-    modifier_str = match.group(3)
-    modifier = float(modifier_str) if modifier_str else 0.0
+        term = Dice(count, size, keep, explode, reroll)
+        if reroll is not None and term.rerolls_every_face():
+            raise ValueError(f"`{term}` would reroll every result")
+        self.terms.append(term)
+        if len(self.terms) > MAX_TERMS:
+            raise ValueError(f"That's more than {MAX_TERMS} dice terms")
+        if sum(t.count for t in self.terms) > MAX_DICE:
+            raise ValueError(f"That's more than {MAX_DICE} dice")
+        return term
 
-    reason = match.group(4)
 
-    rolls = roll_dice(count, size)
-    total = sum(rolls) + modifier
+def split_advantage(text: str) -> tuple[str, Optional[str]]:
+    """'1d20+5 with advantage' -> ('1d20+5', 'adv'). Also used for sheet keywords ('stealth adv')."""
+    match = _advantage_regex.search(text)
+    if not match:
+        return text, None
+    return text[:match.start()].strip(), ADVANTAGE_WORDS[match.group(1).lower()]
+
+
+def _with_advantage(node, highest: bool, targets: set):
+    if isinstance(node, Dice):
+        return Best(node, highest) if id(node) in targets else node
+    if isinstance(node, BinOp):
+        return BinOp(node.op, _with_advantage(node.left, highest, targets), _with_advantage(node.right, highest, targets))
+    if isinstance(node, (Negate, Group)):
+        return type(node)(_with_advantage(node.operand, highest, targets))
+    return node
+
+
+def _split_modifier(node) -> tuple[object, float]:
+    """Peel flat numbers off the top-level sum: 1d20 + 5 - 1 -> (1d20, 4)."""
+    if isinstance(node, Number):
+        return None, node.value
+    if isinstance(node, BinOp) and node.op in ("+", "-"):
+        left, left_mod = _split_modifier(node.left)
+        sign = 1 if node.op == "+" else -1
+        if isinstance(node.right, Number):
+            return left, left_mod + sign * node.right.value
+        right = node.right if sign == 1 else Negate(node.right)
+        return (right if left is None else BinOp(node.op, left, node.right)), left_mod
+    return node, 0.0
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text: str) -> Expression:
+    """Parse a dice expression (without the `for` reason) into an Expression. Cached."""
+    if len(text) > MAX_LENGTH:
+        raise ValueError(f"Dice expressions are limited to {MAX_LENGTH} characters")
+    text, advantage = split_advantage(text.strip())
+    parser = _Parser(text or "1d20")
+    root = parser.parse()
+    if not parser.terms:
+        raise ValueError("Invalid dice syntax: nothing to roll")
+
+    if advantage is not None:
+        targets = [t for t in parser.terms if t.size == 20] or parser.terms[:1]
+        if 2 * sum(t.count for t in targets) + sum(t.count for t in parser.terms) > MAX_DICE:
+            raise ValueError(f"That's more than {MAX_DICE} dice")
+        root = _with_advantage(root, advantage == "adv", {id(t) for t in targets})
+
+    dice_part, modifier = _split_modifier(root)
+    return Expression(root, dice_part, modifier, parser.terms[0].size, tuple(parser.terms))
+
+
+def parse_roll(expr: str) -> DiceResult:
+    expr = expr.strip()
+    reason = None
+    match = _reason_regex.search(expr)
+    if match:
+        reason = match.group(1).strip()
+        text = expr[:match.start()]
+    else:
+        text = expr
+
+    compiled = compile_expression(text.strip())
+    state = _Roll()
+    total = compiled.root.roll(state)
+
+    parts = state.parts
+    if len(parts) == 1:
+        breakdown = parts[0][1]
+    else:
+        breakdown = ", ".join(f"{term} {shown}" for term, shown in parts)
 
     return DiceResult(
-        count=count,
-        size=size,
-        rolls=rolls,
-        modifier=modifier,
+        count=state.count,
+        size=compiled.first_size,
+        rolls=state.rolls,
+        modifier=compiled.modifier,
         total=total,
         reason=reason,
-        expression=expr
-    )
\ No newline at end of file
+        expression=expr,
+        dice=str(compiled.dice_part) if compiled.dice_part is not None else "",
+        breakdown=breakdown,
+    )
+
+
+# --- Odds ---
+#
+# Exact outcome distributions. A distribution is a probability vector over evenly spaced
+# outcomes offset, offset + step, ...; sums of independent terms are convolutions. Results are
+# memoized per AST node, and nodes compare equal when their normalized text does, so
+# "1D20 + 5" and "1d20+5" share one entry (as do repeated subterms).
+
+MAX_OUTCOMES = 2_000_000      # length of any intermediate distribution
+MAX_KEEP_WORK = 20_000        # faces * dice * dice for keep/drop (a Python loop, so kept small)
+FFT_THRESHOLD = 2_000         # convolve longer vectors through the FFT
+EXPLODE_CUTOFF = 1e-15        # stop following explosions once a chain is this unlikely
+
+
+@dataclass(frozen=True, eq=False)
+class Distribution:
+    offset: float
+    step: float
+    probs: np.ndarray
+    # Exact (lowest, highest) outcome, worked out from the expression: the far tails of a big
+    # sum are below float precision in `probs` (or FFT noise), so they can't tell the range.
+    bounds: Optional[tuple] = None
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.offset + self.step * np.arange(len(self.probs))
+
+    @property
+    def mean(self) -> float:
+        return float(self.values @ self.probs)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(max((self.values - self.mean) ** 2 @ self.probs, 0.0)))
+
+    @property
+    def min(self) -> float:
+        if self.bounds is not None:
+            return self.bounds[0]
+        return float(self.values[np.flatnonzero(self.probs > 0)[0]])
+
+    @property
+    def max(self) -> float:
+        """math.inf for exploding dice."""
+        if self.bounds is not None:
+            return self.bounds[1]
+        return float(self.values[np.flatnonzero(self.probs > 0)[-1]])
+
+    def percentile(self, p: float) -> float:
+        """Smallest outcome with at least p (0-100) percent of the results at or below it."""
+        index = np.searchsorted(np.cumsum(self.probs), p / 100 - 1e-12)
+        return float(self.values[min(index, len(self.probs) - 1)])
+
+    def at_least(self, target: float) -> float:
+        return float(self.probs[self.values >= target - 1e-9].sum())
+
+
+def _point(value: float) -> Distribution:
+    return Distribution(float(value), 1.0, np.ones(1))
+
+
+def _convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    size = len(a) + len(b) - 1
+    if size > MAX_OUTCOMES:
+        raise ValueError("Too many possible outcomes to work out the odds")
+    if min(len(a), len(b)) < 64 or size < FFT_THRESHOLD:
+        return np.convolve(a, b)
+    n = 1 << (size - 1).bit_length()
+    out = np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n)[:size]
+    return np.clip(out, 0.0, None)
+
+
+def _spread(dist: Distribution, step: float) -> np.ndarray:
+    """dist's probabilities laid out on a finer grid of `step`."""
+    if len(dist.probs) == 1 or dist.step == step:
+        return dist.probs
+    factor = round(dist.step / step)
+    out = np.zeros((len(dist.probs) - 1) * factor + 1)
+    out[::factor] = dist.probs
+    return out
+
+
+def _add(a: Distribution, b: Distribution) -> Distribution:
+    if len(a.probs) == 1 or len(b.probs) == 1 or a.step == b.step:
+        step = b.step if len(a.probs) == 1 else a.step
+    elif float(a.step).is_integer() and float(b.step).is_integer():
+        step = float(np.gcd(int(a.step), int(b.step)))
+    else:
+        raise ValueError("Can't work out the odds for that mix of fractions")
+    return Distribution(a.offset + b.offset, step, _convolve(_spread(a, step), _spread(b, step)))
+
+
+def _scale(dist: Distribution, factor: float) -> Distribution:
+    if factor == 0:
+        return _point(0)
+    if factor > 0:
+        return Distribution(dist.offset * factor, dist.step * factor, dist.probs)
+    last = dist.offset + dist.step * (len(dist.probs) - 1)
+    return Distribution(last * factor, dist.step * -factor, dist.probs[::-1])
+
+
+def _power(die: Distribution, count: int) -> Distribution:
+    """Sum of `count` independent copies, by repeated squaring."""
+    result, square = None, die
+    while count:
+        if count & 1:
+            result = square if result is None else _add(result, square)
+        count >>= 1
+        if count:
+            square = _add(square, square)
+    return result
+
+
+@lru_cache(maxsize=256)
+def _exploding_chain(size: int) -> np.ndarray:
+    """Probabilities (index = value) of a plain exploding d`size`."""
+    depth = int(np.ceil(-np.log(EXPLODE_CUTOFF) / np.log(size))) + 1
+    probs = np.zeros(size * depth + 1)
+    for k in range(depth):
+        probs[size * k + 1:size * (k + 1)] = size ** -(k + 1)
+    return probs / probs.sum()
+
+
+@lru_cache(maxsize=256)
+def _single_die(term: Dice) -> Distribution:
+    """One die of a term, rerolls and explosions included (keep/drop is done on the whole term)."""
+    faces = np.full(term.size, 1 / term.size)
+    if term.reroll is not None:
+        matching = term.matches_reroll(np.arange(1, term.size + 1))
+        if term.reroll[2]:  # once: a matching first roll is replaced by a plain roll
+            faces = np.where(matching, 0.0, faces) + matching.mean() / term.size
+        else:
+            faces = np.where(matching, 0.0, 1.0) / (~matching).sum()
+    if not term.explode:
+        return Distribution(1.0, 1.0, faces)
+
+    chain = _exploding_chain(term.size)
+    probs = np.zeros(term.size + len(chain) - 1)
+    probs[:term.size - 1] = faces[:-1]
+    probs[term.size:] += faces[-1] * chain[1:]
+    return Distribution(1.0, 1.0, probs)
+
+
+def _binomial(n: int, q: float, log_fact: np.ndarray) -> np.ndarray:
+    """P(c of n dice show the face) for c = 0..n. In log space: comb(n, c) overflows a float."""
+    if q <= 0.0 or q >= 1.0:
+        out = np.zeros(n + 1)
+        out[n if q >= 1.0 else 0] = 1.0
+        return out
+    c = np.arange(n + 1)
+    return np.exp(log_fact[n] - log_fact[c] - log_fact[n - c] + c * np.log(q) + (n - c) * np.log1p(-q))
+
+
+def _keep(die: Distribution, count: int, keep: int, highest: bool) -> Distribution:
+    """
+    Sum of the `keep` highest (or lowest) of `count` dice. Goes through the faces from the best
+    one down; for each, the number of the remaining dice showing it is binomial, conditioned on
+    none of them being better. The first `keep` dice met are the kept ones.
+    """
+    keep = max(0, min(keep, count))
+    values = die.values.astype(int)
+    support = np.flatnonzero(die.probs > 0)
+    if highest:
+        support = support[::-1]
+    if len(support) * (count + 1) ** 2 > MAX_KEEP_WORK:
+        raise ValueError("That keep/drop is too big to work out the odds for")
+
+    probs = die.probs[support]
+    remaining = np.cumsum(probs[::-1])[::-1]  # P(at this face or a worse one)
+    length = keep * int(values.max()) + 1
+    states = [np.zeros(length) for _ in range(count + 1)]  # dice placed -> kept-sum probabilities
+    states[0][0] = 1.0
+
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, count + 1)))))
+
+    for face, p, left in zip(values[support], probs, remaining):
+        q = min(p / left, 1.0)
+        new = [np.zeros(length) for _ in range(count + 1)]
+        for used, state in enumerate(states):
+            if not state.any():
+                continue
+            rest = count - used
+            for c, weight in enumerate(_binomial(rest, q, log_fact)):
+                if weight == 0.0:
+                    continue
+                shift = min(c, max(keep - used, 0)) * face
+                new[used + c][shift:] += weight * state[:length - shift]
+        states = new
+    return Distribution(0.0, 1.0, states[count])
+
+
+def _best(dist: Distribution, highest: bool) -> Distribution:
+    cdf = np.cumsum(dist.probs)
+    cdf = cdf ** 2 if highest else 1 - (1 - cdf) ** 2
+    return Distribution(dist.offset, dist.step, np.diff(cdf, prepend=0.0))
+
+
+@lru_cache(maxsize=512)
+def _distribution(node) -> Distribution:
+    if isinstance(node, Number):
+        return _point(node.value)
+    if isinstance(node, Dice):
+        die = _single_die(node)
+        if node.keep is None:
+            return _power(die, node.count)
+        if node.explode:
+            # Explosions are extra dice that keep/drop picks from too, which this can't model
+            raise ValueError("Odds for exploding dice with keep/drop aren't supported")
+        kind, n = node.keep
+        if kind in ("kh", "kl"):
+            return _keep(die, node.count, n, kind == "kh")
+        return _keep(die, node.count, node.count - n, kind == "dl")
+    if isinstance(node, Best):
+        return _best(_distribution(node.term), node.highest)
+    if isinstance(node, Group):
+        return _distribution(node.operand)
+    if isinstance(node, Negate):
+        return _scale(_distribution(node.operand), -1)
+    if isinstance(node, BinOp):
+        if node.op == "+":
+            return _add(_distribution(node.left), _distribution(node.right))
+        if node.op == "-":
+            return _add(_distribution(node.left), _scale(_distribution(node.right), -1))
+        left, right = _distribution(node.left), _distribution(node.right)
+        if node.op == "*" and len(left.probs) == 1:
+            return _scale(right, left.offset)
+        if len(right.probs) == 1:
+            if node.op == "*":
+                return _scale(left, right.offset)
+            if right.offset == 0:
+                raise ValueError("Division by zero")
+            return _scale(left, 1 / right.offset)
+        raise ValueError("Odds can only be worked out when dice are multiplied or divided by plain numbers")
+    raise ValueError("Invalid dice syntax")
+
+
+def _face_range(term: Dice) -> tuple[int, int]:
+    """Lowest and highest face a die of `term` can end up showing (rerolls are redone until they don't match)."""
+    if term.reroll is None or term.reroll[2]:
+        return 1, term.size
+    # Matching faces are a prefix, a suffix or a single face around the target, so the
+    # first face that doesn't match from either end is one of these
+    target = int(term.reroll[1])
+    near = {1, 2, term.size - 1, term.size, target - 1, target, target + 1}
+    faces = sorted(f for f in near if 1 <= f <= term.size and not term.matches_reroll(f))
+    return faces[0], faces[-1]
+
+
+def _product_bounds(a: tuple, b: tuple) -> tuple:
+    products = [x * y for x in a for y in b if not (x == 0 or y == 0)] or [0.0]
+    if any(x == 0 for x in a) or any(y == 0 for y in b):
+        products.append(0.0)
+    return min(products), max(products)
+
+
+@lru_cache(maxsize=512)
+def _bounds(node) -> tuple:
+    if isinstance(node, Number):
+        return float(node.value), float(node.value)
+    if isinstance(node, Dice):
+        kept = node.count
+        if node.keep is not None:
+            kind, n = node.keep
+            kept = min(n, node.count) if kind in ("kh", "kl") else max(node.count - n, 0)
+        low, high = _face_range(node)
+        return float(kept * low), math.inf if node.explode else float(kept * high)
+    if isinstance(node, (Best, Group)):
+        return _bounds(node.term if isinstance(node, Best) else node.operand)
+    if isinstance(node, Negate):
+        low, high = _bounds(node.operand)
+        return -high, -low
+    left, right = _bounds(node.left), _bounds(node.right)
+    if node.op == "+":
+        return left[0] + right[0], left[1] + right[1]
+    if node.op == "-":
+        return left[0] - right[1], left[1] - right[0]
+    if node.op == "*":
+        return _product_bounds(left, right)
+    return _product_bounds(left, (1 / right[0], 1 / right[1]))  # divided by a plain number
+
+
+def distribution(expr: str) -> tuple[Expression, Distribution]:
+    """The compiled expression (any `for` reason dropped) and its exact outcome distribution."""
+    expr = expr.strip()
+    match = _reason_regex.search(expr)
+    if match:
+        expr = expr[:match.start()]
+    compiled = compile_expression(expr.strip())
+    return compiled, replace(_distribution(compiled.root), bounds=_bounds(compiled.root))
@@ -1,4 +1,6 @@
+import io
 import json
+from functools import lru_cache
 from pathlib import Path
 from pypdf import PdfReader
 import re
@@ -112,7 +114,17 @@ SPELL_PREFIXES = (
     "source", "notes", "prepared",
 )
 
-_SPELL_KEY_RE = re.compile(r"^spell")
+_TRAILING_DIGITS_RE = re.compile(r"\s*(\d+)$")
+_WEAPON_RE = re.compile(r"wpn(\d*)\s*(.*)")
+
+EQUIPMENT_PREFIXES = ("eq name", "eq qty", "eq weight")
+
+# skill field name -> (skill, which part of it the field holds)
+SKILL_FIELDS = {}
+for _sk in SKILL_NAMES:
+    SKILL_FIELDS[_sk] = (_sk, "value")
+    SKILL_FIELDS[_sk + "prof"] = (_sk, "prof")
+    SKILL_FIELDS[_sk + "mod"] = (_sk, "ability")
 
 
 def norm(s):
@@ -120,16 +132,12 @@ def norm(s):
 
 
 def drop_trailing_digits(s):
-    return re.sub(r"\s*\d+$", "", s)
+    return _TRAILING_DIGITS_RE.sub("", s)
 
 
 def skill_base(lname):
-    for sk in SKILL_NAMES:
-        if lname in (sk, sk + "prof", sk + "mod", sk + " "):
-            return sk
-        if lname.startswith(sk) and lname[len(sk):] in ("", "prof", "mod", " "):
-            return sk
-    return None
+    found = SKILL_FIELDS.get(lname)
+    return found[0] if found else None
 
 
 def _eq_sort_key(k):
@@ -137,31 +145,138 @@ def _eq_sort_key(k):
     return (p, int(n))
 
 
-# ── Core parser ───────────────────────────────────────────────────────────────
+# ── Field handlers ────────────────────────────────────────────────────────────
+# Each takes (data, arg, value); arg is whatever classify_field() worked out for the field.
 
-def parse_sheet(pdf_path: Path) -> dict:
-    reader = PdfReader(pdf_path)
+def _set_character(data, key, val):
+    data["character"].setdefault(key, val)  # the first page's copy wins
 
-    data = {
-        "character": {},
-        "abilities": {},
-        "saving_throws": {},
-        "combat": {},
-        "skills": {},
-        "passives": {},
-        "senses": "",
-        "defenses": "",
-        "currency": {},
-        "equipment": {},
-        "weapons": {},
-        "spells": {},
-        "features": [],
-        "actions": [],
-        "proficiencies": "",
-        "personality": {},
-        "notes": {},
-    }
 
+def _set_ability(data, key, val):
+    data["abilities"][key] = val
+
+
+def _set_save_value(data, ability, val):
+    data["saving_throws"].setdefault(ability, {})["value"] = val
+
+
+def _set_save_prof(data, ability, val):
+    data["saving_throws"].setdefault(ability, {})["prof"] = val
+
+
+def _set_personality(data, key, val):
+    data["personality"][key] = val
+
+
+def _set_equipment(data, arg, val):
+    idx, field = arg
+    data["equipment"].setdefault(idx, {"name": "", "qty": "", "weight": ""})[field] = val
+
+
+def _set_weapon(data, arg, val):
+    idx, field = arg
+    data["weapons"].setdefault(idx, {})[field] = val
+
+
+def _set_section(section):
+    def handler(data, key, val):
+        data[section][key] = val
+    return handler
+
+
+def _set_text(data, key, val):
+    data[key] = val
+
+
+def _set_skill(data, arg, val):
+    sk, part = arg
+    entry = data["skills"].setdefault(sk, {
+        "name": SKILL_DISPLAY.get(sk, sk.capitalize()),
+        "value": "",
+        "prof": "",
+        "ability": "",
+    })
+    entry[part] = val
+
+
+def _set_spell(data, arg, val):
+    idx, field = arg
+    data["spells"].setdefault(idx, {})[field] = val
+
+
+_set_combat = _set_section("combat")
+_set_passive = _set_section("passives")
+_set_currency = _set_section("currency")
+_set_note = _set_section("notes")
+
+
+@lru_cache(maxsize=4096)
+def classify_field(ln: str) -> tuple:
+    """
+    (handler, arg) for a normalized field name. D&D Beyond sheets all use the same few hundred
+    field names, so after the first sheet this is a cache hit and no field needs any string or
+    regex work. The checks and their order are the parser's rules: first match wins.
+    """
+    lns = drop_trailing_digits(ln)
+
+    key = CHARACTER_CANONICAL.get(ln) or CHARACTER_CANONICAL.get(lns)
+    if key:
+        return _set_character, key
+
+    key = ABILITY_KEYS.get(ln)
+    if key:
+        return _set_ability, key
+
+    if ln in SAVING_THROW_VALUE_MAP:
+        return _set_save_value, SAVING_THROW_VALUE_MAP[ln]
+
+    key = PERSONALITY_FIELDS.get(ln) or PERSONALITY_FIELDS.get(lns)
+    if key:
+        return _set_personality, key
+
+    if ln.startswith(EQUIPMENT_PREFIXES):
+        digits = _TRAILING_DIGITS_RE.search(ln)
+        if digits:
+            field = "name" if "name" in ln else "qty" if "qty" in ln else "weight"
+            return _set_equipment, (int(digits.group(1)), field)
+
+    if ln.startswith("wpn"):
+        m = _WEAPON_RE.search(ln)
+        return _set_weapon, (int(m.group(1)) if m.group(1) else 0, m.group(2).strip())
+
+    if ln in SAVING_THROW_PROF_MAP:
+        return _set_save_prof, SAVING_THROW_PROF_MAP[ln]
+
+    if ln in COMBAT_FIELDS:
+        return _set_combat, COMBAT_FIELDS[ln]
+
+    if ln in PASSIVE_FIELDS:
+        return _set_passive, PASSIVE_FIELDS[ln]
+
+    if ln == "additionalsenses":
+        return _set_text, "senses"
+
+    if ln == "defenses":
+        return _set_text, "defenses"
+
+    if ln in CURRENCY_FIELDS:
+        return _set_currency, ln
+
+    if ln in SKILL_FIELDS:
+        return _set_skill, SKILL_FIELDS[ln]
+
+    digits = _TRAILING_DIGITS_RE.search(ln)
+    if digits and ln.startswith(SPELL_PREFIXES):
+        field_key = ln[:digits.start()].rstrip()
+        return _set_spell, (int(digits.group(1)), field_key[5:] if field_key.startswith("spell") else field_key)
+
+    return _set_note, ln
+
+
+# ── Core parser ───────────────────────────────────────────────────────────────
+
+def iter_fields(reader: PdfReader):
+    """(normalized name, value) of every filled-in form field, page by page."""
     for page in reader.pages:
         annots = page.get("/Annots")
         if not annots:
@@ -181,104 +296,34 @@ def parse_sheet(pdf_path: Path) -> dict:
             if val in ("", "/Off", "Off"):
                 continue
 
-            ln = norm(raw)
-            lns = drop_trailing_digits(ln)
-
-            key = CHARACTER_CANONICAL.get(ln) or CHARACTER_CANONICAL.get(lns)
-            if key:
-                if key not in data["character"]:
-                    data["character"][key] = val
-                continue
-
-            ab_key = ABILITY_KEYS.get(ln) or ABILITY_KEYS.get(ln.rstrip())
-            if ab_key:
-                data["abilities"][ab_key] = val
-                continue
-
-            if ln in SAVING_THROW_VALUE_MAP:
-                data["saving_throws"].setdefault(
-                    SAVING_THROW_VALUE_MAP[ln], {})["value"] = val
-                continue
-            
-            # --- Personality ---
-            p_key = PERSONALITY_FIELDS.get(ln) or PERSONALITY_FIELDS.get(lns)
-            if p_key:
-                data["personality"][p_key] = val
-                continue
-
-            # --- Equipment ---
-            if ln.startswith("eq name") or ln.startswith("eq qty") or ln.startswith("eq weight"):
-                idx = int(re.search(r"\d+$", ln).group(0))
-                item = data["equipment"].setdefault(idx, {"name": "", "qty": "", "weight": ""})
-                if "name" in ln:
-                    item["name"] = val
-                elif "qty" in ln:
-                    item["qty"] = val
-                elif "weight" in ln:
-                    item["weight"] = val
-                continue
-
-            # --- Weapons ---
-            if ln.startswith("wpn"):
-                # handle numeric suffix
-                m = re.search(r"wpn(\d*)\s*(.*)", ln)
-                if m:
-                    idx = int(m.group(1)) if m.group(1) else 0
-                    field = m.group(2).strip()  # atkbonus, damage, notes, etc.
-                    weapon = data["weapons"].setdefault(idx, {})
-                    weapon[field] = val
-                continue
-
-            if ln in SAVING_THROW_PROF_MAP:
-                data["saving_throws"].setdefault(
-                    SAVING_THROW_PROF_MAP[ln], {})["prof"] = val
-                continue
-
-            if ln in COMBAT_FIELDS:
-                data["combat"][COMBAT_FIELDS[ln]] = val
-                continue
-
-            if ln in PASSIVE_FIELDS:
-                data["passives"][PASSIVE_FIELDS[ln]] = val
-                continue
-
-            if ln == "additionalsenses":
-                data["senses"] = val
-                continue
-
-            if ln == "defenses":
-                data["defenses"] = val
-                continue
-
-            if ln in CURRENCY_FIELDS:
-                data["currency"][ln] = val
-                continue
+            yield norm(raw), val
 
-            sk = skill_base(ln)
-            if sk:
-                entry = data["skills"].setdefault(sk, {
-                    "name": SKILL_DISPLAY.get(sk, sk.capitalize()),
-                    "value": "",
-                    "prof": "",
-                    "ability": "",
-                })
-                if ln.endswith("prof"):
-                    entry["prof"] = val
-                elif ln.endswith("mod"):
-                    entry["ability"] = val
-                else:
-                    entry["value"] = val
-                continue
 
-            sm = re.search(r"(\d+)$", ln)
-            if sm and any(ln.startswith(p) for p in SPELL_PREFIXES):
-                idx = int(sm.group(1))
-                field_key = re.sub(r"\d+$", "", ln).rstrip()
-                field_key = _SPELL_KEY_RE.sub("", field_key)
-                data["spells"].setdefault(idx, {})[field_key] = val
-                continue
+def parse_fields(fields) -> dict:
+    """Build the sheet dict from (normalized name, value) pairs."""
+    data = {
+        "character": {},
+        "abilities": {},
+        "saving_throws": {},
+        "combat": {},
+        "skills": {},
+        "passives": {},
+        "senses": "",
+        "defenses": "",
+        "currency": {},
+        "equipment": {},
+        "weapons": {},
+        "spells": {},
+        "features": [],
+        "actions": [],
+        "proficiencies": "",
+        "personality": {},
+        "notes": {},
+    }
 
-            data["notes"][ln] = val
+    for ln, val in fields:
+        handler, arg = classify_field(ln)
+        handler(data, arg, val)
 
     data["skills"] = [
         data["skills"][sk]
@@ -298,6 +343,10 @@ def parse_sheet(pdf_path: Path) -> dict:
     return data
 
 
+def parse_sheet(pdf_path: Path) -> dict:
+    return parse_fields(iter_fields(PdfReader(pdf_path)))
+
+
 # ── Public API ───────────────────────────────────────────────────────────────
 
 def convert(pdf_file):
@@ -314,6 +363,13 @@ def convert(pdf_file):
     return parse_sheet(pdf_path)
 
 
+def convert_bytes(pdf_bytes: bytes) -> dict:
+    """
+    Like convert(), for a PDF that's already in memory (downloaded, or handed to a worker process).
+    """
+    return parse_sheet(io.BytesIO(pdf_bytes))
+
+
 def convert_to_file(pdf_file, output_json):
     """
     Convert a PDF and save it directly to a JSON file.
@@ -0,0 +1,248 @@
+"""
+SQLite storage for the D&D helper (dndhelper `storage: sqlite`), instead of loose JSON files.
+
+Tables:
+    sheets         raw sheet JSON plus indexed name/class/level columns
+    links          which user plays which character
+    sheet_updates  where each sheet came from and when/how it was last refreshed
+    migrations     one-shot jobs already done (the JSON import)
+
+SqliteSheetRepository and SqliteCharacterLinkStore have the same interfaces as the JSON
+SheetRepository and CharacterLinkStore, so the cog doesn't care which backend it has.
+All sqlite work runs in a worker thread.
+"""
+
+import json
+import os
+import re
+import time
+
+from .cache import LRUCache
+from .character_links import CharacterLinkStore
+from .logger import setup_logger
+from .sqlite_store import SqliteStore
+
+logger = setup_logger("dnd_store")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    guild_id   INTEGER NOT NULL,
+    name       TEXT NOT NULL,
+    char_class TEXT,
+    level      INTEGER,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (guild_id, name)
+);
+CREATE INDEX IF NOT EXISTS sheets_class ON sheets(guild_id, char_class);
+CREATE INDEX IF NOT EXISTS sheets_level ON sheets(guild_id, level);
+
+CREATE TABLE IF NOT EXISTS links (
+    guild_id  INTEGER NOT NULL,
+    user_id   INTEGER NOT NULL,
+    character TEXT NOT NULL,
+    PRIMARY KEY (guild_id, user_id),
+    UNIQUE (guild_id, character)
+);
+
+CREATE TABLE IF NOT EXISTS sheet_updates (
+    guild_id      INTEGER NOT NULL,
+    name          TEXT NOT NULL,
+    source        TEXT,
+    etag          TEXT,
+    last_modified TEXT,
+    content_hash  TEXT,
+    added_on      TEXT,
+    last_updated  TEXT,
+    uploader      TEXT,
+    PRIMARY KEY (guild_id, name)
+);
+
+CREATE TABLE IF NOT EXISTS migrations (
+    name       TEXT PRIMARY KEY,
+    applied_at REAL NOT NULL
+);
+"""
+
+_CLASS_LEVEL_RE = re.compile(r"([^\d/]+?)\s*(\d+)")
+META_COLUMNS = ("source", "etag", "last_modified", "content_hash", "added_on", "last_updated", "uploader")
+
+
+def split_class_level(class_level: str) -> tuple[str | None, int | None]:
+    """'Fighter 3 / Wizard 2' -> ('Fighter / Wizard', 5)"""
+    parts = _CLASS_LEVEL_RE.findall(class_level or "")
+    if not parts:
+        return (class_level or None), None
+    return " / ".join(name.strip() for name, _ in parts), sum(int(level) for _, level in parts)
+
+
+class DndStore(SqliteStore):
+    def __init__(self, path: str):
+        super().__init__(path, SCHEMA)
+
+    def locked(self, fn, *args):
+        """Run fn(*args) with the connection to ourselves, blocking (for callers already in a thread)."""
+        with self._lock:
+            return fn(*args)
+
+    # --- sync implementations (run in a worker thread) ---
+
+    def _sheet_names(self, guild_id: int) -> list[str]:
+        return [name for (name,) in self._conn.execute(
+            "SELECT name FROM sheets WHERE guild_id = ? ORDER BY name", (guild_id,)
+        )]
+
+    def _get_sheet(self, guild_id: int, name: str) -> dict | None:
+        found = self._conn.execute(
+            "SELECT data FROM sheets WHERE guild_id = ? AND name = ?", (guild_id, name)
+        ).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def _put_sheet(self, guild_id: int, name: str, data: dict):
+        char_class, level = split_class_level(data.get("character", {}).get("class_level", ""))
+        meta = data.get("meta", {})
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sheets VALUES (?, ?, ?, ?, ?)",
+            (guild_id, name, char_class, level, json.dumps(data)),
+        )
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO sheet_updates VALUES (?, ?, {', '.join('?' * len(META_COLUMNS))})",
+            (guild_id, name, *(meta.get(column) for column in META_COLUMNS)),
+        )
+
+    def _save_sheet(self, guild_id: int, name: str, data: dict):
+        with self._conn:
+            self._put_sheet(guild_id, name, data)
+
+    def _links(self) -> dict[int, dict[int, str]]:
+        links: dict[int, dict[int, str]] = {}
+        for guild_id, user_id, character in self._conn.execute("SELECT guild_id, user_id, character FROM links"):
+            links.setdefault(guild_id, {})[user_id] = character
+        return links
+
+    def _replace_links(self, by_guild: dict[int, dict[int, str]]):
+        """Make the stored links of each given guild exactly the given ones."""
+        with self._conn:
+            for guild_id, links in by_guild.items():
+                self._conn.execute("DELETE FROM links WHERE guild_id = ?", (guild_id,))
+                self._conn.executemany(
+                    "INSERT INTO links VALUES (?, ?, ?)",
+                    [(guild_id, user_id, character) for user_id, character in links.items()],
+                )
+
+    def _import_json(self, sheets_dir: str, links_path: str) -> tuple[int, int] | None:
+        """Import the JSON files once. Returns (sheets, links) imported, or None if already done."""
+        if self._conn.execute("SELECT 1 FROM migrations WHERE name = 'json_import'").fetchone():
+            return None
+
+        sheets = links = 0
+        with self._conn:
+            if os.path.isdir(sheets_dir):
+                for guild in os.listdir(sheets_dir):
+                    guild_dir = os.path.join(sheets_dir, guild)
+                    if not guild.isdigit() or not os.path.isdir(guild_dir):
+                        continue
+                    for filename in os.listdir(guild_dir):
+                        if not filename.endswith(".json"):
+                            continue
+                        try:
+                            with open(os.path.join(guild_dir, filename), "r") as f:
+                                data = json.load(f)
+                        except (OSError, json.JSONDecodeError):
+                            logger.exception(f"Skipping unreadable sheet {guild}/{filename}")
+                            continue
+                        self._put_sheet(int(guild), filename[:-5], data)
+                        sheets += 1
+
+            if os.path.exists(links_path):
+                with open(links_path, "r") as f:
+                    raw = json.load(f)
+                for guild_id, guild_links in raw.items():
+                    for user_id, character in guild_links.items():
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO links VALUES (?, ?, ?)", (int(guild_id), int(user_id), character)
+                        )
+                        links += 1
+
+            self._conn.execute("INSERT INTO migrations VALUES ('json_import', ?)", (time.time(),))
+        return sheets, links
+
+    # --- async API ---
+
+    async def import_json(self, sheets_dir: str, links_path: str):
+        """One-shot migration from the JSON files. The files are left where they are."""
+        imported = await self._run(self._import_json, sheets_dir, links_path)
+        if imported is not None:
+            logger.info(f"Imported {imported[0]} sheets and {imported[1]} character links from JSON into {self.path}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SqliteSheetRepository:
+    """SheetRepository on top of DndStore. We're the only writer, so cached entries never go stale."""
+
+    def __init__(self, store: DndStore, cache_size: int = 512):
+        self.store = store
+        self._names: dict[int, list[str]] = {}
+        self._sheets = LRUCache(cache_size)  # (guild_id, name) -> sheet
+
+    async def names(self, guild_id: int) -> list[str]:
+        names = self._names.get(guild_id)
+        if names is None:
+            names = self._names[guild_id] = await self.store._run(self.store._sheet_names, guild_id)
+        return list(names)
+
+    async def get(self, guild_id: int, name: str) -> dict | None:
+        key = (guild_id, name)
+        data = self._sheets.get(key)
+        if data is None:
+            names = self._names.get(guild_id)
+            if names is not None and name not in names:
+                return None
+            data = await self.store._run(self.store._get_sheet, guild_id, name)
+            if data is not None:
+                self._sheets.set(key, data)
+        return data
+
+    async def save(self, guild_id: int, name: str, data: dict):
+        await self.store._run(self.store._save_sheet, guild_id, name, data)
+        self._sheets.set((guild_id, name), data)
+        names = self._names.get(guild_id)
+        if names is not None and name not in names:
+            self._names[guild_id] = sorted([*names, name])
+
+    def invalidate(self, guild_id: int | None = None):
+        if guild_id is None:
+            self._names.clear()
+            self._sheets.clear()
+            return
+        self._names.pop(guild_id, None)
+        for key in [key for key in self._sheets.keys() if key[0] == guild_id]:
+            self._sheets.pop(key)
+
+
+class SqliteCharacterLinkStore(CharacterLinkStore):
+    """CharacterLinkStore that persists to the links table, rewriting only the guilds that changed."""
+
+    def __init__(self, store: DndStore, save_delay: float = 2.0):
+        super().__init__(store.path, save_delay)
+        self.store = store
+        self._guild_versions: dict[int, int] = {}  # version each guild was last written at
+
+    def _read(self) -> dict:
+        return self.store.locked(self.store._links)
+
+    def _snapshot(self) -> dict:
+        return {guild_id: dict(self._by_user.get(guild_id, {})) for guild_id in self._dirty_guilds}
+
+    def _write(self, snapshot: dict, version: int):
+        with self._write_lock:
+            fresh = {
+                guild_id: links for guild_id, links in snapshot.items()
+                if version > self._guild_versions.get(guild_id, 0)
+            }
+            if fresh:
+                self.store.locked(self.store._replace_links, fresh)
+            for guild_id in fresh:
+                self._guild_versions[guild_id] = version
@@ -1,20 +1,18 @@
 import discord
-import json
-import os
 from pathlib import Path
 from .dnd_beyond_parser import convert
 
 class CharSelectCharacter(discord.ui.Select):
     """Dropdown to switch between characters."""
 
-    def __init__(self, characters, original_author, sheets_dir, guild_id, parent_view):
+    def __init__(self, characters, original_author, sheets, guild_id, parent_view):
         options = [
             discord.SelectOption(label=char, description=f"View {char}'s sheet")
             for char in characters
         ]
         super().__init__(placeholder="Select character...", min_values=1, max_values=1, options=options)
         self.original_author = original_author
-        self.sheets_dir = sheets_dir
+        self.sheets = sheets
         self.guild_id = guild_id
         self.parent_view = parent_view
 
@@ -24,14 +22,11 @@ class CharSelectCharacter(discord.ui.Select):
             return
 
         char_name = self.values[0]
-        filepath = os.path.join(self.sheets_dir, str(self.guild_id), f"{char_name}.json")
-        if not os.path.exists(filepath):
+        data = await self.sheets.get(self.guild_id, char_name)
+        if data is None:
             await interaction.response.send_message(f"Character `{char_name}` not found.", ephemeral=True)
             return
 
-        with open(filepath, "r") as f:
-            data = json.load(f)
-
         # Update parent view with new character data
         self.parent_view.current_character_data = data
         self.parent_view.current_character_name = char_name
@@ -68,17 +63,17 @@ class CharSelectSection(discord.ui.Select):
 class CharView(discord.ui.View):
     """Holds dropdowns for character selection and sections."""
 
-    def __init__(self, characters, current_character_data, current_character_name, original_author, sheets_dir, guild_id):
+    def __init__(self, characters, current_character_data, current_character_name, original_author, sheets, guild_id):
         super().__init__(timeout=None)
         self.original_author = original_author
-        self.sheets_dir = sheets_dir
+        self.sheets = sheets  # SheetRepository shared with the cog
         self.guild_id = guild_id
         self.current_character_data = current_character_data
         self.current_character_name = current_character_name
 
         # Add dropdowns
         if len(characters) > 1:
-            self.add_item(CharSelectCharacter(characters, original_author, sheets_dir, guild_id, self))
+            self.add_item(CharSelectCharacter(characters, original_author, sheets, guild_id, self))
         self.add_item(CharSelectSection(self))
 
     async def show_section(self, interaction, section, is_intial):
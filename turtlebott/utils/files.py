@@ -0,0 +1,36 @@
+"""File helpers shared by modules that keep state on disk."""
+
+import json
+import os
+import tempfile
+
+
+def write_json_atomic(path: str, data, indent: int | None = 4):
+    """
+    Write JSON so readers (and crashes) only ever see the old file or the complete new one:
+    write a temp file next to it, fsync, then rename over the original.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+    try:  # make the rename itself durable (not possible on Windows)
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,31 @@
+"""Shared aiohttp session, so modules don't open a new connection pool per request."""
+
+import aiohttp
+
+_session: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the bot-wide pooled ClientSession, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=60),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_session():
+    """Close the shared session (call when the bot shuts down)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def fetch_bytes(url: str) -> bytes:
+    """Download a URL through the shared session."""
+    async with get_session().get(url) as resp:
+        resp.raise_for_status()
+        return await resp.read()
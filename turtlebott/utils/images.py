@@ -0,0 +1,55 @@
+"""Image helpers (downscaling / re-encoding before images go anywhere expensive)."""
+
+import io
+from PIL import Image, ImageOps
+
+# PIL format name -> mime type
+FORMAT_MIME = {
+    "WEBP": "image/webp",
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+}
+
+
+def shrink_image(data: bytes, max_dimension: int = 1024, fmt: str = "WEBP", quality: int = 80) -> tuple[bytes, str]:
+    """
+    Resize an image so its longest side is at most max_dimension and re-encode it.
+    Blocking (CPU heavy), so run it off the event loop.
+
+    Returns (bytes, mime_type). If re-encoding doesn't make the image any
+    smaller and no resize was needed, the original bytes are returned as-is.
+    """
+    fmt = fmt.upper()
+    if fmt not in FORMAT_MIME:
+        raise ValueError(f"Unsupported image format: {fmt}")
+
+    with Image.open(io.BytesIO(data)) as img:
+        original_mime = Image.MIME.get(img.format or "", "application/octet-stream")
+        img.seek(0)  # animated images: just use the first frame
+        img = ImageOps.exif_transpose(img)
+
+        resized = max(img.size) > max_dimension
+        if resized:
+            img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        if fmt == "JPEG":
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+
+        out = io.BytesIO()
+        save_kwargs = {"optimize": True} if fmt != "WEBP" else {"method": 4}
+        if fmt != "PNG":
+            save_kwargs["quality"] = quality
+        img.save(out, format=fmt, **save_kwargs)
+
+    encoded = out.getvalue()
+    if not resized and len(encoded) >= len(data):
+        return data, original_mime
+    return encoded, FORMAT_MIME[fmt]
@@ -0,0 +1,218 @@
+"""
+Bridge between a Discord voice connection and a Gemini Live session.
+
+Same shape as the tests/realtime_gemini.py prototype (mic queue -> Live API -> speaker
+queue, speaker queue flushed on interruption), but with Discord on both ends:
+    Discord gives us 48kHz stereo PCM, Live wants 16kHz mono.
+    Live answers with 24kHz mono PCM, Discord plays 48kHz stereo in 20ms frames.
+
+The bridge doesn't touch the voice client itself: whoever owns it plays `bridge.source`
+and feeds received audio into `bridge.on_voice`. That keeps it testable without Discord
+(see tools/fake_live.py).
+
+Audio moves through preallocated rings and resamplers (see audio.py), so the per-frame
+path doesn't allocate beyond the bytes objects discord.py and google-genai insist on.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import discord
+from google.genai import types
+
+from .audio import AudioRing, Resampler
+from .logger import setup_logger
+from .stats import percentile
+
+logger = setup_logger("live_bridge")
+
+DISCORD_RATE = 48000
+DISCORD_CHANNELS = 2
+LIVE_INPUT_RATE = 16000
+LIVE_OUTPUT_RATE = 24000
+SAMPLE_WIDTH = 2  # s16le
+
+FRAME_BYTES = DISCORD_RATE // 50 * DISCORD_CHANNELS * SAMPLE_WIDTH  # 20ms of Discord audio, 3840 bytes
+MIC_FRAME_BYTES = LIVE_INPUT_RATE // 50 * SAMPLE_WIDTH  # the same 20ms once converted for Live, 640 bytes
+SILENCE = b"\x00" * FRAME_BYTES
+
+SPEECH_RMS = 500  # input frames louder than this count as the user speaking (for latency metrics)
+
+
+class LiveAudioSource(discord.AudioSource):
+    """
+    Plays whatever the Live session says. read() is called from discord's player thread
+    every 20ms, so audio goes through a thread-safe ring buffer.
+    """
+
+    def __init__(self, max_frames: int = 1500):
+        self.ring = AudioRing(max_frames * FRAME_BYTES)
+        self._frame = bytearray(FRAME_BYTES)
+        self.played = 0
+        self.underruns = 0
+
+    def feed(self, pcm) -> int:
+        """Queue 48kHz stereo PCM. Returns how many bytes fit (caller should wait and retry the rest)."""
+        return self.ring.write(pcm)
+
+    def flush(self):
+        """Drop everything queued (barge-in: the user started talking over the bot)."""
+        self.ring.clear()
+
+    @property
+    def queued_frames(self) -> int:
+        return self.ring.available // FRAME_BYTES
+
+    def read(self) -> bytes:
+        if self.ring.available < FRAME_BYTES:
+            # Returning b"" would stop the player, so keep it alive with silence
+            self.underruns += 1
+            return SILENCE
+        self.ring.read_into(self._frame)
+        self.played += 1
+        return bytes(self._frame)  # the opus encoder wants real bytes
+
+    def is_opus(self) -> bool:
+        return False
+
+
+class LiveBridge:
+    def __init__(self, connect, user_id: int, mic_queue_size: int = 50, max_output_frames: int = 1500):
+        """
+        connect: callable returning an async context manager that yields a Live session
+                 (normally `lambda: client.aio.live.connect(model=..., config=...)`).
+        user_id: only this user's audio is forwarded (Live takes one input stream).
+        mic_queue_size: 20ms frames of mic audio buffered before the oldest gets dropped.
+        """
+        self.connect = connect
+        self.user_id = user_id
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+        # Discord -> Live. Converted on the voice receive thread straight into the ring;
+        # the sender task drains it and is woken only when the ring goes from empty to not.
+        self._mic_ready = asyncio.Event()
+        self.mic = AudioRing(mic_queue_size * MIC_FRAME_BYTES, overwrite=True, on_data=self._wake_sender)
+        self._mic_resampler = Resampler(DISCORD_RATE, LIVE_INPUT_RATE, in_channels=DISCORD_CHANNELS)
+
+        # Live -> Discord
+        self.source = LiveAudioSource(max_output_frames)
+        self._speaker_resampler = Resampler(LIVE_OUTPUT_RATE, DISCORD_RATE, out_channels=DISCORD_CHANNELS)
+
+        # Metrics
+        self.frames_in = 0
+        self.interruptions = 0
+        self.last_speech_at = 0.0
+        self.response_latencies: deque[float] = deque(maxlen=200)
+        self._awaiting_response = False
+
+        self._task: asyncio.Task | None = None
+
+    # --- Discord -> Live ---
+
+    def on_voice(self, user, pcm: bytes):
+        """Voice receive callback. Called from the voice receive thread."""
+        if user is None or user.id != self.user_id or self.loop is None:
+            return
+        self.frames_in += 1
+        step = self._mic_resampler.max_frames * DISCORD_CHANNELS * SAMPLE_WIDTH
+        view = memoryview(pcm)
+        for start in range(0, len(view), step):
+            converted = self._mic_resampler.process(view[start:start + step])
+            if self._mic_resampler.rms() > SPEECH_RMS:
+                self.last_speech_at = time.monotonic()
+                self._awaiting_response = True
+            self.mic.write(converted)
+
+    def _wake_sender(self):
+        loop = self.loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._mic_ready.set)
+
+    async def _send(self, session):
+        while True:
+            # Clear before draining, so a wake-up for audio written mid-drain isn't lost
+            self._mic_ready.clear()
+            # Copied out under the ring's lock: the receive thread may be overwriting old audio
+            data = self.mic.read(self.mic.capacity)
+            if not data:
+                await self._mic_ready.wait()
+                continue
+            await session.send_realtime_input(
+                audio=types.Blob(data=data, mime_type=f"audio/pcm;rate={LIVE_INPUT_RATE}")
+            )
+
+    # --- Live -> Discord ---
+
+    async def _play(self, pcm: bytes):
+        if self._awaiting_response:
+            self._awaiting_response = False
+            self.response_latencies.append(time.monotonic() - self.last_speech_at)
+
+        step = self._speaker_resampler.max_frames * SAMPLE_WIDTH
+        view = memoryview(pcm)
+        for start in range(0, len(view), step):
+            stereo = self._speaker_resampler.process(view[start:start + step])
+            while stereo:
+                written = self.source.feed(stereo)
+                stereo = stereo[written:]
+                if stereo:  # playback is 30s behind; wait for it to catch up
+                    await asyncio.sleep(0.02)
+
+    async def _receive(self, session):
+        while True:
+            async for response in session.receive():
+                content = response.server_content
+                if content is None:
+                    continue
+                if content.interrupted:
+                    # Barge-in: the user talked over the bot, stop playing the old answer
+                    self.interruptions += 1
+                    self.source.flush()
+                    continue
+                if content.model_turn:
+                    for part in content.model_turn.parts:
+                        if part.inline_data and isinstance(part.inline_data.data, bytes):
+                            await self._play(part.inline_data.data)
+
+    # --- Lifecycle ---
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        async with self.connect() as session:
+            logger.info(f"Live session started for user={self.user_id}")
+            tasks = [asyncio.create_task(self._send(session)), asyncio.create_task(self._receive(session))]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # One side failed (or we were stopped): take the other one down with it
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        self.loop = None  # stop accepting audio from the receive thread
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self.source.flush()
+        logger.info(f"Live session stopped for user={self.user_id}")
+
+    def stats(self) -> dict:
+        return {
+            "frames_in": self.frames_in,
+            "frames_dropped": self.mic.dropped // MIC_FRAME_BYTES,
+            "frames_played": self.source.played,
+            "underruns": self.source.underruns,
+            "interruptions": self.interruptions,
+            "output_queued": self.source.queued_frames,
+            "latency_p50": percentile(self.response_latencies, 0.50),
+            "latency_p95": percentile(self.response_latencies, 0.95),
+        }
@@ -0,0 +1,259 @@
+"""
+Long-term memory for the chatbot: an append-only, memory-mapped vector index per guild.
+
+Layout of an index directory:
+    meta.json    {"dim": ..., "count": ...}  (count is only bumped after rows are written)
+    vectors.f32  float32 matrix, `capacity` rows x `dim`, unit-length rows
+    offsets.i64  int64 (offset, length) into texts.bin for every row
+    texts.bin    utf-8 text of every row, appended
+Search is a blockwise matrix-vector product, so it never loads the whole matrix at once.
+Everything here is blocking; call it from a worker thread.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from .cache import LRUCache
+
+BLOCK_ROWS = 65536  # rows scored per step when searching
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from has have i if in is it its me my of on or "
+    "so that the their them they this to was we what when where which who why will with you your".split()
+)
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder (feature hashing of words and word pairs).
+    No network, no model, same text -> same vector. Good for tests and offline use,
+    and honestly not bad at "these two messages share words".
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str):
+        words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+        yield from words
+        yield from (f"{a} {b}" for a, b in zip(words, words[1:]))
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return normalize(out)
+
+
+class GenaiEmbedder:
+    """Embeddings from the Gemini API."""
+
+    def __init__(self, client, model: str = "gemini-embedding-001", dim: int = 768):
+        self.client = client
+        self.model = model
+        self.dim = dim
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        from google.genai import types
+
+        result = self.client.models.embed_content(
+            model=self.model,
+            contents=texts,
+            config=types.EmbedContentConfig(output_dimensionality=self.dim),
+        )
+        return normalize(np.array([e.values for e in result.embeddings], dtype=np.float32))
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class MemoryIndex:
+    def __init__(self, path: str, dim: int, initial_capacity: int = 1024):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta["dim"] != dim:
+                raise ValueError(f"Index at {path} has dim {meta['dim']}, expected {dim}")
+            self.count = meta["count"]
+        else:
+            self.count = 0
+        self.dim = dim
+
+        vec_path = os.path.join(path, "vectors.f32")
+        existing_rows = os.path.getsize(vec_path) // (4 * dim) if os.path.exists(vec_path) else 0
+        self.capacity = max(initial_capacity, existing_rows, self.count)
+        self._open(self.capacity)
+        self._texts = open(os.path.join(path, "texts.bin"), "ab+")
+
+    def _open(self, capacity: int):
+        for name, width, dtype in (("vectors.f32", self.dim, np.float32), ("offsets.i64", 2, np.int64)):
+            file = os.path.join(self.path, name)
+            size = capacity * width * np.dtype(dtype).itemsize
+            with open(file, "ab"):
+                pass
+            if os.path.getsize(file) < size:
+                os.truncate(file, size)  # sparse extend, no data copied
+        self.vectors = np.memmap(os.path.join(self.path, "vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.offsets = np.memmap(os.path.join(self.path, "offsets.i64"), dtype=np.int64, mode="r+", shape=(capacity, 2))
+        self.capacity = capacity
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.vectors.flush()
+        self.offsets.flush()
+        del self.vectors, self.offsets
+        self._open(capacity)
+
+    def _write_meta(self):
+        meta_path = os.path.join(self.path, "meta.json")
+        tmp = meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count}, f)
+        os.replace(tmp, meta_path)
+
+    def add(self, texts: list[str], vectors: np.ndarray):
+        """Append rows. `vectors` must already be unit length (embedders do that)."""
+        if len(texts) != len(vectors):
+            raise ValueError("texts and vectors must have the same length")
+        with self._lock:
+            start = self.count
+            end = start + len(texts)
+            if end > self.capacity:
+                self._grow(end)
+
+            self._texts.seek(0, os.SEEK_END)
+            for i, text in enumerate(texts):
+                data = text.encode("utf-8")
+                self.offsets[start + i] = (self._texts.tell(), len(data))
+                self._texts.write(data)
+            self._texts.flush()
+
+            self.vectors[start:end] = vectors
+            self.vectors.flush()
+            self.offsets.flush()
+
+            self.count = end
+            self._write_meta()
+
+    def _text(self, row: int) -> str:
+        offset, length = self.offsets[row]
+        self._texts.seek(int(offset))
+        return self._texts.read(int(length)).decode("utf-8")
+
+    def search(self, query: np.ndarray, k: int = 3, min_score: float = 0.0) -> list[tuple[float, str]]:
+        """Top-k rows by cosine similarity to `query` (a unit vector), best first."""
+        with self._lock:
+            count = self.count
+            if count == 0 or k <= 0:
+                return []
+
+            best_scores = np.empty(0, dtype=np.float32)
+            best_rows = np.empty(0, dtype=np.int64)
+            for start in range(0, count, BLOCK_ROWS):
+                end = min(count, start + BLOCK_ROWS)
+                scores = self.vectors[start:end] @ query
+                if len(scores) > k:
+                    top = np.argpartition(scores, -k)[-k:]
+                else:
+                    top = np.arange(len(scores))
+                best_scores = np.concatenate((best_scores, scores[top]))
+                best_rows = np.concatenate((best_rows, top + start))
+                if len(best_scores) > k:
+                    keep = np.argpartition(best_scores, -k)[-k:]
+                    best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+            order = np.argsort(-best_scores)
+            return [
+                (float(best_scores[i]), self._text(int(best_rows[i])))
+                for i in order
+                if best_scores[i] >= min_score
+            ]
+
+    def close(self):
+        with self._lock:
+            self.vectors.flush()
+            self.offsets.flush()
+            self._texts.close()
+
+
+class GuildMemory:
+    """
+    One MemoryIndex per guild under `root`, with only recently used ones kept open.
+
+    An index is pinned while a remember/recall is using it: if it falls out of the cache meanwhile,
+    it's parked until the last user is done and only then closed (or picked back up if the guild
+    comes back first, so there's never two open indexes on the same files).
+    """
+
+    def __init__(self, root: str, embedder, max_open: int = 32):
+        self.root = root
+        self.embedder = embedder
+        self._open = LRUCache(max_open, on_evict=self._evicted)
+        self._users: dict[int, int] = {}             # guild id -> calls using its index right now
+        self._parked: dict[int, MemoryIndex] = {}    # evicted while in use, closed once unused
+        self._lock = threading.Lock()
+
+    def _evicted(self, guild_id: int, index: MemoryIndex):
+        # Called from _open.set(), so self._lock is held
+        if self._users.get(guild_id):
+            self._parked[guild_id] = index
+        else:
+            index.close()
+
+    @contextmanager
+    def _index(self, guild_id: int):
+        with self._lock:
+            index = self._open.get(guild_id)
+            if index is None:
+                index = self._parked.pop(guild_id, None)
+                if index is None:
+                    index = MemoryIndex(os.path.join(self.root, str(guild_id)), self.embedder.dim)
+                self._open.set(guild_id, index)
+            self._users[guild_id] = self._users.get(guild_id, 0) + 1
+        try:
+            yield index
+        finally:
+            with self._lock:
+                users = self._users.pop(guild_id) - 1
+                if users:
+                    self._users[guild_id] = users
+                elif self._parked.get(guild_id) is index:
+                    del self._parked[guild_id]
+                    index.close()
+
+    def remember(self, guild_id: int, texts: list[str]):
+        vectors = self.embedder.embed(texts)
+        with self._index(guild_id) as index:
+            index.add(texts, vectors)
+
+    def recall(self, guild_id: int, query: str, k: int = 3, min_score: float = 0.0) -> list[tuple[float, str]]:
+        if not os.path.exists(os.path.join(self.root, str(guild_id), "meta.json")):
+            return []
+        vector = self.embedder.embed([query])[0]
+        with self._index(guild_id) as index:
+            return index.search(vector, k, min_score)
+
+    def close(self):
+        with self._lock:
+            for index in (*self._open.values(), *self._parked.values()):
+                index.close()
+            self._open.clear()
+            self._parked.clear()
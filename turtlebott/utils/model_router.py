@@ -0,0 +1,129 @@
+"""
+Picks which model handles a request.
+Models are configured as ordered tiers (cheap/fast first). A request goes to the first
+tier that fits it, and falls over to later tiers when a model is rate limited, timing
+out or just slow/erroring lately. Per-model latency and error rates are tracked here.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from .stats import percentile
+
+
+@dataclass
+class ModelTier:
+    name: str
+    max_prompt_tokens: int | None = None  # only route here when the prompt is at most this big
+    images: bool = True                   # can this tier take image parts?
+
+
+@dataclass
+class ModelStats:
+    calls: int = 0
+    errors: int = 0
+    rate_limits: int = 0
+    error_rate: float = 0.0  # exponentially weighted, so old failures fade out
+    cooldown_until: float = 0.0
+    last_error: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=500))
+
+    def percentile(self, p: float) -> float:
+        return percentile(self.latencies, p)
+
+
+class ModelRouter:
+    def __init__(self, tiers: list[ModelTier], latency_target: float | None = None,
+                 error_threshold: float = 0.5, error_decay: float = 0.2, recovery_seconds: float = 60.0):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = tiers
+        self.latency_target = latency_target  # p95 above this counts as unhealthy
+        self.error_threshold = error_threshold
+        self.error_decay = error_decay
+        # An unhealthy model gets little traffic, so its error rate can't recover on its own.
+        # After this long without a new error it's given another chance.
+        self.recovery_seconds = recovery_seconds
+        self.stats: dict[str, ModelStats] = {tier.name: ModelStats() for tier in tiers}
+
+    @classmethod
+    def from_config(cls, settings: dict, default_model: str) -> "ModelRouter":
+        tiers = [
+            ModelTier(
+                name=entry["name"],
+                max_prompt_tokens=entry.get("maxPromptTokens"),
+                images=entry.get("images", True),
+            )
+            for entry in settings.get("models", [])
+        ] or [ModelTier(default_model)]
+        return cls(tiers, latency_target=settings.get("latencyTargetSeconds"))
+
+    def _healthy(self, name: str) -> bool:
+        stats = self.stats[name]
+        if stats.error_rate > self.error_threshold and time.monotonic() - stats.last_error < self.recovery_seconds:
+            return False
+        if self.latency_target and len(stats.latencies) >= 20 and stats.percentile(0.95) > self.latency_target:
+            return False
+        return True
+
+    def candidates(self, prompt_tokens: int, has_images: bool) -> list[str]:
+        """Models to try, in order. The best tier for the request first, then fallbacks."""
+        now = time.monotonic()
+        usable = [tier for tier in self.tiers if tier.images or not has_images]
+        if not usable:
+            usable = self.tiers  # nothing claims image support, so let the API decide
+
+        # The first tier big enough for the prompt is the preferred one; smaller tiers
+        # are skipped entirely, bigger ones are fallbacks.
+        start = next(
+            (i for i, tier in enumerate(usable) if tier.max_prompt_tokens is None or prompt_tokens <= tier.max_prompt_tokens),
+            len(usable) - 1,
+        )
+        ordered = usable[start:]
+
+        # Models cooling down after a rate limit are skipped, unless that's all there is;
+        # then the one that's free again soonest goes first.
+        available = [tier for tier in ordered if self.stats[tier.name].cooldown_until <= now]
+        if not available:
+            return [tier.name for tier in sorted(ordered, key=lambda t: self.stats[t.name].cooldown_until)]
+
+        # Stable sort: healthy first, tier order otherwise kept
+        return [tier.name for tier in sorted(available, key=lambda t: not self._healthy(t.name))]
+
+    def _record(self, name: str, latency: float | None, failed: bool):
+        stats = self.stats[name]
+        stats.calls += 1
+        if latency is not None:
+            stats.latencies.append(latency)
+        stats.error_rate += self.error_decay * ((1.0 if failed else 0.0) - stats.error_rate)
+        if failed:
+            stats.last_error = time.monotonic()
+
+    def record_success(self, name: str, latency: float):
+        self._record(name, latency, failed=False)
+
+    def record_error(self, name: str, latency: float | None = None):
+        self.stats[name].errors += 1
+        self._record(name, latency, failed=True)
+
+    def record_rate_limit(self, name: str, retry_after: float | None):
+        stats = self.stats[name]
+        stats.rate_limits += 1
+        stats.cooldown_until = time.monotonic() + (retry_after or 10.0)
+        self._record(name, None, failed=True)
+
+    def summary(self) -> dict[str, dict]:
+        return {
+            name: {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "rate_limits": stats.rate_limits,
+                "error_rate": stats.error_rate,
+                "p50": stats.percentile(0.50),
+                "p95": stats.percentile(0.95),
+                "p99": stats.percentile(0.99),
+                "cooling_down": stats.cooldown_until > time.monotonic(),
+            }
+            for name, stats in self.stats.items()
+        }
@@ -0,0 +1,175 @@
+"""
+Scheduler for AI model calls.
+Caps concurrency (globally and per guild), paces requests with a token bucket,
+and retries rate-limited calls after the server's retry delay instead of failing.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from .logger import setup_logger
+from .stats import percentile
+
+logger = setup_logger("model_scheduler")
+
+
+class RateLimited(Exception):
+    """Raised by a model call when the API answered with a 429."""
+
+    def __init__(self, retry_after: float | None = None, message: str = "Rate limited"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_delay(delay) -> float | None:
+    """Turn a google.rpc retryDelay ("12s", "1.5s") into seconds."""
+    if delay is None:
+        return None
+    if isinstance(delay, (int, float)):
+        return float(delay)
+    try:
+        return float(str(delay).strip().rstrip("s"))
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:  # FIFO-ish, waiters line up behind the lock
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ModelScheduler:
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_per_guild: int = 2,
+        requests_per_minute: float = 15,
+        burst: int = 5,
+        max_retries: int = 3,
+        base_backoff: float = 2.0,
+    ):
+        self.max_per_guild = max_per_guild
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self._global = asyncio.Semaphore(max_concurrent)
+        # guild id -> [semaphore, calls holding or waiting on it], dropped when that reaches 0
+        self._guilds: dict[int | None, list] = {}
+        self._bucket = TokenBucket(requests_per_minute / 60, burst)
+
+        # When the API tells us to back off, everyone backs off, not just the caller.
+        self._paused_until = 0.0
+
+        # Metrics
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self._waits: deque[float] = deque(maxlen=1000)
+
+    @asynccontextmanager
+    async def _guild_slot(self, guild_id: int | None):
+        entry = self._guilds.get(guild_id)
+        if entry is None:
+            entry = self._guilds[guild_id] = [asyncio.Semaphore(self.max_per_guild), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._guilds[guild_id]
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        delay = retry_after if retry_after is not None else self.base_backoff * (2 ** attempt)
+        return delay * random.uniform(1.0, 1.25)  # jitter, so retries don't all land at once
+
+    async def _wait_if_paused(self):
+        while (remaining := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(remaining)
+
+    async def submit(self, guild_id: int | None, call):
+        """
+        Run `call` (an async function taking no arguments) under the limits.
+        Retries on RateLimited up to max_retries times, then re-raises it.
+        """
+        submitted = time.monotonic()
+        waited = False
+        self.queued += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                # Pause and pacing first: a call only waiting for its turn mustn't hold a slot
+                await self._wait_if_paused()
+                await self._bucket.acquire()
+
+                async with self._guild_slot(guild_id), self._global:
+                    if not waited:
+                        waited = True
+                        self.queued -= 1
+                        self._waits.append(time.monotonic() - submitted)
+
+                    self.running += 1
+                    try:
+                        result = await call()
+                    except RateLimited as e:
+                        self.rate_limited += 1
+                        if attempt >= self.max_retries:
+                            self.failed += 1
+                            raise
+                        delay = self._backoff(attempt, e.retry_after)
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                        self.retries += 1
+                        logger.warning(f"Rate limited (guild={guild_id}), retrying in {delay:.1f}s")
+                        continue
+                    except Exception:
+                        self.failed += 1
+                        raise
+                    finally:
+                        self.running -= 1
+
+                    self.completed += 1
+                    return result
+        finally:
+            if not waited:
+                self.queued -= 1
+
+    def stats(self) -> dict:
+        waits = list(self._waits)
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "paused_for": max(0.0, self._paused_until - time.monotonic()),
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p50": percentile(waits, 0.50),
+            "wait_p95": percentile(waits, 0.95),
+        }
@@ -0,0 +1,111 @@
+"""
+Roll keywords for a character sheet, compiled once per sheet.
+
+compile_roll_table(sheet) turns a parsed sheet into {keyword: RollEntry}, covering ability
+checks (short and full names), saving throws ("dex save", "dexterity saving throw", ...),
+skills, initiative, weapon attacks and damage, and the user's own aliases (stored in the
+sheet's meta, see the charalias command). Rolling a keyword is then one dict lookup.
+"""
+
+import re
+from dataclasses import dataclass
+
+ABILITIES = {
+    "str": "Strength", "dex": "Dexterity", "con": "Constitution",
+    "int": "Intelligence", "wis": "Wisdom", "cha": "Charisma",
+}
+SAVE_SUFFIXES = ("save", "saving", "saving throw", "st")
+
+_DAMAGE_DICE_RE = re.compile(r"\d*d\d+(?:\s*[+-]\s*\d+)?", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True, slots=True)
+class RollEntry:
+    label: str
+    expression: str  # dice expression, e.g. "1d20+5"
+
+
+def normalize_keyword(text: str) -> str:
+    return _SPACES_RE.sub(" ", text.strip().lower())
+
+
+def signed(value) -> str | None:
+    """'+3', '3', ' -1 ' -> '+3', '+3', '-1'. None if it isn't a number."""
+    try:
+        return f"{int(str(value).replace(' ', '')):+d}"
+    except ValueError:
+        return None
+
+
+def iter_weapons(weapons: dict):
+    """
+    (name, attack bonus, damage) for each weapon. The parser files D&D Beyond's fields
+    oddly: every name lands in weapon 0 as "name", "name 2", ... while the numbers are in
+    weapons 1, 2, ..., so line them back up by number.
+    """
+    by_number: dict[int, dict] = {}
+    for index, fields in weapons.items():
+        number = int(index) or 1
+        for field, value in fields.items():
+            if field.startswith("name"):
+                suffix = field[4:].strip()
+                by_number.setdefault(int(suffix) if suffix.isdigit() else number, {})["name"] = value
+            else:
+                by_number.setdefault(number, {})[field] = value
+    for number in sorted(by_number):
+        weapon = by_number[number]
+        if weapon.get("name"):
+            yield weapon["name"], weapon.get("atkbonus", weapon.get("atk")), weapon.get("damage")
+
+
+def compile_roll_table(sheet: dict) -> dict[str, RollEntry]:
+    table: dict[str, RollEntry] = {}
+
+    def add(entry: RollEntry, *keywords: str):
+        for keyword in keywords:
+            table[normalize_keyword(keyword)] = entry
+
+    abilities = sheet.get("abilities", {})
+    saves = sheet.get("saving_throws", {})
+    for short, full in ABILITIES.items():
+        mod = signed(abilities.get(f"{short}_mod"))
+        if mod is not None:
+            add(RollEntry(full, f"1d20{mod}"), short, full, f"{short} check", f"{full} check")
+
+        save = signed(saves.get(short, {}).get("value"))
+        if save is not None:
+            entry = RollEntry(f"{full} (Saving Throw)", f"1d20{save}")
+            add(entry, *(f"{name} {suffix}" for name in (short, full) for suffix in SAVE_SUFFIXES))
+
+    skills = sheet.get("skills", [])
+    for skill in skills.values() if isinstance(skills, dict) else skills:
+        mod = signed(skill.get("value"))
+        if mod is not None and skill.get("name"):
+            name = skill["name"]
+            keywords = [name, name.replace(" ", "")]
+            if name == "Animal Handling":
+                keywords.append("animal")
+            add(RollEntry(name, f"1d20{mod}"), *keywords)
+
+    initiative = signed(sheet.get("combat", {}).get("initiative"))
+    if initiative is not None:
+        add(RollEntry("Initiative", f"1d20{initiative}"), "initiative", "init")
+
+    for name, attack, damage in iter_weapons(sheet.get("weapons", {})):
+        attack = signed(attack)
+        if attack is not None:
+            add(RollEntry(f"{name} (Attack)", f"1d20{attack}"), name, f"{name} attack", f"{name} atk")
+        dice = _DAMAGE_DICE_RE.search(damage or "")
+        if dice:
+            add(RollEntry(f"{name} (Damage)", dice.group(0).replace(" ", "")), f"{name} damage", f"{name} dmg")
+
+    # User aliases last, so they can point at anything above (but not replace it)
+    for alias, target in sheet.get("meta", {}).get("aliases", {}).items():
+        alias = normalize_keyword(alias)
+        if alias in table:
+            continue
+        entry = table.get(normalize_keyword(target))
+        table[alias] = entry if entry is not None else RollEntry(alias, target)
+
+    return table
@@ -0,0 +1,150 @@
+"""
+In-memory cache of D&D character sheets, shared by the dndhelper cog and its views.
+
+Sheets live in data/dnd_helper/sheets/<guild id>/<name>.json. Parsed sheets and each guild's
+list of names are kept in memory. Files are only stat'ed again once `recheck_seconds` have
+passed since the last check (so a burst of rolls touches no disk at all), and only re-read
+when their mtime changed. Writes through save() update the cache right away.
+
+Returned sheets are shared with the cache: treat them as read-only.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+from .files import write_json_atomic
+from .logger import setup_logger
+
+logger = setup_logger("sheet_repository")
+
+
+class _Sheet:
+    __slots__ = ("mtime", "checked_at", "data")
+
+    def __init__(self, mtime: int, checked_at: float, data: dict):
+        self.mtime = mtime
+        self.checked_at = checked_at
+        self.data = data
+
+
+class _Guild:
+    __slots__ = ("mtime", "checked_at", "names", "sheets")
+
+    def __init__(self):
+        self.mtime: int | None = None  # directory mtime the name list was read at
+        self.checked_at = 0.0
+        self.names: list[str] = []
+        self.sheets: dict[str, _Sheet] = {}
+
+
+class SheetRepository:
+    def __init__(self, root: str, recheck_seconds: float = 5.0):
+        self.root = root
+        self.recheck_seconds = recheck_seconds
+        self._guilds: dict[int, _Guild] = {}
+        self._lock = threading.Lock()  # the blocking parts run in worker threads
+
+    def _path(self, guild_id: int, name: str | None = None) -> str:
+        if name is None:
+            return os.path.join(self.root, str(guild_id))
+        return os.path.join(self.root, str(guild_id), f"{name}.json")
+
+    def _fresh(self, checked_at: float) -> bool:
+        return time.monotonic() - checked_at < self.recheck_seconds
+
+    # --- sync implementations (run in a worker thread) ---
+
+    def _sync_guild(self, guild_id: int) -> _Guild:
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = _Guild()
+        if self._fresh(guild.checked_at):
+            return guild
+
+        path = self._path(guild_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != guild.mtime:
+            # Something was added, removed or renamed: rescan the names
+            names = sorted(f[:-5] for f in os.listdir(path) if f.endswith(".json")) if mtime is not None else []
+            for gone in set(guild.sheets) - set(names):
+                del guild.sheets[gone]
+            guild.names = names
+            guild.mtime = mtime
+        guild.checked_at = time.monotonic()
+        return guild
+
+    def _load(self, guild_id: int, name: str) -> dict | None:
+        with self._lock:
+            guild = self._sync_guild(guild_id)
+            sheet = guild.sheets.get(name)
+            if sheet is not None and self._fresh(sheet.checked_at):
+                return sheet.data
+
+            path = self._path(guild_id, name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                guild.sheets.pop(name, None)
+                return None
+            if sheet is None or sheet.mtime != mtime:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                sheet = guild.sheets[name] = _Sheet(mtime, 0.0, data)
+                logger.debug(f"Loaded sheet {name} for guild={guild_id}")
+            sheet.checked_at = time.monotonic()
+            return sheet.data
+
+    def _names(self, guild_id: int) -> list[str]:
+        with self._lock:
+            return list(self._sync_guild(guild_id).names)
+
+    def _save(self, guild_id: int, name: str, data: dict):
+        path = self._path(guild_id, name)
+        write_json_atomic(path, data)
+
+        with self._lock:
+            guild = self._sync_guild(guild_id)
+            now = time.monotonic()
+            guild.sheets[name] = _Sheet(os.stat(path).st_mtime_ns, now, data)
+            if name not in guild.names:
+                guild.names = sorted([*guild.names, name])
+            # Our own write bumped the directory mtime; no need to rescan for it
+            guild.mtime = os.stat(os.path.dirname(path)).st_mtime_ns
+            guild.checked_at = now
+
+    # --- async API ---
+
+    async def names(self, guild_id: int) -> list[str]:
+        """Names of all sheets saved in a guild, sorted."""
+        guild = self._guilds.get(guild_id)
+        if guild is not None and self._fresh(guild.checked_at):
+            return list(guild.names)
+        return await asyncio.to_thread(self._names, guild_id)
+
+    async def get(self, guild_id: int, name: str) -> dict | None:
+        """A parsed sheet, or None if there's no sheet by that name."""
+        guild = self._guilds.get(guild_id)
+        if guild is not None and self._fresh(guild.checked_at):
+            sheet = guild.sheets.get(name)
+            if sheet is not None and self._fresh(sheet.checked_at):
+                return sheet.data
+            if sheet is None and name not in guild.names:
+                return None
+        return await asyncio.to_thread(self._load, guild_id, name)
+
+    async def save(self, guild_id: int, name: str, data: dict):
+        await asyncio.to_thread(self._save, guild_id, name, data)
+
+    def invalidate(self, guild_id: int | None = None):
+        """Forget cached state so the next access goes back to disk."""
+        with self._lock:
+            if guild_id is None:
+                self._guilds.clear()
+            else:
+                self._guilds.pop(guild_id, None)
@@ -0,0 +1,24 @@
+"""Base for the bot's sqlite-backed stores: one shared connection, used from worker threads."""
+
+import asyncio
+import os
+import sqlite3
+import threading
+
+
+class SqliteStore:
+    def __init__(self, path: str, schema: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(schema)
+        self._lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        """Run fn(*args) in a worker thread, holding the connection."""
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return asyncio.to_thread(locked)
@@ -0,0 +1,9 @@
+"""Small helpers for the stats() summaries modules report."""
+
+
+def percentile(values, p: float) -> float:
+    """Nearest-rank percentile of `values` (any iterable), p in 0..1; 0.0 when empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]